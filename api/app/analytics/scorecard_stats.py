@@ -0,0 +1,425 @@
+# api/app/analytics/scorecard_stats.py
+from __future__ import annotations
+
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_CANDIDATE_HINTS = ("candidate", "name", "applicant")
+_EVALUATOR_HINTS = ("evaluator", "interviewer", "reviewer", "rater")
+_NO_RATINGS = {"error": "No numeric rating columns found in scorecard."}
+
+# Streamed means/stdevs can differ from statistics.mean/stdev (exact
+# arithmetic) in the last bits. That only shows in the output when a value
+# sits on a round(x, 2) tie or a threshold, so those values are recomputed
+# exactly; everything else keeps the fast path.
+_TIE_TOLERANCE = 1e-9
+_SQRT_BIT_WIDTH = 2 * 53 + 3   # as in statistics: enough bits for a correctly rounded float sqrt
+
+
+def _parses_as_rating(value: Any) -> bool:
+    try:
+        float(str(value).replace(",", ""))
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def _safe_float(value: Any) -> float:
+    try:
+        return float(str(value).replace(",", ""))
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _cell_float(value: Any) -> float:
+    """``_safe_float`` of a cell as the row dicts saw it (missing → "" → 0.0)."""
+    kind = type(value)
+    if kind is float:
+        return 0.0 if value != value else value
+    if kind is int:
+        return float(value)
+    if value is None:
+        return 0.0
+    return _safe_float(value)
+
+
+def _coerce_ratings(series: pd.Series) -> np.ndarray:
+    """
+    ``float(str(v).replace(",", ""))`` per cell, 0.0 where that fails or the
+    cell is missing. Numeric columns convert in one step; only text/mixed
+    columns (e.g. "1,000", XLSX cells with notes) go cell by cell.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=float, na_value=0.0)
+    return np.fromiter(map(_cell_float, series.to_numpy(dtype=object)), dtype=float, count=len(series))
+
+
+def _group_keys(series: pd.Series) -> pd.Series:
+    """``str(cell)`` per row, missing cells as "" — the keys the row dicts grouped by."""
+    if isinstance(series.dtype, pd.StringDtype):
+        return series.fillna("")
+    blanked = series.astype(object).where(series.notna(), "")
+    return pd.Series([str(v) for v in blanked], index=series.index, dtype=object)
+
+
+def _near_round_tie(x: np.ndarray) -> np.ndarray:
+    """True where round(x, 2) could flip on last-bits float error (a .xx5 tie, or the sign of ~0)."""
+    scaled = np.abs(x) * 100
+    tolerance = _TIE_TOLERANCE * np.maximum(scaled, 1.0)
+    return (np.abs(scaled - np.floor(scaled) - 0.5) <= tolerance) | (scaled <= tolerance)
+
+
+def _near(x: np.ndarray, bound: Any) -> np.ndarray:
+    return np.abs(x - bound) <= _TIE_TOLERANCE * max(abs(bound), 1.0)
+
+
+def _sqrt_of_frac(num: int, den: int) -> float:
+    """sqrt(num / den) correctly rounded — the value statistics.stdev returns for that variance."""
+    def _isqrt_round_to_odd(n: int, m: int) -> int:
+        root = math.isqrt(n // m)
+        return root | (root * root * m != n)
+
+    # Enough extra bits that the one int → float division below rounds correctly
+    shift = (num.bit_length() - den.bit_length() - _SQRT_BIT_WIDTH) // 2
+    if shift >= 0:
+        return (_isqrt_round_to_odd(num, den << 2 * shift) << shift) / 1
+    return _isqrt_round_to_odd(num << -2 * shift, den) / (1 << -shift)
+
+
+class _ExactMoments:
+    """Exact count, sum and sum of squares of floats, as integers over power-of-two denominators."""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self._sx: Dict[int, int] = defaultdict(int)
+        self._sxx: Dict[int, int] = defaultdict(int)
+        self._special: Optional[float] = None   # sum of inf/nan values, which poison the result
+
+    def add(self, values: Iterable[float]) -> None:
+        sx, sxx = self._sx, self._sxx
+        for value in values:
+            self.n += 1
+            if math.isfinite(value):
+                num, den = value.as_integer_ratio()
+                sx[den] += num
+                sxx[den] += num * num
+            else:
+                self._special = value if self._special is None else self._special + value
+
+    def _sum(self) -> Fraction:
+        return sum((Fraction(num, den) for den, num in self._sx.items()), Fraction(0))
+
+    def mean(self) -> float:
+        """statistics.mean, bit for bit."""
+        if self._special is not None:
+            return self._special
+        return float(self._sum() / self.n)
+
+    def stdev(self) -> float:
+        """statistics.stdev, bit for bit (n >= 2)."""
+        if self._special is not None:
+            return math.nan
+        sx = self._sum()
+        sxx = sum((Fraction(num, den * den) for den, num in self._sxx.items()), Fraction(0))
+        variance = (self.n * sxx - sx * sx) / (self.n * (self.n - 1))
+        return _sqrt_of_frac(variance.numerator, variance.denominator)
+
+
+def _combine(
+    na: np.ndarray, mean_a: np.ndarray, m2_a: np.ndarray,
+    nb: np.ndarray, mean_b: np.ndarray, m2_b: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge two sets of (count, mean, M2) — Welford's update generalized to
+    whole chunks (Chan et al.). A side with count 0 passes the other through
+    unchanged, so a group seen in one chunk keeps that chunk's mean exactly.
+    """
+    n = na + nb
+    delta = mean_b - mean_a
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(n > 0, nb / np.maximum(n, 1), 0.0)
+        mean = np.where(na == 0, mean_b, np.where(nb == 0, mean_a, mean_a + delta * weight))
+        m2 = np.where(
+            (na == 0) | (nb == 0), m2_a + m2_b, m2_a + m2_b + delta * delta * (na * weight),
+        )
+    return n, mean, m2
+
+
+class _Moments:
+    """Running count/mean/M2 per key, in first-appearance order, updated one chunk at a time."""
+
+    def __init__(self) -> None:
+        self._pos: Dict[Any, int] = {}
+        self.n = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    @property
+    def names(self) -> List[Any]:
+        return list(self._pos)
+
+    def merge(self, names: Sequence[Any], n: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> None:
+        pos = self._pos
+        idx = np.fromiter((pos.setdefault(k, len(pos)) for k in names), dtype=np.intp, count=len(names))
+        if len(pos) > len(self.n):
+            capacity = max(len(pos), 2 * len(self.n))   # amortized growth, not a copy per chunk
+            grow = capacity - len(self.n)
+            self.n = np.concatenate([self.n, np.zeros(grow, dtype=np.int64)])
+            self.mean = np.concatenate([self.mean, np.zeros(grow)])
+            self.m2 = np.concatenate([self.m2, np.zeros(grow)])
+        self.n[idx], self.mean[idx], self.m2[idx] = _combine(
+            self.n[idx], self.mean[idx], self.m2[idx], n, mean, m2,
+        )
+
+    def update(self, keys: pd.Series, overall: np.ndarray) -> None:
+        agg = pd.Series(overall, index=keys.index).groupby(keys, sort=False).agg(["size", "mean", "var"])
+        n = agg["size"].to_numpy(dtype=np.int64)
+        m2 = np.where(n > 1, agg["var"].to_numpy() * (n - 1), 0.0)
+        self.merge(agg.index.tolist(), n, agg["mean"].to_numpy(), m2)
+
+    def finish(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``(counts, means, sample stdevs)``; the stdev of a single-score group is NaN."""
+        size = len(self._pos)
+        n, mean, m2 = self.n[:size], self.mean[:size], np.maximum(self.m2[:size], 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(m2 / (n - 1))
+        return n, mean, std
+
+
+@dataclass
+class _Layout:
+    rating_cols: List[Any]
+    candidate_col: Optional[Any]
+    evaluator_col: Optional[Any]
+
+    @classmethod
+    def detect(cls, first: pd.Series) -> Optional["_Layout"]:
+        """Ratings are the columns whose first-row value parses as a number; None if there are none."""
+        id_cols: List[Any] = []
+        rating_cols: List[Any] = []
+        for col, value in first.items():
+            value = "" if pd.isna(value) else value
+            (rating_cols if _parses_as_rating(value) else id_cols).append(col)
+        if not rating_cols:
+            return None
+        candidate_col = next(
+            (c for c in id_cols if any(k in c.lower() for k in _CANDIDATE_HINTS)),
+            id_cols[0] if id_cols else None,
+        )
+        evaluator_col = next(
+            (c for c in id_cols if any(k in c.lower() for k in _EVALUATOR_HINTS)),
+            id_cols[1] if len(id_cols) > 1 else None,
+        )
+        return cls(rating_cols, candidate_col, evaluator_col)
+
+    def derive(self, chunk: pd.DataFrame) -> Tuple[np.ndarray, Optional[pd.Series], Optional[pd.Series]]:
+        """Per-row overall score (summed column by column, in order) and the group keys."""
+        total = np.zeros(len(chunk))
+        for col in self.rating_cols:
+            total = total + _coerce_ratings(chunk[col])
+        overall = total / len(self.rating_cols)
+        candidates = _group_keys(chunk[self.candidate_col]) if self.candidate_col is not None else None
+        evaluators = _group_keys(chunk[self.evaluator_col]) if self.evaluator_col is not None else None
+        return overall, candidates, evaluators
+
+
+def _add_selected(exact: Dict[Any, _ExactMoments], keys: Optional[pd.Series], overall: np.ndarray) -> None:
+    if not exact or keys is None:
+        return
+    mask = keys.isin(list(exact)).to_numpy()
+    if not mask.any():
+        return
+    selected, values = keys[mask], overall[mask]
+    for key, idx in selected.groupby(selected, sort=False).indices.items():
+        exact[key].add(values[idx].tolist())
+
+
+class ScorecardAccumulator:
+    """
+    Scorecard statistics over a table that arrives in chunks (e.g.
+    ``pd.read_csv(..., chunksize=...)``), holding only running per-candidate
+    and per-evaluator count/mean/M2 — memory grows with the number of
+    candidates and evaluators, not rows.
+
+    ``result()`` returns exactly what ``compute_scorecard_stats`` returns for
+    the whole table. When a streamed value lands on a rounding tie or a
+    threshold, the groups concerned are recomputed exactly in a second pass
+    over ``reread()`` (only needed if more than one chunk was added).
+    """
+
+    def __init__(self) -> None:
+        self._layout: Optional[_Layout] = None
+        self._no_ratings = False
+        self._chunks = 0
+        self._last: Optional[Tuple[np.ndarray, Optional[pd.Series], Optional[pd.Series]]] = None
+        self.n_rows = 0
+        self._global = _Moments()
+        self._candidates = _Moments()
+        self._evaluators = _Moments()
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        if chunk.empty or self._no_ratings:
+            return
+        if self._layout is None:
+            self._layout = _Layout.detect(chunk.iloc[0])
+            if self._layout is None:
+                self._no_ratings = True
+                return
+        overall, candidates, evaluators = derived = self._layout.derive(chunk)
+        self._chunks += 1
+        self._last = derived
+        self.n_rows += len(overall)
+
+        chunk_mean = overall.mean()
+        m2 = float(((overall - chunk_mean) ** 2).sum())
+        self._global.merge([None], np.array([len(overall)]), np.array([chunk_mean]), np.array([m2]))
+        if candidates is not None:
+            self._candidates.update(candidates, overall)
+        if evaluators is not None:
+            self._evaluators.update(evaluators, overall)
+
+    def _derived_chunks(
+        self, reread: Optional[Callable[[], Iterable[pd.DataFrame]]],
+    ) -> Iterator[Tuple[np.ndarray, Optional[pd.Series], Optional[pd.Series]]]:
+        if self._chunks == 1:
+            yield self._last
+            return
+        if reread is None:
+            raise ValueError("exact recompute over several chunks needs reread()")
+        for chunk in reread():
+            if not chunk.empty:
+                yield self._layout.derive(chunk)
+
+    def _exact_pass(
+        self,
+        reread: Optional[Callable[[], Iterable[pd.DataFrame]]],
+        candidate_keys: Set[Any],
+        evaluator_keys: Set[Any],
+        whole: bool,
+    ) -> Tuple[Dict[Any, _ExactMoments], Dict[Any, _ExactMoments], Optional[_ExactMoments]]:
+        candidates = {k: _ExactMoments() for k in candidate_keys}
+        evaluators = {k: _ExactMoments() for k in evaluator_keys}
+        total = _ExactMoments() if whole else None
+        for overall, candidate_keys_, evaluator_keys_ in self._derived_chunks(reread):
+            if total is not None:
+                total.add(overall.tolist())
+            _add_selected(candidates, candidate_keys_, overall)
+            _add_selected(evaluators, evaluator_keys_, overall)
+        logger.info(
+            "scorecard_exact_pass chunks=%d candidates=%d evaluators=%d global=%s",
+            self._chunks, len(candidates), len(evaluators), whole,
+        )
+        return candidates, evaluators, total
+
+    def result(self, reread: Optional[Callable[[], Iterable[pd.DataFrame]]] = None) -> Dict[str, Any]:
+        if self._no_ratings:
+            return dict(_NO_RATINGS)
+        if self._layout is None:
+            return {}
+        layout = self._layout
+        n_rows = self.n_rows
+
+        _, global_means, global_stds = self._global.finish()
+        global_mean = float(global_means[0])
+        global_stdev: Any = float(global_stds[0]) if n_rows > 1 else 0
+
+        cand_n, cand_means, cand_stds = self._candidates.finish()
+        eval_n, eval_means, _ = self._evaluators.finish()
+        cand_names = self._candidates.names
+        eval_names = self._evaluators.names
+
+        # Evaluator outlier flags depend on the global stats, so an evaluator near
+        # a boundary pulls the global mean/stdev onto the exact path too.
+        deviation = eval_means - global_mean
+        eval_exact = (
+            _near_round_tie(eval_means) | _near_round_tie(deviation)
+            | _near(np.abs(deviation), max(global_stdev * 1.5, 0.5))
+        )
+        whole_exact = bool(eval_exact.any() or _near_round_tie(np.array([global_mean, global_stdev])).any())
+        multi = cand_n > 1
+        cand_mean_exact = _near_round_tie(cand_means)
+        cand_std_exact = multi & (_near_round_tie(cand_stds) | _near(cand_stds, 1.0))
+
+        exact_candidates: Dict[Any, _ExactMoments] = {}
+        exact_evaluators: Dict[Any, _ExactMoments] = {}
+        if whole_exact or cand_mean_exact.any() or cand_std_exact.any():
+            exact_candidates, exact_evaluators, total = self._exact_pass(
+                reread,
+                {cand_names[i] for i in np.flatnonzero(cand_mean_exact | cand_std_exact)},
+                {eval_names[i] for i in np.flatnonzero(eval_exact)},
+                whole_exact,
+            )
+            if total is not None:
+                global_mean = total.mean()
+                global_stdev = total.stdev() if n_rows > 1 else 0
+
+        candidate_stats: Dict[str, Any] = {}
+        if layout.candidate_col is not None:
+            rows = zip(cand_names, cand_means.tolist(), cand_stds.tolist(), cand_n.tolist(),
+                       cand_mean_exact.tolist(), cand_std_exact.tolist())
+            for cname, mean, var, count, exact_mean, exact_std in rows:
+                if exact_mean:
+                    mean = exact_candidates[cname].mean()
+                if count < 2:
+                    var = 0
+                elif exact_std:
+                    var = exact_candidates[cname].stdev()
+                candidate_stats[cname] = {
+                    "mean": round(mean, 2),
+                    "stdev": round(var, 2),
+                    "n_evaluators": count,
+                    "high_variance": var > 1.0,
+                }
+
+        evaluator_stats: Dict[str, Any] = {}
+        if layout.evaluator_col is not None:
+            rows = zip(eval_names, eval_means.tolist(), eval_n.tolist(), eval_exact.tolist())
+            for ename, mean, count, exact in rows:
+                if exact:
+                    mean = exact_evaluators[ename].mean()
+                deviation = mean - global_mean
+                evaluator_stats[ename] = {
+                    "mean": round(mean, 2),
+                    "deviation_from_panel": round(deviation, 2),
+                    "outlier": abs(deviation) > max(global_stdev * 1.5, 0.5),
+                    "n_ratings": count,
+                }
+
+        return {
+            "rating_columns": layout.rating_cols,
+            "candidate_column": layout.candidate_col,
+            "evaluator_column": layout.evaluator_col,
+            "global_mean": round(global_mean, 2),
+            "global_stdev": round(global_stdev, 2),
+            "n_rows": n_rows,
+            "candidate_stats": candidate_stats,
+            "evaluator_stats": evaluator_stats,
+        }
+
+
+def compute_scorecard_stats(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compute per-candidate and per-evaluator statistics from a scorecard table.
+    Detects which columns are ratings (numeric) vs identifiers (text) from the
+    first row, as the row-based version did, and returns exactly the same
+    dict — numbers, types and key order — without materializing row dicts.
+    """
+    accumulator = ScorecardAccumulator()
+    accumulator.add(df)
+    return accumulator.result()
+
+
+def compute_scorecard_stats_from_rows(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Same statistics for callers that only have row dicts (e.g. graph tests)."""
+    if not rows:
+        return {}
+    return compute_scorecard_stats(pd.DataFrame.from_records(list(rows)))
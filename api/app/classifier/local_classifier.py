@@ -0,0 +1,155 @@
+# api/app/classifier/local_classifier.py
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CORPUS_PATH = Path(__file__).resolve().parent / "corpus.jsonl"
+
+N_FEATURES = 1 << 14
+MAX_CHARS = 2_500           # the opening of a document carries the type signal
+_EPOCHS = 300
+_LEARNING_RATE = 4.0
+_L2 = 1e-4
+
+_WORD = re.compile(r"[a-z][a-z'+#.]*[a-z+#]|[a-z]")
+_STRUCTURE = [
+    (re.compile(r"\b(19|20)\d{2}\s*(-|–|—|to)\s*((19|20)\d{2}|present|current)\b", re.I), "__date_range__"),
+    (re.compile(r"^\s*[•\-\*▪●]\s", re.M), "__bullet__"),
+    (re.compile(r"^\s*(dear|to whom it may concern)\b", re.I | re.M), "__salutation__"),
+    (re.compile(r"^\s*(sincerely|best regards|kind regards|regards),?\s*$", re.I | re.M), "__signoff__"),
+    (re.compile(r"\b[1-5](\.\d)?\s*/\s*(5|10)\b"), "__rating__"),
+    (re.compile(r"^\s*(q|a|question|answer)\s*[:.)]", re.I | re.M), "__qa__"),
+    (re.compile(r"@[a-z0-9-]+\.[a-z]{2,}", re.I), "__email__"),
+]
+
+
+@dataclass
+class LocalPrediction:
+    doc_type: str
+    confidence: float
+    ms: float
+
+
+def _features(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed, log-scaled, L2-normalised unigram + bigram + structure counts."""
+    text = text[:MAX_CHARS]
+    words = _WORD.findall(text.lower())
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for pattern, marker in _STRUCTURE:
+        tokens.extend([marker] * min(len(pattern.findall(text)), 5))
+
+    counts: Dict[int, int] = {}
+    for tok in tokens:
+        h = zlib.crc32(tok.encode("utf-8")) & (N_FEATURES - 1)
+        counts[h] = counts.get(h, 0) + 1
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    val = np.log1p(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+    val /= np.linalg.norm(val)
+    return idx, val
+
+
+class LocalDocClassifier:
+    """
+    Multinomial logistic regression over hashed n-gram features.
+
+    Trained in-process from the labeled corpus on first use (a fraction of a
+    second); prediction is a sparse dot product and a softmax.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: List[str]) -> None:
+        self.weights = weights      # (N_FEATURES, n_labels)
+        self.bias = bias            # (n_labels,)
+        self.labels = labels
+
+    @classmethod
+    def train(cls, samples: List[Tuple[str, str]]) -> "LocalDocClassifier":
+        labels = sorted({label for _, label in samples})
+        label_idx = {label: i for i, label in enumerate(labels)}
+
+        # Train on the hashed columns the corpus actually touches, then scatter
+        # the learned weights back into the full feature space.
+        encoded = [_features(text) for text, _ in samples]
+        active = np.unique(np.concatenate([idx for idx, _ in encoded]))
+        column = {int(h): i for i, h in enumerate(active)}
+
+        X = np.zeros((len(samples), len(active)))
+        y = np.zeros((len(samples), len(labels)))
+        for row, ((idx, val), (_, label)) in enumerate(zip(encoded, samples)):
+            X[row, [column[int(h)] for h in idx]] = val
+            y[row, label_idx[label]] = 1.0
+
+        W_active = np.zeros((len(active), len(labels)))
+        b = np.zeros(len(labels))
+        n = len(samples)
+        for _ in range(_EPOCHS):
+            logits = X @ W_active + b
+            logits -= logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            grad = probs - y
+            W_active -= _LEARNING_RATE * (X.T @ grad / n + _L2 * W_active)
+            b -= _LEARNING_RATE * grad.mean(axis=0)
+
+        W = np.zeros((N_FEATURES, len(labels)))
+        W[active] = W_active
+        return cls(W, b, labels)
+
+    def predict(self, text: str) -> LocalPrediction:
+        t0 = time.perf_counter()
+        idx, val = _features(text)
+        logits = self.bias + val @ self.weights[idx]
+        logits -= logits.max()
+        probs = np.exp(logits)
+        probs /= probs.sum()
+        best = int(probs.argmax())
+        ms = (time.perf_counter() - t0) * 1000
+        return LocalPrediction(doc_type=self.labels[best], confidence=float(probs[best]), ms=ms)
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> List[Tuple[str, str]]:
+    samples = []
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                record = json.loads(line)
+                samples.append((record["text"], record["doc_type"]))
+    return samples
+
+
+_model: Optional[LocalDocClassifier] = None
+_model_lock = threading.Lock()
+
+
+def get_classifier() -> LocalDocClassifier:
+    """Return the process-wide model, training it from the corpus on first call."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                t0 = time.perf_counter()
+                samples = load_corpus()
+                _model = LocalDocClassifier.train(samples)
+                logger.info(
+                    "local_classifier trained samples=%d labels=%d ms=%d",
+                    len(samples), len(_model.labels), int((time.perf_counter() - t0) * 1000),
+                )
+    return _model
+
+
+def classify_locally(text: str) -> LocalPrediction:
+    return get_classifier().predict(text)
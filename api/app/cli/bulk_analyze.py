@@ -0,0 +1,278 @@
+# api/app/cli/bulk_analyze.py
+"""
+Offline bulk analysis over a directory of HR documents.
+
+    python -m api.app.cli.bulk_analyze ./round-2024 --out results.jsonl
+
+Walks the directory, runs every supported file through the same pipeline as
+/agent/analyze (parse in the process pool, analyze graph on the event loop,
+``--concurrency`` documents at a time) and appends one JSON line per
+document to ``--out``. Finished documents are recorded in a checkpoint file
+so an interrupted run picks up where it stopped; a document whose content
+changed since it was checkpointed is analyzed again.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+from api.app.classifier.local_classifier import get_classifier
+from api.app.clients.deadline import deadline_in
+from api.app.clients.http_client import close_http_client, open_http_client
+from api.app.parsers.document_parser import SUPPORTED_EXTENSIONS
+from api.app.parsers.parse_pool import shutdown_parse_pool
+from api.app.runner.analysis_cache import content_sha256
+from api.app.runner.analyze_runner import run_analyze
+from api.app.schemas.analyze import AnalyzeResponse
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_STAGES = ("parse", "parse_queue", "vision", "graph", "total")
+
+
+@dataclass
+class BulkStats:
+    done: int = 0
+    failed: int = 0
+    resumed: int = 0
+    timings: Dict[str, List[int]] = field(default_factory=lambda: {s: [] for s in _STAGES})
+
+    def record(self, stage: str, ms: Optional[int]) -> None:
+        if ms is not None:
+            self.timings[stage].append(ms)
+
+
+def percentile(values: List[int], pct: float) -> int:
+    """Nearest-rank percentile; 0 for an empty list."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = min(max(math.ceil(pct / 100 * len(ordered)), 1), len(ordered))
+    return ordered[rank - 1]
+
+
+def iter_documents(root: Path) -> Iterator[Path]:
+    """Supported files under ``root`` in a stable order, skipping dotfiles and dot-directories."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            ext = name.lower().rsplit(".", 1)[-1] if "." in name else ""
+            if not name.startswith(".") and ext in SUPPORTED_EXTENSIONS:
+                yield Path(dirpath) / name
+
+
+def load_checkpoint(path: Path, retry_failed: bool = False) -> Set[Tuple[str, str]]:
+    """
+    ``(relative path, sha256)`` pairs already written to the output. With
+    ``retry_failed``, documents whose last result was a failure are left out
+    so they run again.
+    """
+    finished: Set[Tuple[str, str]] = set()
+    if not path.exists():
+        return finished
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+                key = (entry["path"], entry["sha256"])
+            except (ValueError, KeyError):
+                continue  # torn last line from a killed run
+            if retry_failed and not entry.get("ok", True):
+                finished.discard(key)
+            else:
+                finished.add(key)
+    return finished
+
+
+def _stage_timings(response: AnalyzeResponse) -> Dict[str, Optional[int]]:
+    """Split one document's wall time into stages using its action trail."""
+    parse_ms = parse_queue_ms = None
+    vision_ms = None
+    for action in response.actions_taken:
+        if action.name == "parse_document":
+            parse_ms = action.ms
+            parse_queue_ms = action.details.get("queue_ms")
+        elif action.name == "vision_transcribe":
+            vision_ms = action.ms
+    return {"parse": parse_ms, "parse_queue": parse_queue_ms, "vision": vision_ms}
+
+
+def document_failed(response: AnalyzeResponse) -> bool:
+    """
+    A result worth retrying: it carries warnings, or an LLM call failed. A
+    fused pass that deferred to classify → analyze is not a failure, and
+    neither is a document that simply classified as ``unknown``.
+    """
+    if response.warnings:
+        return True
+    return any(
+        a.kind == "llm" and not a.ok and "fallback" not in a.details for a in response.actions_taken
+    )
+
+
+async def _analyze_one(
+    path: Path, rel: str, digest: str, budget: float, use_cache: bool = True,
+) -> Tuple[AnalyzeResponse, Dict[str, Optional[int]]]:
+    request_id = hashlib.sha256(rel.encode()).hexdigest()[:32]
+    t0 = time.perf_counter()
+    try:
+        # The path, not the bytes: the parse worker opens the file itself
+        result = await run_analyze(
+            filename=path.name,
+            content=path,
+            request_id=request_id,
+            deadline=deadline_in(budget),
+            content_sha256=digest,
+            use_cache=use_cache,
+        )
+        response = AnalyzeResponse(**result)
+    except Exception as exc:
+        logger.error("bulk_analyze failed path=%s error=%s", rel, exc)
+        response = AnalyzeResponse(
+            request_id=request_id, filename=path.name, doc_type="unknown", doc_type_confidence=0.0,
+            summary="", warnings=[str(exc)],
+        )
+    total_ms = int((time.perf_counter() - t0) * 1000)
+    timings = _stage_timings(response)
+    timings["total"] = total_ms
+    timings["graph"] = max(total_ms - (timings["parse"] or 0) - (timings["vision"] or 0), 0)
+    return response, timings
+
+
+async def run_bulk(
+    root: Path,
+    out: TextIO,
+    checkpoint: TextIO,
+    finished: Set[Tuple[str, str]],
+    concurrency: int,
+    budget: float,
+    limit: Optional[int] = None,
+    use_cache: bool = True,
+) -> BulkStats:
+    """
+    Analyze every document under ``root`` not already in ``finished``.
+
+    Each result is written (and flushed) to ``out`` before its checkpoint
+    line, so a crash in between re-analyzes that one document on resume
+    rather than losing it.
+    """
+    stats = BulkStats()
+    paths = iter_documents(root)
+    started = 0
+
+    async def _next() -> Optional[Tuple[Path, str, str]]:
+        nonlocal started
+        while True:
+            path = next(paths, None)
+            if path is None:
+                return None
+            rel = path.relative_to(root).as_posix()
+            digest = await asyncio.to_thread(content_sha256, path)
+            if (rel, digest) in finished:
+                stats.resumed += 1
+                continue
+            if limit is not None and started >= limit:
+                return None
+            started += 1
+            return path, rel, digest
+
+    async def _worker() -> None:
+        while (item := await _next()) is not None:
+            path, rel, digest = item
+            response, timings = await _analyze_one(path, rel, digest, budget, use_cache)
+            failed = document_failed(response)
+
+            out.write(json.dumps({"path": rel, "sha256": digest, **response.model_dump(mode="json")}) + "\n")
+            out.flush()
+            checkpoint.write(json.dumps({"path": rel, "sha256": digest, "ok": not failed}) + "\n")
+            checkpoint.flush()
+
+            stats.done += 1
+            stats.failed += failed
+            for stage, ms in timings.items():
+                stats.record(stage, ms)
+            if stats.done % 25 == 0:
+                logger.info("bulk_analyze progress done=%d failed=%d", stats.done, stats.failed)
+
+    await asyncio.gather(*[_worker() for _ in range(max(concurrency, 1))])
+    return stats
+
+
+def format_report(stats: BulkStats, elapsed_s: float) -> str:
+    rate = stats.done / elapsed_s * 60 if elapsed_s > 0 else 0.0
+    lines = [
+        f"documents={stats.done} failed={stats.failed} resumed={stats.resumed} "
+        f"elapsed={elapsed_s:.1f}s throughput={rate:.1f}/min",
+        f"{'stage':<12} {'p50_ms':>8} {'p95_ms':>8} {'n':>6}",
+    ]
+    for stage in _STAGES:
+        values = stats.timings[stage]
+        lines.append(f"{stage:<12} {percentile(values, 50):>8} {percentile(values, 95):>8} {len(values):>6}")
+    return "\n".join(lines)
+
+
+async def _main(args: argparse.Namespace) -> BulkStats:
+    checkpoint_path = Path(args.checkpoint or f"{args.out}.checkpoint")
+    finished = load_checkpoint(checkpoint_path, retry_failed=args.retry_failed)
+    await open_http_client()
+    if settings.local_classifier_enabled:
+        await asyncio.to_thread(get_classifier)
+    try:
+        with open(args.out, "a", encoding="utf-8") as out, \
+                checkpoint_path.open("a", encoding="utf-8") as checkpoint:
+            return await run_bulk(
+                root=Path(args.directory), out=out, checkpoint=checkpoint, finished=finished,
+                concurrency=args.concurrency, budget=args.budget_seconds, limit=args.limit,
+                use_cache=not args.no_cache,
+            )
+    finally:
+        await close_http_client()
+        shutdown_parse_pool()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m api.app.cli.bulk_analyze",
+        description="Analyze a directory of HR documents to JSONL, resumably.",
+    )
+    parser.add_argument("directory", help="root directory to walk")
+    parser.add_argument("--out", default="results.jsonl", help="JSONL output, appended to (default: results.jsonl)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <out>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=settings.batch_concurrency,
+                        help="documents analyzed at once (default: BATCH_CONCURRENCY)")
+    parser.add_argument("--budget-seconds", type=float, default=settings.job_budget_seconds,
+                        help="deadline per document (default: JOB_BUDGET_SECONDS)")
+    parser.add_argument("--limit", type=int, help="stop after this many new documents")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-analyze documents whose checkpointed result was a failure")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="skip the analysis and LLM caches; fresh results still refresh them")
+    args = parser.parse_args(argv)
+
+    if not Path(args.directory).is_dir():
+        parser.error(f"not a directory: {args.directory}")
+
+    logging.basicConfig(level=settings.log_level, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    t0 = time.perf_counter()
+    try:
+        stats = asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        print("interrupted — rerun the same command to resume", file=sys.stderr)
+        return 130
+    print(format_report(stats, time.perf_counter() - t0), file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# api/app/clients/deadline.py
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from api.app.settings import settings
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request-level budget ran out before (or while) calling upstream."""
+
+
+def deadline_in(seconds: Optional[float]) -> Optional[float]:
+    """Absolute ``time.monotonic()`` deadline ``seconds`` from now; None means unbounded."""
+    if seconds is None or seconds <= 0:
+        return None
+    return time.monotonic() + seconds
+
+
+def remaining_seconds(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left before ``deadline`` (never negative), or None when unbounded."""
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def attempt_timeout(deadline: Optional[float], ceiling: float) -> float:
+    """
+    Timeout for one upstream attempt: the configured ceiling, clipped to the
+    remaining budget. Raises DeadlineExceeded when too little budget is left
+    for an attempt to be worth starting.
+    """
+    left = remaining_seconds(deadline)
+    if left is None:
+        return ceiling
+    if left < settings.deadline_min_attempt_seconds:
+        raise DeadlineExceeded(f"request budget exhausted ({left * 1000:.0f} ms left)")
+    return min(ceiling, left)
+
+
+def resolve_budget(header_ms: Optional[str], default_seconds: float) -> float:
+    """
+    Budget in seconds for one request: the ``X-Request-Budget-Ms`` header when
+    it is a positive number, else the endpoint default, capped at
+    ``max_request_budget_seconds``.
+    """
+    budget = default_seconds
+    if header_ms:
+        try:
+            requested = float(header_ms) / 1000
+        except ValueError:
+            requested = 0.0
+        if requested > 0:
+            budget = requested
+    return min(budget, settings.max_request_budget_seconds)
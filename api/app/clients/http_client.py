@@ -0,0 +1,69 @@
+# api/app/clients/http_client.py
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+import httpx
+
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+    http2 = settings.http2_enabled
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("http_client h2_missing — falling back to HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(
+        limits=limits,
+        http2=http2,
+        timeout=settings.inference_timeout_seconds,
+    )
+
+
+async def open_http_client() -> httpx.AsyncClient:
+    """Create the process-wide pooled client. Called from the FastAPI lifespan hook."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+        logger.info(
+            "http_client opened max_connections=%d keepalive=%d http2=%s",
+            settings.http_max_connections,
+            settings.http_max_keepalive_connections,
+            settings.http2_enabled,
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the pooled client and release its connections."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("http_client closed")
+    _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared pooled client.
+
+    Opens one lazily when called outside the app lifespan (scripts, tests),
+    so callers never need to manage the client themselves.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
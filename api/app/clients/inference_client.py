@@ -1,9 +1,28 @@
+import asyncio
 import base64
+import hashlib
+import json
 import logging
+import re
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 import httpx
-from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_any,
+    wait_exponential,
+)
 
+from api.app.clients.deadline import DeadlineExceeded, attempt_timeout, remaining_seconds
+from api.app.clients.http_client import get_http_client
+from api.app.clients.response_cache import ResponseCache, fingerprint
 from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -17,60 +36,681 @@ def _is_retryable(exc: BaseException) -> bool:
     return False
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=8),
-    retry=retry_if_exception(_is_retryable),
-    reraise=True,
-)
-async def run_inference(system_prompt: str, user_prompt: str) -> str:
-    url = f"{settings.groq_base_url}/chat/completions"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+_IMAGE_TOKEN_ESTIMATE = 1_500
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Groq reset durations such as '7.66s', '2m59.56s' or '120ms' into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    seconds = _parse_duration(value)
+    if seconds is not None:
+        return max(seconds, 0.0)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+def _estimate_tokens(prompt_chars: int, max_tokens: int, images: int = 0) -> int:
+    """Rough TPM charge for a request: ~4 chars per prompt token plus the completion cap."""
+    return prompt_chars // 4 + max_tokens + images * _IMAGE_TOKEN_ESTIMATE
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(max(per_minute, 1))
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay_for(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+
+class _RateGovernor:
+    """
+    Admission control for one Groq model.
+
+    Two token buckets track requests and estimated tokens per minute. Callers
+    queue on a FIFO lock so admission is first-come first-served; only the
+    head of the queue sleeps waiting for capacity. Response headers
+    (x-ratelimit-remaining-*, x-ratelimit-reset-*, Retry-After) pull the local
+    buckets down to what Groq actually reports.
+    """
+
+    def __init__(self, model: str, rpm: int, tpm: int) -> None:
+        self.model = model
+        self.requests = _TokenBucket(rpm)
+        self.tokens = _TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self.queue_depth = 0
+        self.admitted = 0
+        self.total_wait_ms = 0
+        self.max_wait_ms = 0
+        self.last_wait_ms = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self, tokens: int) -> int:
+        """Wait for capacity, charge one request and ``tokens``; return the wait in ms."""
+        t0 = time.monotonic()
+        self.queue_depth += 1
+        try:
+            async with self._get_lock():
+                while True:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    delay = max(
+                        self.blocked_until - now,
+                        self.requests.delay_for(1),
+                        self.tokens.delay_for(tokens),
+                    )
+                    if delay <= 0:
+                        self.requests.level -= 1
+                        self.tokens.level -= min(tokens, self.tokens.capacity)
+                        break
+                    await asyncio.sleep(delay)
+        finally:
+            self.queue_depth -= 1
+
+        wait_ms = int((time.monotonic() - t0) * 1000)
+        self.admitted += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.last_wait_ms = wait_ms
+        if wait_ms:
+            logger.info("rate_governor model=%s wait_ms=%d queue=%d", self.model, wait_ms, self.queue_depth)
+        return wait_ms
+
+    def observe(self, response: httpx.Response) -> None:
+        """Reconcile local buckets with the rate-limit headers Groq returned."""
+        headers = response.headers
+        now = time.monotonic()
+
+        for bucket, remaining_h, reset_h in (
+            (self.requests, "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+            (self.tokens, "x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+        ):
+            remaining = headers.get(remaining_h)
+            if remaining is None:
+                continue
+            try:
+                remaining_f = float(remaining)
+            except ValueError:
+                continue
+            bucket.refill(now)
+            bucket.level = min(bucket.level, remaining_f)
+            if remaining_f <= 0:
+                reset = _parse_duration(headers.get(reset_h))
+                if reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+
+        if response.status_code == 429:
+            retry_after = _parse_retry_after(headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = _parse_duration(headers.get("x-ratelimit-reset-requests")) or 1.0
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            logger.warning("rate_governor model=%s status=429 retry_after=%.2fs", self.model, retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "avg_wait_ms": int(self.total_wait_ms / self.admitted) if self.admitted else 0,
+            "max_wait_ms": self.max_wait_ms,
+            "last_wait_ms": self.last_wait_ms,
+            "blocked_for_ms": max(int((self.blocked_until - now) * 1000), 0),
+        }
+
+
+_governors: Dict[str, _RateGovernor] = {}
+
+
+def _governor_for(model: str) -> _RateGovernor:
+    governor = _governors.get(model)
+    if governor is None:
+        if model == settings.groq_vision_model:
+            rpm, tpm = settings.groq_vision_rpm_limit, settings.groq_vision_tpm_limit
+        else:
+            rpm, tpm = settings.groq_rpm_limit, settings.groq_tpm_limit
+        governor = _governors[model] = _RateGovernor(model, rpm, tpm)
+    return governor
+
+
+def rate_governor_stats() -> Dict[str, Dict[str, Any]]:
+    """Queue depth and admission wait per model, for /health."""
+    return {model: g.stats() for model, g in _governors.items()}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while a model's circuit breaker is open."""
+
+
+def _counts_as_outage(exc: BaseException) -> bool:
+    """Transport errors, timeouts and 5xx trip the breaker; a 429 is the governor's job."""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return False
+
+
+class _CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one Groq model.
+
+    closed    — calls pass; ``failure_threshold`` outages in a row open it.
+    open      — calls fail immediately with CircuitOpenError for ``reset_seconds``.
+    half_open — one probe call is let through; success closes the breaker,
+                an outage re-opens it. Other callers keep failing fast.
+    """
+
+    def __init__(self, model: str, failure_threshold: int, reset_seconds: float) -> None:
+        self.model = model
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            logger.info("circuit_breaker model=%s state=half_open", self.model)
+        if self.state == "half_open" and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return
+        self.rejected += 1
+        retry_in = max(self.reset_seconds - (now - self.opened_at), 0.0)
+        raise CircuitOpenError(
+            f"circuit open for {self.model} after {self.consecutive_failures} failures; "
+            f"probing again in {retry_in:.0f}s"
+        )
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("circuit_breaker model=%s state=closed", self.model)
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self, exc: BaseException) -> None:
+        was_probe = self.probe_in_flight
+        self.probe_in_flight = False
+        if not _counts_as_outage(exc):
+            # 4xx, cancellation, our own deadline: not evidence the provider is down
+            return
+        self.consecutive_failures += 1
+        if was_probe or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning(
+                    "circuit_breaker model=%s state=open failures=%d error=%s",
+                    self.model, self.consecutive_failures, exc,
+                )
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        retry_in = 0.0
+        if self.state == "open":
+            retry_in = max(self.reset_seconds - (time.monotonic() - self.opened_at), 0.0)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_ms": int(retry_in * 1000),
+        }
+
+
+_breakers: Dict[str, _CircuitBreaker] = {}
+
+
+def _breaker_for(model: str) -> Optional[_CircuitBreaker]:
+    if not settings.circuit_breaker_enabled:
+        return None
+    breaker = _breakers.get(model)
+    if breaker is None:
+        breaker = _breakers[model] = _CircuitBreaker(
+            model, settings.circuit_failure_threshold, settings.circuit_reset_seconds,
+        )
+    return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Breaker state per model, for /health."""
+    return {model: b.stats() for model, b in _breakers.items()}
+
+
+async def _guarded(model: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    """Run one upstream attempt through the model's circuit breaker."""
+    breaker = _breaker_for(model)
+    if breaker is None:
+        return await call()
+    breaker.before_call()
+    try:
+        result = await call()
+    except BaseException as exc:
+        breaker.record_failure(exc)
+        raise
+    breaker.record_success()
+    return result
+
+
+_exponential_wait = wait_exponential(multiplier=1, min=1, max=8)
+
+
+def _wait_before_retry(retry_state: RetryCallState) -> float:
+    """
+    Exponential backoff for transport errors and 5xx. A 429 retries without
+    extra sleep: the governor already holds admission until Retry-After.
+    """
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429:
+        return 0.0
+    return _exponential_wait(retry_state)
+
+
+def _retrying(
+    deadline: Optional[float],
+    retryable: Callable[[BaseException], bool] = _is_retryable,
+) -> AsyncRetrying:
+    """
+    Three attempts with backoff, bounded by the request deadline: backoff is
+    clipped so the next attempt still has ``deadline_min_attempt_seconds``
+    left, and no attempt is retried once less than that remains.
+    """
+    def _out_of_budget(retry_state: RetryCallState) -> bool:
+        left = remaining_seconds(deadline)
+        return left is not None and left < settings.deadline_min_attempt_seconds
+
+    def _wait(retry_state: RetryCallState) -> float:
+        wait = _wait_before_retry(retry_state)
+        left = remaining_seconds(deadline)
+        if left is None:
+            return wait
+        return min(wait, max(left - settings.deadline_min_attempt_seconds, 0.0))
+
+    return AsyncRetrying(
+        stop=stop_any(stop_after_attempt(3), _out_of_budget),
+        wait=_wait,
+        retry=retry_if_exception(retryable),
+        reraise=True,
+    )
 
-    headers = {
+
+async def _within_deadline(awaitable: Awaitable[Any], deadline: Optional[float]) -> Any:
+    """Await ``awaitable`` but give up with DeadlineExceeded when the budget runs out."""
+    left = remaining_seconds(deadline)
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except TimeoutError:
+        raise DeadlineExceeded("request budget exhausted waiting on upstream") from None
+
+
+def _groq_headers() -> Dict[str, str]:
+    return {
         "Authorization": f"Bearer {settings.groq_api_key}",
         "Content-Type": "application/json",
     }
 
+
+async def _post(payload: Dict[str, Any], timeout: float, estimated_tokens: int) -> Dict[str, Any]:
+    """Admit through the model's governor, POST, and feed the response headers back."""
+    url = f"{settings.groq_base_url}/chat/completions"
+    governor = _governor_for(payload["model"]) if settings.rate_limit_enabled else None
+    if governor:
+        await governor.acquire(estimated_tokens)
+
+    response = await get_http_client().post(url, headers=_groq_headers(), json=payload, timeout=timeout)
+    if governor:
+        governor.observe(response)
+    response.raise_for_status()
+    return response.json()
+
+
+@dataclass
+class InferenceResult:
+    """Completion text plus where it came from, for ToolAction details."""
+    content: str
+    cache: str = "off"        # memory | sqlite | coalesced | miss | off
+    parsed: Any = None        # what the caller's ``parse`` returned for ``content``
+
+
+def parse_json_reply(raw: str) -> Dict[str, Any]:
+    """The JSON object in a completion, markdown fences stripped; raises ValueError otherwise."""
+    cleaned = raw.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("```")[1]
+        if cleaned.startswith("json"):
+            cleaned = cleaned[4:]
+        cleaned = cleaned.strip()
+    parsed = json.loads(cleaned)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Expected a JSON object, got {type(parsed).__name__}")
+    return parsed
+
+
+def llm_cache_path() -> Optional[str]:
+    """SQLite file the response caches persist to; None when persistence is off."""
+    if not settings.llm_cache_persist:
+        return None
+    if settings.llm_cache_db_path:
+        return settings.llm_cache_db_path
+    return str(Path(settings.db_path).with_name("llm_cache.db"))
+
+
+_llm_cache = ResponseCache(
+    table="llm_cache",
+    max_entries=settings.llm_cache_max_entries,
+    ttl_seconds=settings.llm_cache_ttl_seconds,
+    max_persisted=settings.llm_cache_max_persisted,
+)
+
+# Transcriptions share the LLM cache database, in their own table
+_vision_cache = ResponseCache(
+    table="vision_cache",
+    max_entries=settings.vision_cache_max_entries,
+    ttl_seconds=settings.vision_cache_ttl_seconds,
+    max_persisted=settings.vision_cache_max_persisted,
+)
+
+
+async def _post_chat_completion(
+    payload: Dict[str, Any],
+    timeout: float,
+    deadline: Optional[float] = None,
+) -> str:
+    prompt_chars = sum(len(m["content"]) for m in payload["messages"])
+    estimated = _estimate_tokens(prompt_chars, payload["max_tokens"])
+
+    async def _attempt() -> str:
+        attempt_s = attempt_timeout(deadline, timeout)
+        logger.debug("inference request model=%s timeout=%.1fs", payload["model"], attempt_s)
+        data = await _guarded(
+            payload["model"],
+            lambda: _within_deadline(_post(payload, attempt_s, estimated), deadline),
+        )
+
+        content = data["choices"][0]["message"]["content"]
+        logger.debug("inference response tokens=%s", data.get("usage", {}).get("total_tokens"))
+        return content
+
+    return await _retrying(deadline)(_attempt)
+
+
+async def _stream_chat_completion(
+    payload: Dict[str, Any],
+    timeout: float,
+    on_token: Callable[[str], None],
+    deadline: Optional[float] = None,
+) -> str:
+    """
+    stream=True chat completion: consume Groq's SSE frames, hand each content
+    delta to ``on_token`` and return the assembled text.
+
+    Retries follow the same policy as the buffered path, but only until the
+    first token has been emitted — after that a retry would duplicate output.
+    """
+    url = f"{settings.groq_base_url}/chat/completions"
+    prompt_chars = sum(len(m["content"]) for m in payload["messages"])
+    estimated = _estimate_tokens(prompt_chars, payload["max_tokens"])
+    emitted = False
+
+    async def _attempt() -> str:
+        attempt_s = attempt_timeout(deadline, timeout)
+        return await _guarded(
+            payload["model"], lambda: _within_deadline(_consume(attempt_s), deadline),
+        )
+
+    async def _consume(attempt_s: float) -> str:
+        nonlocal emitted
+        governor = _governor_for(payload["model"]) if settings.rate_limit_enabled else None
+        if governor:
+            await governor.acquire(estimated)
+
+        parts: list[str] = []
+        async with get_http_client().stream(
+            "POST", url, headers=_groq_headers(), json={**payload, "stream": True}, timeout=attempt_s,
+        ) as response:
+            if governor:
+                governor.observe(response)
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                choices = chunk.get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    emitted = True
+                    parts.append(delta)
+                    on_token(delta)
+        return "".join(parts)
+
+    retrying = _retrying(deadline, lambda exc: not emitted and _is_retryable(exc))
+    logger.debug("inference stream_request model=%s", payload["model"])
+    return await retrying(_attempt)
+
+
+class _SingleFlight:
+    """
+    Coalesces concurrent calls that share a fingerprint.
+
+    The first caller (the leader) starts the upstream call as a task; callers
+    arriving while it is in flight await the same task instead of issuing
+    their own. The task is shielded so one caller cancelling (e.g. a client
+    disconnect) does not cancel the call for everyone else.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        """Return ``(result, shared)``; ``shared`` is True for followers."""
+        existing = self._inflight.get(key)
+        if existing is not None:
+            return await asyncio.shield(existing), True
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+
+_inflight = _SingleFlight()
+
+
+async def run_inference_result(
+    system_prompt: str,
+    user_prompt: str,
+    *,
+    temperature: float = 0.2,
+    max_tokens: int = 700,
+    use_cache: bool = True,
+    parse: Optional[Callable[[str], Any]] = None,
+    on_token: Optional[Callable[[str], None]] = None,
+    deadline: Optional[float] = None,
+) -> InferenceResult:
+    """
+    Chat completion through the response cache and single-flight layer.
+
+    The request fingerprint is a sha256 over (model, system prompt, user
+    prompt, temperature, max_tokens). Identical re-uploads are served from
+    the cache; identical requests already in flight share one upstream call.
+
+    ``parse`` turns the completion into what the caller needs (e.g.
+    parse_json_reply); its result is ``InferenceResult.parsed``. A reply is
+    only cached once ``parse`` has accepted it, so malformed or truncated
+    output is never replayed — the error propagates to the caller instead.
+
+    Passing ``on_token`` switches to stream=True SSE consumption: each content
+    delta is handed to the callback as it arrives (a cache hit is delivered as
+    one delta). Streaming calls skip single-flight so every caller sees tokens.
+
+    ``deadline`` is an absolute ``time.monotonic()`` instant. Per-attempt
+    timeouts, retries and backoff are clipped to the time left, and the call
+    raises DeadlineExceeded rather than run past it. Cache hits are always served.
+    """
+    model = settings.groq_model
     payload = {
-        "model": settings.groq_model,
+        "model": model,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        "temperature": 0.2,
-        "max_tokens": 700,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
     }
+    key = fingerprint(model, system_prompt, user_prompt, temperature, max_tokens)
+    caching = use_cache and settings.llm_cache_enabled
 
-    logger.debug("inference request model=%s url=%s", settings.groq_model, url)
+    if caching:
+        _llm_cache.db_path = llm_cache_path()
+        cached, tier = await _llm_cache.get(key)
+        if cached is not None:
+            try:
+                parsed = parse(cached) if parse else None
+            except Exception as exc:
+                # Stored before replies were validated: ignore it and ask again
+                logger.warning("inference cache_entry_rejected key=%s error=%s", key[:12], exc)
+            else:
+                logger.debug("inference cache_hit tier=%s key=%s", tier, key[:12])
+                if on_token:
+                    on_token(cached)
+                return InferenceResult(content=cached, cache=tier, parsed=parsed)
 
-    async with httpx.AsyncClient(timeout=settings.inference_timeout_seconds) as client:
-        response = await client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    if on_token:
+        content = await _stream_chat_completion(
+            payload, settings.inference_timeout_seconds, on_token, deadline=deadline,
+        )
+        shared = False
+    else:
+        # A follower stops waiting at its own deadline; the shared call carries on.
+        content, shared = await _within_deadline(
+            _inflight.do(key, lambda: _post_chat_completion(payload, settings.inference_timeout_seconds, deadline)),
+            deadline,
+        )
 
-    content = data["choices"][0]["message"]["content"]
-    logger.debug("inference response tokens=%s", data.get("usage", {}).get("total_tokens"))
-    return content
+    parsed = parse(content) if parse else None
+    if shared:
+        logger.debug("inference coalesced key=%s", key[:12])
+        return InferenceResult(content=content, cache="coalesced", parsed=parsed)
+    if caching:
+        await _llm_cache.set(key, content)
+    return InferenceResult(content=content, cache="miss" if caching else "off", parsed=parsed)
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=8),
-    retry=retry_if_exception(_is_retryable),
-    reraise=True,
-)
-async def run_vision_inference(prompt: str, image_bytes: bytes, media_type: str) -> str:
+async def run_inference(
+    system_prompt: str,
+    user_prompt: str,
+    deadline: Optional[float] = None,
+) -> str:
+    result = await run_inference_result(system_prompt, user_prompt, deadline=deadline)
+    return result.content
+
+
+async def run_vision_inference_result(
+    prompt: str,
+    image_bytes: bytes,
+    media_type: str,
+    deadline: Optional[float] = None,
+    use_cache: bool = True,
+    parse: Optional[Callable[[str], Any]] = None,
+) -> InferenceResult:
     """
-    Send an image to Groq's vision model and return the text response.
-    media_type should be e.g. 'image/jpeg', 'image/png', 'image/webp'.
+    Vision call through the transcription cache.
+
+    The key is a sha256 over (vision model, prompt, sha256 of the image
+    bytes). Callers pass pre-processed bytes, so the same scan or the same
+    rendered PDF page maps to the same key across uploads. As with
+    run_inference_result, a transcript is cached only once ``parse`` accepts it.
     """
-    url = f"{settings.groq_base_url}/chat/completions"
+    model = settings.groq_vision_model
+    key = fingerprint(model, prompt, hashlib.sha256(image_bytes).hexdigest())
+    caching = use_cache and settings.vision_cache_enabled
 
-    headers = {
-        "Authorization": f"Bearer {settings.groq_api_key}",
-        "Content-Type": "application/json",
-    }
+    if caching:
+        _vision_cache.db_path = llm_cache_path()
+        cached, tier = await _vision_cache.get(key)
+        if cached is not None:
+            try:
+                parsed = parse(cached) if parse else None
+            except Exception as exc:
+                logger.warning("vision cache_entry_rejected key=%s error=%s", key[:12], exc)
+            else:
+                logger.debug("vision cache_hit tier=%s key=%s", tier, key[:12])
+                return InferenceResult(content=cached, cache=tier, parsed=parsed)
 
+    content = await run_vision_inference(prompt, image_bytes, media_type, deadline=deadline)
+    parsed = parse(content) if parse else None
+    if caching:
+        await _vision_cache.set(key, content)
+    return InferenceResult(content=content, cache="miss" if caching else "off", parsed=parsed)
+
+
+async def run_vision_inference(
+    prompt: str,
+    image_bytes: bytes,
+    media_type: str,
+    deadline: Optional[float] = None,
+) -> str:
+    """
+    Send an image to Groq's vision model and return the text response.
+    media_type should be e.g. 'image/jpeg', 'image/png', 'image/webp'.
+    Retries and timeouts are bounded by ``deadline`` like run_inference_result.
+    """
     b64 = base64.b64encode(image_bytes).decode("utf-8")
 
     payload = {
@@ -91,11 +731,17 @@ async def run_vision_inference(prompt: str, image_bytes: bytes, media_type: str)
     logger.debug("vision request model=%s media_type=%s bytes=%d",
                  settings.groq_vision_model, media_type, len(image_bytes))
 
-    async with httpx.AsyncClient(timeout=settings.vision_timeout_seconds) as client:
-        response = await client.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
+    estimated = _estimate_tokens(len(prompt), payload["max_tokens"], images=1)
+
+    async def _attempt() -> str:
+        attempt_s = attempt_timeout(deadline, settings.vision_timeout_seconds)
+        data = await _guarded(
+            payload["model"],
+            lambda: _within_deadline(_post(payload, attempt_s, estimated), deadline),
+        )
+
+        content = data["choices"][0]["message"]["content"]
+        logger.debug("vision response tokens=%s", data.get("usage", {}).get("total_tokens"))
+        return content
 
-    content = data["choices"][0]["message"]["content"]
-    logger.debug("vision response tokens=%s", data.get("usage", {}).get("total_tokens"))
-    return content
+    return await _retrying(deadline)(_attempt)
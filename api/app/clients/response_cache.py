@@ -0,0 +1,155 @@
+# api/app/clients/response_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+_CREATE_CACHE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    key          TEXT PRIMARY KEY,
+    value        TEXT NOT NULL,
+    created_at   REAL NOT NULL,
+    accessed_at  REAL NOT NULL
+);
+"""
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable sha256 over JSON-serialisable parts — the content address of a request."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier content-addressed cache for string payloads.
+
+    Tier 1 is an in-process LRU bounded by ``max_entries`` and ``ttl_seconds``.
+    Tier 2 is an optional SQLite table that survives restarts; it is bounded by
+    ``max_persisted`` rows and evicts least-recently-accessed entries first.
+    A tier-2 hit is promoted back into tier 1.
+    """
+
+    def __init__(
+        self,
+        *,
+        table: str,
+        max_entries: int,
+        ttl_seconds: float,
+        db_path: Optional[str] = None,
+        max_persisted: int = 10_000,
+    ) -> None:
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_persisted = max_persisted
+        self._memory: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._db_ready_for: Optional[str] = None
+
+    # -- tier 1 ------------------------------------------------------------
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        created_at, value = entry
+        if now - created_at > self.ttl_seconds:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # -- tier 2 ------------------------------------------------------------
+
+    async def _ensure_table(self, db: aiosqlite.Connection) -> None:
+        if self._db_ready_for == self.db_path:
+            return
+        await db.execute(_CREATE_CACHE.format(table=self.table))
+        await db.commit()
+        self._db_ready_for = self.db_path
+
+    async def _sqlite_get(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        async with aiosqlite.connect(self.db_path) as db:
+            await self._ensure_table(db)
+            async with db.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                await db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                await db.commit()
+                return None
+            await db.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            await db.commit()
+        return created_at, value
+
+    async def _sqlite_set(self, key: str, value: str, now: float) -> None:
+        async with aiosqlite.connect(self.db_path) as db:
+            await self._ensure_table(db)
+            await db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            await db.execute(
+                f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table}
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_persisted,),
+            )
+            await db.commit()
+
+    # -- public ------------------------------------------------------------
+
+    async def get(self, key: str) -> Tuple[Optional[str], str]:
+        """Return ``(value, tier)`` where tier is 'memory', 'sqlite' or 'miss'."""
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value, "memory"
+        if self.db_path:
+            try:
+                hit = await self._sqlite_get(key, now)
+            except Exception as exc:
+                logger.warning("cache_read_failed table=%s error=%s", self.table, exc)
+                hit = None
+            if hit is not None:
+                created_at, value = hit
+                self._memory_set(key, value, created_at)
+                return value, "sqlite"
+        return None, "miss"
+
+    async def set(self, key: str, value: str) -> None:
+        now = time.time()
+        self._memory_set(key, value, now)
+        if self.db_path:
+            try:
+                await self._sqlite_set(key, value, now)
+            except Exception as exc:
+                logger.warning("cache_write_failed table=%s error=%s", self.table, exc)
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
@@ -39,11 +39,35 @@ _CREATE_IDX_CREATED = """
 CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions(created_at);
 """
 
+_CREATE_JOBS = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id       TEXT PRIMARY KEY,
+    session_id   TEXT,
+    status       TEXT NOT NULL,          -- queued | running | done | failed
+    filename     TEXT NOT NULL,
+    context      TEXT,
+    content      BLOB,                   -- upload bytes; cleared once the job finishes
+    use_cache    INTEGER NOT NULL DEFAULT 1,  -- 0: skip the analysis/LLM caches (use_cache=false)
+    created_at   TEXT NOT NULL,
+    started_at   TEXT,
+    finished_at  TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    result       TEXT,                   -- AnalyzeResponse JSON
+    error        TEXT
+);
+"""
+
+_CREATE_IDX_JOBS_STATUS = """
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+"""
+
 
 async def init_db() -> None:
     async with aiosqlite.connect(settings.db_path) as db:
         await db.execute(_CREATE_SESSIONS)
         await db.execute(_CREATE_IDX_SESSION)
         await db.execute(_CREATE_IDX_CREATED)
+        await db.execute(_CREATE_JOBS)
+        await db.execute(_CREATE_IDX_JOBS_STATUS)
         await db.commit()
     logger.info("db_init path=%s ok=true", settings.db_path)
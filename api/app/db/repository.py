@@ -109,3 +109,118 @@ async def get_sessions_by_id(session_id: str) -> List[Dict[str, Any]]:
         d["warnings"] = json.loads(d["warnings"] or "[]")
         result.append(d)
     return result
+
+
+# ---------------------------------------------------------------------------
+# Analyze jobs
+# ---------------------------------------------------------------------------
+
+async def create_job(
+    *,
+    job_id: str,
+    session_id: Optional[str],
+    filename: str,
+    context: str,
+    content: bytes,
+    use_cache: bool = True,
+) -> None:
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute(
+            """
+            INSERT INTO jobs (job_id, session_id, status, filename, context, content, use_cache, created_at)
+            VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)
+            """,
+            (job_id, session_id, filename, context, content, int(use_cache), _now_iso()),
+        )
+        await db.commit()
+    logger.info("job_created job_id=%s filename=%s bytes=%d", job_id, filename, len(content))
+
+
+async def claim_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Mark a queued job running and return it with its upload bytes, or None."""
+    async with aiosqlite.connect(settings.db_path) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """
+            UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1
+            WHERE job_id = ? AND status = 'queued'
+            """,
+            (_now_iso(), job_id),
+        )
+        if cursor.rowcount == 0:
+            await db.commit()
+            return None
+        async with db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)) as cur:
+            row = await cur.fetchone()
+        await db.commit()
+    return dict(row) if row else None
+
+
+async def finish_job(
+    job_id: str,
+    *,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+) -> None:
+    status = "failed" if error else "done"
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute(
+            """
+            UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ?, content = NULL
+            WHERE job_id = ?
+            """,
+            (status, _now_iso(), json.dumps(result) if result is not None else None, error, job_id),
+        )
+        await db.commit()
+    logger.info("job_finished job_id=%s status=%s", job_id, status)
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    async with aiosqlite.connect(settings.db_path) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(
+            """
+            SELECT job_id, session_id, status, filename, created_at, started_at,
+                   finished_at, attempts, result, error
+            FROM jobs WHERE job_id = ?
+            """,
+            (job_id,),
+        ) as cursor:
+            row = await cursor.fetchone()
+    if row is None:
+        return None
+    d = dict(row)
+    d["result"] = json.loads(d["result"]) if d["result"] else None
+    return d
+
+
+async def count_jobs(status: str) -> int:
+    async with aiosqlite.connect(settings.db_path) as db:
+        async with db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)) as cursor:
+            (count,) = await cursor.fetchone()
+    return count
+
+
+async def requeue_unfinished_jobs(max_attempts: int) -> List[str]:
+    """
+    On startup: jobs left 'running' by a previous process go back to 'queued',
+    unless they have already used ``max_attempts`` (then they are failed, so a
+    file that takes the process down can't do it forever).
+    Returns every queued job id, oldest first.
+    """
+    async with aiosqlite.connect(settings.db_path) as db:
+        await db.execute(
+            """
+            UPDATE jobs SET status = 'failed', finished_at = ?, content = NULL,
+                            error = 'Interrupted too many times'
+            WHERE status = 'running' AND attempts >= ?
+            """,
+            (_now_iso(), max_attempts),
+        )
+        await db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        async with db.execute(
+            "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at ASC"
+        ) as cursor:
+            rows = await cursor.fetchall()
+        await db.commit()
+    return [row[0] for row in rows]
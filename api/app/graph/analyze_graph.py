@@ -2,10 +2,11 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional
 
 from langgraph.graph import END, StateGraph
 
+from api.app.graph.nodes.classify_and_analyze import classify_and_analyze
 from api.app.graph.nodes.classify_document import classify_document
 from api.app.graph.nodes.analyze_resume import analyze_resume
 from api.app.graph.nodes.analyze_cover_letter import analyze_cover_letter
@@ -14,6 +15,7 @@ from api.app.graph.nodes.analyze_scorecard import analyze_scorecard
 from api.app.graph.tools.notification_tool import send_notification
 from api.app.schemas.analyze import AnalyzeState
 from api.app.schemas.agent import ToolAction
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +49,21 @@ async def write_analyze_memo(state: AnalyzeState) -> Dict[str, Any]:
     }
 
 
+def _route_entry(state: AnalyzeState) -> str:
+    """Fused mode sends text documents through one combined LLM call first.
+    Tabular uploads keep the two-step path — their analysis needs computed stats."""
+    if settings.analyze_fused_mode and not state.get("rows"):
+        return "classify_and_analyze"
+    return "classify_document"
+
+
+def _route_after_fused(state: AnalyzeState) -> str:
+    """A fused result sets doc_type; otherwise fall back to the two-step path."""
+    if state.get("doc_type"):
+        return "write_analyze_memo"
+    return "classify_document"
+
+
 def _route_after_classify(state: AnalyzeState) -> str:
     doc_type = state.get("doc_type", "unknown")
     if doc_type == "resume":
@@ -63,6 +80,7 @@ def _route_after_classify(state: AnalyzeState) -> str:
 def _build_analyze_graph() -> StateGraph:
     builder = StateGraph(AnalyzeState)
 
+    builder.add_node("classify_and_analyze", classify_and_analyze)
     builder.add_node("classify_document", classify_document)
     builder.add_node("analyze_resume", analyze_resume)
     builder.add_node("analyze_cover_letter", analyze_cover_letter)
@@ -70,7 +88,8 @@ def _build_analyze_graph() -> StateGraph:
     builder.add_node("analyze_scorecard", analyze_scorecard)
     builder.add_node("write_analyze_memo", write_analyze_memo)
 
-    builder.set_entry_point("classify_document")
+    builder.set_conditional_entry_point(_route_entry)
+    builder.add_conditional_edges("classify_and_analyze", _route_after_fused)
     builder.add_conditional_edges("classify_document", _route_after_classify)
     builder.add_edge("analyze_resume", "write_analyze_memo")
     builder.add_edge("analyze_cover_letter", "write_analyze_memo")
@@ -84,24 +103,31 @@ def _build_analyze_graph() -> StateGraph:
 _analyze_graph = _build_analyze_graph()
 
 
-async def run_analyze_graph(
+def _initial_state(
     filename: str,
     extension: str,
     text: str,
     rows: list,
     row_count: int,
     request_id: str,
-    context: str = "",
-) -> Dict[str, Any]:
-
-    initial_state: AnalyzeState = {
+    context: str,
+    stream_tokens: bool = False,
+    deadline: Optional[float] = None,
+    scorecard_stats: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+) -> AnalyzeState:
+    return {
         "filename": filename,
         "extension": extension,
         "text": text,
         "rows": rows,
         "row_count": row_count,
+        "scorecard_stats": scorecard_stats,
         "request_id": request_id,
         "context": context,
+        "stream_tokens": stream_tokens,
+        "deadline": deadline,
+        "use_cache": use_cache,
         "doc_type": None,
         "doc_type_confidence": 0.0,
         "key_fields": {},
@@ -111,8 +137,8 @@ async def run_analyze_graph(
         "warnings": [],
     }
 
-    final_state = await _analyze_graph.ainvoke(initial_state)
 
+def _result_from_state(final_state: AnalyzeState) -> Dict[str, Any]:
     return {
         "request_id": final_state["request_id"],
         "filename": final_state["filename"],
@@ -124,3 +150,80 @@ async def run_analyze_graph(
         "actions_taken": final_state["actions_taken"],
         "warnings": final_state["warnings"],
     }
+
+
+async def run_analyze_graph(
+    filename: str,
+    extension: str,
+    text: str,
+    rows: list,
+    row_count: int,
+    request_id: str,
+    context: str = "",
+    deadline: Optional[float] = None,
+    scorecard_stats: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+
+    initial_state = _initial_state(
+        filename, extension, text, rows, row_count, request_id, context,
+        deadline=deadline, scorecard_stats=scorecard_stats, use_cache=use_cache,
+    )
+    final_state = await _analyze_graph.ainvoke(initial_state)
+    return _result_from_state(final_state)
+
+
+async def stream_analyze_graph(
+    filename: str,
+    extension: str,
+    text: str,
+    rows: list,
+    row_count: int,
+    request_id: str,
+    context: str = "",
+    deadline: Optional[float] = None,
+    scorecard_stats: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the analyze graph with LangGraph async streaming.
+
+    Yields progress events as nodes finish (``classified``, ``analyzer_started``),
+    ``token`` events carrying narrative text as the analyzer generates it, and a
+    final ``result`` event whose ``data`` maps onto AnalyzeResponse. If the
+    fused node falls back after streaming part of its narrative, a
+    ``token_reset`` event tells the client to discard the tokens so far.
+    """
+    initial_state = _initial_state(
+        filename, extension, text, rows, row_count, request_id, context,
+        stream_tokens=True, deadline=deadline, scorecard_stats=scorecard_stats, use_cache=use_cache,
+    )
+    final_state: AnalyzeState = initial_state
+
+    async for mode, chunk in _analyze_graph.astream(
+        initial_state, stream_mode=["custom", "updates", "values"],
+    ):
+        if mode == "custom":
+            yield chunk
+        elif mode == "values":
+            final_state = chunk
+        elif mode == "updates" and "classify_and_analyze" in chunk:
+            update = chunk["classify_and_analyze"] or {}
+            if update.get("doc_type"):
+                yield {
+                    "event": "classified",
+                    "doc_type": update["doc_type"],
+                    "confidence": update.get("doc_type_confidence", 0.0),
+                }
+        elif mode == "updates" and "classify_document" in chunk:
+            update = chunk["classify_document"] or {}
+            yield {
+                "event": "classified",
+                "doc_type": update.get("doc_type") or "unknown",
+                "confidence": update.get("doc_type_confidence", 0.0),
+            }
+            next_node = _route_after_classify({**final_state, **update})
+            if next_node != "write_analyze_memo":
+                yield {"event": "analyzer_started", "node": next_node}
+
+    yield {"event": "result", "data": _result_from_state(final_state)}
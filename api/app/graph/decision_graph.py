@@ -50,12 +50,14 @@ async def run_graph(
     message: str,
     request_id: str,
     metadata: Optional[Dict[str, Any]] = None,
+    deadline: Optional[float] = None,
 ) -> Dict[str, Any]:
 
     initial_state: GraphState = {
         "message": message,
         "request_id": request_id,
         "metadata": metadata or {},
+        "deadline": deadline,
         "target_date": None,
         "intent": None,
         "analytics_result": None,
@@ -1,14 +1,18 @@
 # graph/nodes/analyze_cover_letter.py
 from __future__ import annotations
 
-import json
 import logging
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
-from api.app.clients.inference_client import run_inference
+from langgraph.types import StreamWriter
+
+from api.app.clients.inference_client import parse_json_reply, run_inference_result
+from api.app.graph.streaming import narrative_token_writer
+from api.app.parsers.text_budget import fit_text
 from api.app.schemas.agent import ToolAction
 from api.app.schemas.analyze import AnalyzeState
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -33,8 +37,13 @@ Analyze the cover letter and return ONLY a valid JSON object with these fields:
 Return ONLY the JSON object. No markdown fences, no explanation."""
 
 
-async def analyze_cover_letter(state: AnalyzeState) -> Dict[str, Any]:
-    text = state["text"]
+def shape_analysis(parsed: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Normalise the model's cover-letter JSON into (analysis, narrative)."""
+    return parsed, parsed.get("narrative", "")
+
+
+async def analyze_cover_letter(state: AnalyzeState, writer: StreamWriter) -> Dict[str, Any]:
+    text = fit_text(state["text"], settings.analyze_text_tokens, "cover_letter")
     context = state.get("context", "")
     t0 = time.perf_counter()
 
@@ -42,20 +51,17 @@ async def analyze_cover_letter(state: AnalyzeState) -> Dict[str, Any]:
     user_prompt = f"Cover letter text:\n\n{text}{context_line}"
 
     try:
-        raw = await run_inference(_SYSTEM_PROMPT, user_prompt)
+        on_token = narrative_token_writer(writer, "analyze_cover_letter") if state.get("stream_tokens") else None
+        result = await run_inference_result(
+            _SYSTEM_PROMPT, user_prompt,
+            # Shaped before caching, so a reply that does not fit is never replayed
+            parse=lambda raw: shape_analysis(parse_json_reply(raw)),
+            use_cache=state.get("use_cache", True), on_token=on_token, deadline=state.get("deadline"),
+        )
         elapsed_ms = int((time.perf_counter() - t0) * 1000)
-
-        cleaned = raw.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("```")[1]
-            if cleaned.startswith("json"):
-                cleaned = cleaned[4:]
-            cleaned = cleaned.strip()
-
-        parsed = json.loads(cleaned)
-        recommendation = parsed.get("recommendation", "pass")
-        confidence = float(parsed.get("recommendation_confidence", 0.5))
-        narrative = parsed.get("narrative", "")
+        analysis, narrative = result.parsed
+        recommendation = analysis.get("recommendation", "pass")
+        confidence = float(analysis.get("recommendation_confidence", 0.5))
 
         logger.info(
             "analyze_cover_letter filename=%s recommendation=%s confidence=%.2f ms=%d ok=true",
@@ -63,12 +69,13 @@ async def analyze_cover_letter(state: AnalyzeState) -> Dict[str, Any]:
         )
 
         return {
-            "analysis": parsed,
+            "analysis": analysis,
             "summary": narrative,
             "actions_taken": [
                 ToolAction(kind="llm", name="analyze_cover_letter", ok=True, ms=elapsed_ms,
                            details={"recommendation": recommendation, "confidence": confidence,
-                                    "red_flags": len(parsed.get("red_flags", []))})
+                                    "red_flags": len(analysis.get("red_flags", [])),
+                                    "cache": result.cache})
             ],
         }
 
@@ -1,14 +1,18 @@
 # graph/nodes/analyze_interview.py
 from __future__ import annotations
 
-import json
 import logging
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
-from api.app.clients.inference_client import run_inference
+from langgraph.types import StreamWriter
+
+from api.app.clients.inference_client import parse_json_reply, run_inference_result
+from api.app.graph.streaming import narrative_token_writer
+from api.app.parsers.text_budget import fit_text
 from api.app.schemas.agent import ToolAction
 from api.app.schemas.analyze import AnalyzeState
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -52,12 +56,30 @@ Guidelines:
 Return ONLY the JSON object. No markdown fences, no explanation."""
 
 
-async def analyze_interview(state: AnalyzeState) -> Dict[str, Any]:
+def shape_analysis(parsed: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Normalise the model's interview-memo JSON into (analysis, narrative)."""
+    analysis = {
+        "candidate_name": parsed.get("candidate_name", ""),
+        "role": parsed.get("role", ""),
+        "interview_date": parsed.get("interview_date", ""),
+        "interviewer": parsed.get("interviewer", ""),
+        "key_observations": parsed.get("key_observations", []),
+        "technical_signals": parsed.get("technical_signals", {}),
+        "behavioral_signals": parsed.get("behavioral_signals", {}),
+        "inconsistencies": parsed.get("inconsistencies", []),
+        "open_questions": parsed.get("open_questions", []),
+        "recommendation": parsed.get("recommendation", ""),
+        "recommendation_confidence": float(parsed.get("recommendation_confidence", 0.0)),
+    }
+    return analysis, parsed.get("narrative", "")
+
+
+async def analyze_interview(state: AnalyzeState, writer: StreamWriter) -> Dict[str, Any]:
     """
     Converts raw interview notes into a structured hiring decision memo.
     Runs after classify_document when doc_type == 'interview_notes'.
     """
-    text = state["text"]
+    text = fit_text(state["text"], settings.analyze_text_tokens, "interview_notes")
     context = state.get("context", "")
     key_fields = state.get("key_fields", {})
     t0 = time.perf_counter()
@@ -71,32 +93,15 @@ async def analyze_interview(state: AnalyzeState) -> Dict[str, Any]:
     user_prompt = f"Interview notes:\n\n{text}{context_line}{classifier_line}"
 
     try:
-        raw = await run_inference(_ANALYZE_INTERVIEW_SYSTEM, user_prompt)
+        on_token = narrative_token_writer(writer, "analyze_interview") if state.get("stream_tokens") else None
+        result = await run_inference_result(
+            _ANALYZE_INTERVIEW_SYSTEM, user_prompt,
+            # Shaped before caching, so a reply that does not fit is never replayed
+            parse=lambda raw: shape_analysis(parse_json_reply(raw)),
+            use_cache=state.get("use_cache", True), on_token=on_token, deadline=state.get("deadline"),
+        )
         elapsed_ms = int((time.perf_counter() - t0) * 1000)
-
-        cleaned = raw.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("```")[1]
-            if cleaned.startswith("json"):
-                cleaned = cleaned[4:]
-            cleaned = cleaned.strip()
-
-        parsed = json.loads(cleaned)
-
-        analysis = {
-            "candidate_name": parsed.get("candidate_name", ""),
-            "role": parsed.get("role", ""),
-            "interview_date": parsed.get("interview_date", ""),
-            "interviewer": parsed.get("interviewer", ""),
-            "key_observations": parsed.get("key_observations", []),
-            "technical_signals": parsed.get("technical_signals", {}),
-            "behavioral_signals": parsed.get("behavioral_signals", {}),
-            "inconsistencies": parsed.get("inconsistencies", []),
-            "open_questions": parsed.get("open_questions", []),
-            "recommendation": parsed.get("recommendation", ""),
-            "recommendation_confidence": float(parsed.get("recommendation_confidence", 0.0)),
-        }
-        summary = parsed.get("narrative", "")
+        analysis, summary = result.parsed
 
         logger.info(
             "analyze_interview filename=%s recommendation=%s confidence=%.2f ms=%d ok=true",
@@ -114,6 +119,7 @@ async def analyze_interview(state: AnalyzeState) -> Dict[str, Any]:
                                "confidence": analysis["recommendation_confidence"],
                                "inconsistencies": len(analysis["inconsistencies"]),
                                "open_questions": len(analysis["open_questions"]),
+                               "cache": result.cache,
                            })
             ],
         }
@@ -1,14 +1,18 @@
 # graph/nodes/analyze_resume.py
 from __future__ import annotations
 
-import json
 import logging
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
-from api.app.clients.inference_client import run_inference
+from langgraph.types import StreamWriter
+
+from api.app.clients.inference_client import parse_json_reply, run_inference_result
+from api.app.graph.streaming import narrative_token_writer
+from api.app.parsers.text_budget import fit_text
 from api.app.schemas.agent import ToolAction
 from api.app.schemas.analyze import AnalyzeState
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -43,12 +47,26 @@ Guidelines:
 Return ONLY the JSON object. No markdown fences, no explanation."""
 
 
-async def analyze_resume(state: AnalyzeState) -> Dict[str, Any]:
+def shape_analysis(parsed: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Normalise the model's resume JSON into (analysis, narrative)."""
+    analysis = {
+        "strengths": parsed.get("strengths", []),
+        "experience_highlights": parsed.get("experience_highlights", []),
+        "skill_gaps": parsed.get("skill_gaps", []),
+        "risk_signals": parsed.get("risk_signals", []),
+        "seniority_assessment": parsed.get("seniority_assessment", ""),
+        "recommendation": parsed.get("recommendation", ""),
+        "recommendation_confidence": float(parsed.get("recommendation_confidence", 0.0)),
+    }
+    return analysis, parsed.get("narrative", "")
+
+
+async def analyze_resume(state: AnalyzeState, writer: StreamWriter) -> Dict[str, Any]:
     """
     Deep resume analysis: strengths, risk signals, skill gaps, recommendation, narrative memo.
     Runs after classify_document when doc_type == 'resume'.
     """
-    text = state["text"]
+    text = fit_text(state["text"], settings.analyze_text_tokens, "resume")
     context = state.get("context", "")
     key_fields = state.get("key_fields", {})
     t0 = time.perf_counter()
@@ -62,28 +80,15 @@ async def analyze_resume(state: AnalyzeState) -> Dict[str, Any]:
     user_prompt = f"Resume text:\n\n{text}{context_line}{classifier_line}"
 
     try:
-        raw = await run_inference(_ANALYZE_RESUME_SYSTEM, user_prompt)
+        on_token = narrative_token_writer(writer, "analyze_resume") if state.get("stream_tokens") else None
+        result = await run_inference_result(
+            _ANALYZE_RESUME_SYSTEM, user_prompt,
+            # Shaped before caching, so a reply that does not fit is never replayed
+            parse=lambda raw: shape_analysis(parse_json_reply(raw)),
+            use_cache=state.get("use_cache", True), on_token=on_token, deadline=state.get("deadline"),
+        )
         elapsed_ms = int((time.perf_counter() - t0) * 1000)
-
-        cleaned = raw.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("```")[1]
-            if cleaned.startswith("json"):
-                cleaned = cleaned[4:]
-            cleaned = cleaned.strip()
-
-        parsed = json.loads(cleaned)
-
-        analysis = {
-            "strengths": parsed.get("strengths", []),
-            "experience_highlights": parsed.get("experience_highlights", []),
-            "skill_gaps": parsed.get("skill_gaps", []),
-            "risk_signals": parsed.get("risk_signals", []),
-            "seniority_assessment": parsed.get("seniority_assessment", ""),
-            "recommendation": parsed.get("recommendation", ""),
-            "recommendation_confidence": float(parsed.get("recommendation_confidence", 0.0)),
-        }
-        summary = parsed.get("narrative", "")
+        analysis, summary = result.parsed
 
         logger.info(
             "analyze_resume filename=%s recommendation=%s confidence=%.2f ms=%d ok=true",
@@ -100,6 +105,7 @@ async def analyze_resume(state: AnalyzeState) -> Dict[str, Any]:
                                "recommendation": analysis["recommendation"],
                                "confidence": analysis["recommendation_confidence"],
                                "risk_count": len(analysis["risk_signals"]),
+                               "cache": result.cache,
                            })
             ],
         }
@@ -4,11 +4,16 @@ from __future__ import annotations
 import json
 import logging
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, Optional, Tuple
 
-from api.app.clients.inference_client import run_inference
+from langgraph.types import StreamWriter
+
+from api.app.clients.inference_client import parse_json_reply, run_inference_result
+from api.app.graph.streaming import narrative_token_writer
+from api.app.parsers.text_budget import fit_text
 from api.app.schemas.agent import ToolAction
 from api.app.schemas.analyze import AnalyzeState
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -37,156 +42,68 @@ Guidelines:
   (panel disagreement), or who were scored as outliers in any dimension
 - bias_signals: infer potential halo effects, recency bias, or leniency/severity bias
 - top_candidates: rank the top candidates by average overall score
+- workbooks with several scorecard tabs arrive as {"sheets": {sheet name: statistics}}; treat each
+  sheet as its own panel and name the sheet in findings
 - narrative: 2-3 paragraph summary for the hiring manager covering panel alignment,
   standout candidates, and any concerns about evaluator reliability
 
 Return ONLY the JSON object. No markdown fences, no explanation."""
 
 
-def _compute_scorecard_stats(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """
-    Compute per-candidate and per-evaluator statistics from scorecard rows.
-    Detects which columns are ratings (numeric) vs identifiers (text).
-    """
-    if not rows:
-        return {}
-
-    import statistics
-
-    # Detect column types from first row
-    sample = rows[0]
-    id_cols: List[str] = []
-    rating_cols: List[str] = []
-
-    for col, val in sample.items():
-        try:
-            float(str(val).replace(",", ""))
-            rating_cols.append(col)
-        except (ValueError, TypeError):
-            id_cols.append(col)
-
-    if not rating_cols:
-        return {"error": "No numeric rating columns found in scorecard."}
-
-    # Try to identify candidate and evaluator columns heuristically
-    candidate_col = next(
-        (c for c in id_cols if any(k in c.lower() for k in ("candidate", "name", "applicant"))),
-        id_cols[0] if id_cols else None,
-    )
-    evaluator_col = next(
-        (c for c in id_cols if any(k in c.lower() for k in ("evaluator", "interviewer", "reviewer", "rater"))),
-        id_cols[1] if len(id_cols) > 1 else None,
-    )
-
-    def safe_float(v: Any) -> float:
-        try:
-            return float(str(v).replace(",", ""))
-        except (ValueError, TypeError):
-            return 0.0
-
-    # Per-row overall score (mean of all rating columns)
-    for row in rows:
-        row["_overall"] = sum(safe_float(row.get(c, 0)) for c in rating_cols) / len(rating_cols)
-
-    # Global stats
-    all_scores = [r["_overall"] for r in rows]
-    global_mean = statistics.mean(all_scores) if all_scores else 0
-    global_stdev = statistics.stdev(all_scores) if len(all_scores) > 1 else 0
-
-    # Per-candidate stats
-    candidate_stats: Dict[str, Any] = {}
-    if candidate_col:
-        from itertools import groupby
-        candidates_grouped: Dict[str, List[float]] = {}
-        for row in rows:
-            cname = str(row.get(candidate_col, "unknown"))
-            candidates_grouped.setdefault(cname, []).append(row["_overall"])
-        for cname, scores in candidates_grouped.items():
-            mean = statistics.mean(scores)
-            var = statistics.stdev(scores) if len(scores) > 1 else 0
-            candidate_stats[cname] = {
-                "mean": round(mean, 2),
-                "stdev": round(var, 2),
-                "n_evaluators": len(scores),
-                "high_variance": var > 1.0,
-            }
-
-    # Per-evaluator stats
-    evaluator_stats: Dict[str, Any] = {}
-    if evaluator_col:
-        evaluators_grouped: Dict[str, List[float]] = {}
-        for row in rows:
-            ename = str(row.get(evaluator_col, "unknown"))
-            evaluators_grouped.setdefault(ename, []).append(row["_overall"])
-        for ename, scores in evaluators_grouped.items():
-            mean = statistics.mean(scores)
-            deviation = mean - global_mean
-            evaluator_stats[ename] = {
-                "mean": round(mean, 2),
-                "deviation_from_panel": round(deviation, 2),
-                "outlier": abs(deviation) > max(global_stdev * 1.5, 0.5),
-                "n_ratings": len(scores),
-            }
-
-    return {
-        "rating_columns": rating_cols,
-        "candidate_column": candidate_col,
-        "evaluator_column": evaluator_col,
-        "global_mean": round(global_mean, 2),
-        "global_stdev": round(global_stdev, 2),
-        "n_rows": len(rows),
-        "candidate_stats": candidate_stats,
-        "evaluator_stats": evaluator_stats,
+def shape_analysis(
+    parsed: Dict[str, Any], stats: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], str]:
+    """Normalise the model's scorecard JSON into (analysis, narrative)."""
+    analysis = {
+        "stats": stats or {},
+        "evaluator_findings": parsed.get("evaluator_findings", []),
+        "candidate_findings": parsed.get("candidate_findings", []),
+        "bias_signals": parsed.get("bias_signals", []),
+        "top_candidates": parsed.get("top_candidates", []),
+        "recommendation_summary": parsed.get("recommendation_summary", ""),
     }
+    return analysis, parsed.get("narrative", "")
 
 
-async def analyze_scorecard(state: AnalyzeState) -> Dict[str, Any]:
+async def analyze_scorecard(state: AnalyzeState, writer: StreamWriter) -> Dict[str, Any]:
     """
     Detects scoring anomalies, evaluator bias, and panel disagreement in
     candidate evaluation scorecards. Runs after classify_document when
     doc_type == 'scorecard'.
     """
     rows = state["rows"]
-    text = state["text"]
+    precomputed = state.get("scorecard_stats")
+    text = fit_text(state["text"], settings.analyze_text_tokens, "scorecard")
     context = state.get("context", "")
     t0 = time.perf_counter()
 
-    if not rows:
+    if not rows and not precomputed:
         # Scorecard uploaded as PDF/DOCX — fall back to text-based LLM analysis
         logger.warning("analyze_scorecard no_rows filename=%s falling_back=text", state["filename"])
         rows_available = False
         stats: Dict[str, Any] = {}
         stats_text = f"Raw scorecard text:\n{text}"
     else:
+        from api.app.analytics.scorecard_stats import compute_scorecard_stats_from_rows
+
         rows_available = True
-        stats = _compute_scorecard_stats(rows)
+        # Computed on the full DataFrame at parse time; row dicts only for direct graph callers
+        stats = precomputed or compute_scorecard_stats_from_rows(rows)
         stats_text = f"Computed statistics:\n{json.dumps(stats, indent=2)}"
 
     context_line = f"\nHiring context: {context}" if context else ""
     user_prompt = f"{stats_text}{context_line}"
 
     try:
-        raw = await run_inference(_ANALYZE_SCORECARD_SYSTEM, user_prompt)
+        on_token = narrative_token_writer(writer, "analyze_scorecard") if state.get("stream_tokens") else None
+        result = await run_inference_result(
+            _ANALYZE_SCORECARD_SYSTEM, user_prompt,
+            # Shaped before caching, so a reply that does not fit is never replayed
+            parse=lambda raw: shape_analysis(parse_json_reply(raw), stats if rows_available else {}),
+            use_cache=state.get("use_cache", True), on_token=on_token, deadline=state.get("deadline"),
+        )
         elapsed_ms = int((time.perf_counter() - t0) * 1000)
-
-        cleaned = raw.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("```")[1]
-            if cleaned.startswith("json"):
-                cleaned = cleaned[4:]
-            cleaned = cleaned.strip()
-
-        parsed = json.loads(cleaned)
-
-        analysis = {
-            "stats": stats if rows_available else {},
-            "evaluator_findings": parsed.get("evaluator_findings", []),
-            "candidate_findings": parsed.get("candidate_findings", []),
-            "bias_signals": parsed.get("bias_signals", []),
-            "top_candidates": parsed.get("top_candidates", []),
-            "recommendation_summary": parsed.get("recommendation_summary", ""),
-        }
-        summary = parsed.get("narrative", "")
+        analysis, summary = result.parsed
 
         anomaly_count = len(analysis["evaluator_findings"]) + len(analysis["candidate_findings"])
         logger.info(
@@ -200,9 +117,10 @@ async def analyze_scorecard(state: AnalyzeState) -> Dict[str, Any]:
             "actions_taken": [
                 ToolAction(kind="llm", name="analyze_scorecard", ok=True, ms=elapsed_ms,
                            details={
-                               "rows_analyzed": len(rows),
+                               "rows_analyzed": state.get("row_count") or len(rows),
                                "anomaly_count": anomaly_count,
                                "top_candidates": len(analysis["top_candidates"]),
+                               "cache": result.cache,
                            })
             ],
         }
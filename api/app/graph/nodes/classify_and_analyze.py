@@ -0,0 +1,202 @@
+# graph/nodes/classify_and_analyze.py
+from __future__ import annotations
+
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from langgraph.types import StreamWriter
+
+from api.app.clients.inference_client import parse_json_reply, run_inference_result
+from api.app.graph.nodes import (
+    analyze_cover_letter,
+    analyze_interview,
+    analyze_resume,
+    analyze_scorecard,
+)
+from api.app.graph.streaming import narrative_token_writer
+from api.app.parsers.text_budget import fit_text
+from api.app.schemas.agent import ToolAction
+from api.app.schemas.analyze import VALID_DOC_TYPES, AnalyzeState
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_FUSED_SYSTEM_PROMPT = """You are a document classifier and senior hiring analyst for an HR intelligence system.
+
+In ONE pass, classify the document and — if it is a resume, cover_letter, interview_notes or
+scorecard — analyze it. Return ONLY a valid JSON object:
+
+{
+  "doc_type": "<one of: resume, cover_letter, job_desc, interview_notes, scorecard, policy_doc, perf_review, unknown>",
+  "confidence": <float 0.0 to 1.0>,
+  "summary": "<1-2 sentence description of what this document is>",
+  "key_fields": { <same key fields a classifier would extract for this doc_type> },
+  "analysis": { <fields for the doc_type below, or {} for any other type> }
+}
+
+analysis fields by doc_type:
+- resume: strengths [], experience_highlights [], skill_gaps [],
+  risk_signals [{"flag","severity":"low|medium|high","detail"}],
+  seniority_assessment "junior|mid|senior|lead|principal",
+  recommendation "strong_hire|hire|consider|pass", recommendation_confidence 0.0-1.0, narrative
+- cover_letter: candidate_name, target_role, target_company, first_impression, motivation_clarity,
+  communication_quality, role_fit_signals [], red_flags [], recommendation "follow_up|pass",
+  recommendation_confidence 0.0-1.0, narrative
+- interview_notes: candidate_name, role, interview_date, interviewer, key_observations [],
+  technical_signals {"strengths":[],"gaps":[],"unclear":[]}, behavioral_signals {"positive":[],"concerns":[]},
+  inconsistencies [], open_questions [], recommendation "strong_hire|hire|consider|pass",
+  recommendation_confidence 0.0-1.0, narrative
+- scorecard: evaluator_findings [{"evaluator","finding","severity"}],
+  candidate_findings [{"candidate","finding","severity"}], bias_signals [], top_candidates [],
+  recommendation_summary, narrative
+
+"narrative" is always the LAST field of analysis: a 2-3 paragraph hiring memo that leads with the
+recommendation, supports it with evidence from the document, and ends with concerns or next steps.
+
+Distinguish carefully: a resume has dated job entries under section headers (Experience, Education,
+Skills); a cover letter is prose paragraphs addressed to a hiring manager, with no dated job history.
+
+Return ONLY the JSON object. No markdown fences, no explanation."""
+
+_SHAPERS: Dict[str, Callable[[Dict[str, Any]], Tuple[Dict[str, Any], str]]] = {
+    "resume": analyze_resume.shape_analysis,
+    "cover_letter": analyze_cover_letter.shape_analysis,
+    "interview_notes": analyze_interview.shape_analysis,
+    "scorecard": analyze_scorecard.shape_analysis,
+}
+
+
+_DOC_TYPE_FIELD = re.compile(r'"doc_type"\s*:\s*"([^"]*)"')
+_CONFIDENCE_FIELD = re.compile(r'"confidence"\s*:\s*(-?[0-9.]+)\s*[,}\s]')
+
+
+class _ConfidenceGate:
+    """
+    ``on_token`` for the fused call that holds the narrative back until the
+    reply's doc_type and confidence — which the prompt puts before the
+    analysis — show that the fused result will be used. A reply headed for
+    the two-step fallback streams nothing, so the client only ever sees the
+    fallback analyzer's narrative.
+    """
+
+    def __init__(self, writer: StreamWriter) -> None:
+        self._writer = writer
+        self._forward = narrative_token_writer(self._write, "classify_and_analyze")
+        self._head = ""
+        self._state = "pending"     # pending -> open | closed
+        self.emitted = False
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        self.emitted = True
+        self._writer(event)
+
+    def on_token(self, delta: str) -> None:
+        if self._state == "open":
+            self._forward(delta)
+            return
+        if self._state == "closed":
+            return
+        self._head += delta
+        doc_type = _DOC_TYPE_FIELD.search(self._head)
+        confidence = _CONFIDENCE_FIELD.search(self._head)
+        if not (doc_type and confidence):
+            return
+        try:
+            passed = float(confidence.group(1)) >= settings.fused_min_confidence
+        except ValueError:
+            passed = False
+        if passed and doc_type.group(1).lower().strip() in _SHAPERS:
+            self._state = "open"
+            self._forward(self._head)
+        else:
+            self._state = "closed"
+        self._head = ""
+
+    def discard(self) -> None:
+        """Tell the client to drop narrative already streamed before falling back."""
+        if self.emitted:
+            self._writer({"event": "token_reset", "node": "classify_and_analyze"})
+
+
+def _defer_to_two_step(reason: str, elapsed_ms: int, **details: Any) -> Dict[str, Any]:
+    """Leave doc_type unset so the graph falls through to classify_document."""
+    return {
+        "actions_taken": [
+            ToolAction(kind="llm", name="classify_and_analyze", ok=False, ms=elapsed_ms,
+                       details={"fallback": "two_step", "reason": reason, **details})
+        ],
+    }
+
+
+async def classify_and_analyze(state: AnalyzeState, writer: StreamWriter) -> Dict[str, Any]:
+    """
+    Fused mode: one LLM call returns doc_type, key_fields and the type-specific
+    analysis. Below `fused_min_confidence`, or on any failure, it defers to the
+    regular classify → analyze path.
+    """
+    text = fit_text(state["text"], settings.analyze_text_tokens)
+    t0 = time.perf_counter()
+
+    filename_hint = f"Filename: {state['filename']}\n\n"
+    context_hint = f"\n\nHiring context: {state['context']}" if state.get("context") else ""
+    user_prompt = f"{filename_hint}Document text:\n\n{text}{context_hint}"
+
+    gate = _ConfidenceGate(writer) if state.get("stream_tokens") else None
+    try:
+        result = await run_inference_result(
+            _FUSED_SYSTEM_PROMPT, user_prompt,
+            max_tokens=settings.fused_max_tokens, parse=parse_json_reply,
+            use_cache=state.get("use_cache", True), on_token=gate.on_token if gate else None,
+            deadline=state.get("deadline"),
+        )
+        elapsed_ms = int((time.perf_counter() - t0) * 1000)
+        parsed = result.parsed
+    except Exception as exc:
+        elapsed_ms = int((time.perf_counter() - t0) * 1000)
+        logger.warning("classify_and_analyze failed=%s falling_back=two_step ms=%d", exc, elapsed_ms)
+        if gate:
+            gate.discard()
+        return _defer_to_two_step("error", elapsed_ms, error=str(exc))
+
+    doc_type = str(parsed.get("doc_type", "unknown")).lower().strip()
+    confidence = float(parsed.get("confidence", 0.0))
+    raw_analysis = parsed.get("analysis") or {}
+
+    if doc_type not in VALID_DOC_TYPES or confidence < settings.fused_min_confidence:
+        logger.info(
+            "classify_and_analyze low_confidence doc_type=%s confidence=%.2f falling_back=two_step",
+            doc_type, confidence,
+        )
+        if gate:
+            gate.discard()
+        return _defer_to_two_step("low_confidence", elapsed_ms, doc_type=doc_type, confidence=confidence)
+
+    shaper = _SHAPERS.get(doc_type)
+    if shaper and not raw_analysis:
+        if gate:
+            gate.discard()
+        return _defer_to_two_step("missing_analysis", elapsed_ms, doc_type=doc_type)
+
+    analysis, narrative = shaper(raw_analysis) if shaper else ({}, "")
+    summary = narrative or parsed.get("summary", "")
+
+    logger.info(
+        "classify_and_analyze filename=%s doc_type=%s confidence=%.2f recommendation=%s ms=%d ok=true",
+        state["filename"], doc_type, confidence, analysis.get("recommendation", "n/a"), elapsed_ms,
+    )
+
+    return {
+        "doc_type": doc_type,
+        "doc_type_confidence": confidence,
+        "key_fields": parsed.get("key_fields", {}),
+        "analysis": analysis,
+        "summary": summary,
+        "actions_taken": [
+            ToolAction(kind="llm", name="classify_and_analyze", ok=True, ms=elapsed_ms,
+                       details={"doc_type": doc_type, "confidence": confidence,
+                                "recommendation": analysis.get("recommendation"),
+                                "cache": result.cache})
+        ],
+    }
@@ -1,14 +1,16 @@
 # graph/nodes/classify_document.py
 from __future__ import annotations
 
-import json
 import logging
 import time
 from typing import Any, Dict
 
-from api.app.clients.inference_client import run_inference
+from api.app.classifier.local_classifier import classify_locally
+from api.app.clients.inference_client import parse_json_reply, run_inference_result
+from api.app.parsers.text_budget import fit_text
 from api.app.schemas.agent import ToolAction
 from api.app.schemas.analyze import AnalyzeState, VALID_DOC_TYPES
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +63,7 @@ _FILENAME_KEYWORDS: list[tuple[list[str], str]] = [
 ]
 
 
-def _filename_precheck(filename: str) -> str | None:
+def filename_precheck(filename: str) -> str | None:
     """Return a doc_type if the filename unambiguously identifies the document, else None."""
     lower = filename.lower()
     for keywords, doc_type in _FILENAME_KEYWORDS:
@@ -72,8 +74,10 @@ def _filename_precheck(filename: str) -> str | None:
 
 async def classify_document(state: AnalyzeState) -> Dict[str, Any]:
     """
-    Classify the uploaded document type and extract key fields via LLM.
-    Falls back to extension-based classification if LLM fails.
+    Classify the uploaded document type and extract key fields.
+    Order: filename pre-check, local statistical model (above the confidence
+    threshold), then the LLM. Falls back to extension-based classification
+    if the LLM fails.
     """
     text = state["text"]
     extension = state["extension"]
@@ -81,7 +85,7 @@ async def classify_document(state: AnalyzeState) -> Dict[str, Any]:
     t0 = time.perf_counter()
 
     # Deterministic pre-check: filename is more reliable than LLM for obvious cases
-    precheck_type = _filename_precheck(filename)
+    precheck_type = filename_precheck(filename)
     if precheck_type:
         elapsed_ms = int((time.perf_counter() - t0) * 1000)
         logger.info(
@@ -114,23 +118,44 @@ async def classify_document(state: AnalyzeState) -> Dict[str, Any]:
             "warnings": ["Document text was empty; classification defaulted to extension."],
         }
 
+    # Local statistical classifier: answers obvious documents in-process
+    local = None
+    if settings.local_classifier_enabled:
+        try:
+            local = classify_locally(text)
+        except Exception as exc:
+            logger.warning("classify_document local_model_failed=%s", exc)
+    if local and local.confidence >= settings.local_classifier_threshold:
+        elapsed_ms = int((time.perf_counter() - t0) * 1000)
+        logger.info(
+            "classify_document local_model filename=%s doc_type=%s confidence=%.2f ms=%d",
+            filename, local.doc_type, local.confidence, elapsed_ms,
+        )
+        return {
+            "doc_type": local.doc_type,
+            "doc_type_confidence": round(local.confidence, 3),
+            "key_fields": {},
+            "summary": f"Classified as {local.doc_type.replace('_', ' ')} by the local model.",
+            "actions_taken": [
+                ToolAction(kind="route", name="classify_document", ok=True, ms=elapsed_ms,
+                           details={"doc_type": local.doc_type, "confidence": round(local.confidence, 3),
+                                    "method": "local_model"})
+            ],
+        }
+
     filename_hint = f"Filename: {state['filename']}\n\n"
     context_hint = f"\n\nContext from user: {state['context']}" if state.get("context") else ""
-    user_prompt = f"{filename_hint}Document text:\n\n{text}{context_hint}"
+    # A sample spread over the document's sections is enough to tell its type
+    sample = fit_text(text, settings.classify_text_tokens)
+    user_prompt = f"{filename_hint}Document text:\n\n{sample}{context_hint}"
 
     try:
-        raw = await run_inference(_CLASSIFY_SYSTEM_PROMPT, user_prompt)
+        result = await run_inference_result(
+            _CLASSIFY_SYSTEM_PROMPT, user_prompt, parse=parse_json_reply,
+            use_cache=state.get("use_cache", True), deadline=state.get("deadline"),
+        )
         elapsed_ms = int((time.perf_counter() - t0) * 1000)
-
-        # Strip markdown fences if the model wrapped output anyway
-        cleaned = raw.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("```")[1]
-            if cleaned.startswith("json"):
-                cleaned = cleaned[4:]
-            cleaned = cleaned.strip()
-
-        parsed = json.loads(cleaned)
+        parsed = result.parsed
         doc_type = parsed.get("doc_type", "unknown").lower().strip()
         if doc_type not in VALID_DOC_TYPES:
             logger.warning("classify_document unknown_type=%r falling_back=extension", doc_type)
@@ -152,7 +177,9 @@ async def classify_document(state: AnalyzeState) -> Dict[str, Any]:
             "summary": summary,
             "actions_taken": [
                 ToolAction(kind="llm", name="classify_document", ok=True, ms=elapsed_ms,
-                           details={"doc_type": doc_type, "confidence": confidence})
+                           details={"doc_type": doc_type, "confidence": confidence,
+                                    "cache": result.cache,
+                                    "local_guess": local.doc_type if local else None})
             ],
         }
 
@@ -44,7 +44,7 @@ async def extract_inputs(state: GraphState) -> Dict[str, Any]:
     t0 = time.perf_counter()
 
     try:
-        raw = await run_inference(_INTENT_SYSTEM_PROMPT, message)
+        raw = await run_inference(_INTENT_SYSTEM_PROMPT, message, deadline=state.get("deadline"))
         intent = raw.strip().lower()
         if intent not in _VALID_INTENTS:
             logger.warning("llm returned unknown intent=%r, falling back to keyword", intent)
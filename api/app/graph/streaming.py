@@ -0,0 +1,108 @@
+# api/app/graph/streaming.py
+from __future__ import annotations
+
+import json
+from typing import Callable, Optional
+
+from langgraph.types import StreamWriter
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonFieldStreamer:
+    """
+    Incrementally extracts one string field from a JSON object as it streams in.
+
+    The analyzers ask the model for a JSON object whose ``narrative`` field is
+    the long prose memo. Feeding raw completion deltas through ``feed`` yields
+    only the decoded characters of that field, so the UI can render the memo
+    while the rest of the object is still being generated.
+    """
+
+    def __init__(self, field: str) -> None:
+        self._marker = f'"{field}"'
+        self._buffer = ""
+        self._state = "seek"          # seek -> colon -> open -> value -> done
+        self._escape: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        out: list[str] = []
+
+        while self._buffer and self._state != "done":
+            if self._state == "seek":
+                idx = self._buffer.find(self._marker)
+                if idx < 0:
+                    # keep a tail in case the marker is split across chunks
+                    self._buffer = self._buffer[-(len(self._marker) - 1):]
+                    break
+                self._buffer = self._buffer[idx + len(self._marker):]
+                self._state = "colon"
+            elif self._state in ("colon", "open"):
+                stripped = self._buffer.lstrip()
+                if not stripped:
+                    self._buffer = ""
+                    break
+                expected = ":" if self._state == "colon" else '"'
+                if stripped[0] != expected:
+                    # the key appeared somewhere other than as our field — keep looking
+                    self._buffer = stripped
+                    self._state = "seek"
+                    continue
+                self._buffer = stripped[1:]
+                self._state = "open" if self._state == "colon" else "value"
+            else:
+                self._buffer = self._consume_value(out)
+                break
+
+        return "".join(out)
+
+    def _consume_value(self, out: list[str]) -> str:
+        buf = self._buffer
+        i = 0
+        while i < len(buf):
+            if self._escape is not None:
+                self._escape += buf[i]
+                i += 1
+                if self._escape.startswith("u"):
+                    if len(self._escape) < 5:
+                        continue
+                    try:
+                        out.append(chr(int(self._escape[1:], 16)))
+                    except ValueError:
+                        pass
+                else:
+                    out.append(_ESCAPES.get(self._escape, self._escape))
+                self._escape = None
+                continue
+            ch = buf[i]
+            i += 1
+            if ch == "\\":
+                self._escape = ""
+            elif ch == '"':
+                self._state = "done"
+                return ""
+            else:
+                out.append(ch)
+        return ""
+
+
+def narrative_token_writer(writer: StreamWriter, node: str) -> Callable[[str], None]:
+    """Build an ``on_token`` callback that forwards narrative text as custom stream events."""
+    streamer = JsonFieldStreamer("narrative")
+
+    def on_token(delta: str) -> None:
+        text = streamer.feed(delta)
+        if text:
+            writer({"event": "token", "node": node, "text": text})
+
+    return on_token
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -3,8 +3,7 @@ from __future__ import annotations
 
 import logging
 
-import httpx
-
+from api.app.clients.http_client import get_http_client
 from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -23,11 +22,10 @@ async def send_notification(payload: dict) -> bool:
         return False
 
     try:
-        async with httpx.AsyncClient(timeout=5) as client:
-            resp = await client.post(settings.n8n_webhook_url, json=payload)
-            resp.raise_for_status()
-            logger.info("notification sent status=%d url=%s", resp.status_code, settings.n8n_webhook_url)
-            return True
+        resp = await get_http_client().post(settings.n8n_webhook_url, json=payload, timeout=5)
+        resp.raise_for_status()
+        logger.info("notification sent status=%d url=%s", resp.status_code, settings.n8n_webhook_url)
+        return True
     except Exception as exc:
         logger.warning("notification failed exc=%s url=%s", exc, settings.n8n_webhook_url)
         return False
@@ -1,18 +1,31 @@
 # app/main.py
 from __future__ import annotations
 
+import asyncio
 import logging
 import uuid
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI, File, Form, Header, HTTPException, Query, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, File, Form, Header, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
+from api.app.classifier.local_classifier import get_classifier
+from api.app.clients.deadline import deadline_in, resolve_budget
+from api.app.clients.http_client import close_http_client, open_http_client
+from api.app.clients.inference_client import circuit_breaker_stats, rate_governor_stats
 from api.app.db.database import init_db
+from api.app.graph.streaming import format_sse
+from api.app.parsers.archive import BatchBudget, BatchEntry, expand_upload
+from api.app.parsers.document_parser import SUPPORTED_EXTENSIONS
+from api.app.parsers.parse_pool import parse_pool_stats, shutdown_parse_pool
+from api.app.parsers.upload_spool import SpooledUpload, UploadTooLarge, spool_upload
 from api.app.db.repository import (
+    count_jobs,
+    create_job,
+    get_job,
     get_sessions_by_id,
     list_sessions,
     save_agent_session,
@@ -20,9 +33,12 @@ from api.app.db.repository import (
 )
 from api.app.schemas.agent import AgentRequest, AgentResponse, ToolAction
 from api.app.schemas.analyze import AnalyzeResponse
+from api.app.schemas.job import JobStatus, JobSubmitted
 from api.app.schemas.session import SessionRecord
 from api.app.runner.agent_runner import run_agent
-from api.app.runner.analyze_runner import run_analyze
+from api.app.runner.analyze_runner import run_analyze, stream_analyze
+from api.app.runner.job_queue import job_queue
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +46,46 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await open_http_client()
+    if settings.local_classifier_enabled:
+        await asyncio.to_thread(get_classifier)
+    await job_queue.start(_process_analyze_job)
     yield
+    await job_queue.stop()
+    await close_http_client()
+    shutdown_parse_pool()
 
 
 app = FastAPI(title="AgentFlow HR Intelligence API", lifespan=lifespan)
 
+# Upload endpoints and the setting their body is checked against before it is read
+_UPLOAD_LIMITS = {
+    "/agent/analyze": "max_upload_bytes",
+    "/agent/analyze/stream": "max_upload_bytes",
+    "/agent/analyze/jobs": "max_upload_bytes",
+    "/agent/analyze/batch": "batch_max_bytes",
+}
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024   # boundaries, part headers, the context field
+_PART_OVERHEAD_BYTES = 1024             # headers of each further batch part
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Answer 413 from Content-Length alone, before the multipart body is received."""
+    limit_setting = _UPLOAD_LIMITS.get(request.url.path) if request.method == "POST" else None
+    if limit_setting:
+        limit = getattr(settings, limit_setting)
+        overhead = _MULTIPART_OVERHEAD_BYTES
+        if limit_setting == "batch_max_bytes":
+            overhead += settings.batch_max_files * _PART_OVERHEAD_BYTES
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > limit + overhead:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload exceeds the {limit:,} byte limit."},
+            )
+    return await call_next(request)
+
 
 def _normalize_actions(actions: Any) -> List[ToolAction]:
     """
@@ -73,6 +124,21 @@ def _normalize_actions(actions: Any) -> List[ToolAction]:
     ]
 
 
+async def _spool(file: UploadFile) -> SpooledUpload:
+    """Stream an upload to a temp file; 400 when unnamed or empty, 413 when too large."""
+    filename = (file.filename or "").strip()
+    if not filename:
+        raise HTTPException(status_code=400, detail="Missing filename on upload.")
+    try:
+        spooled = await spool_upload(file, filename, settings.max_upload_bytes)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if not spooled.size:
+        spooled.cleanup()
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    return spooled
+
+
 def _extract_recommendation(analysis: dict) -> Optional[str]:
     """Pull recommendation string out of analysis dict if present."""
     return analysis.get("recommendation") if isinstance(analysis, dict) else None
@@ -80,28 +146,40 @@ def _extract_recommendation(analysis: dict) -> Optional[str]:
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    breakers = circuit_breaker_stats()
+    degraded = any(b["state"] != "closed" for b in breakers.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "rate_limits": rate_governor_stats(),
+        "circuit_breakers": breakers,
+        "parse_pool": parse_pool_stats(),
+        "jobs": job_queue.stats(),
+    }
 
 
 @app.post("/agent", response_model=AgentResponse)
 async def agent(
     request: AgentRequest,
     x_session_id: Optional[str] = Header(default=None),
+    x_request_budget_ms: Optional[str] = Header(default=None),
 ) -> AgentResponse:
     """
     Message-driven agent endpoint.
 
     Accepts: JSON { message, metadata? }
     Optional header X-Session-ID groups related calls into one session.
+    Optional header X-Request-Budget-Ms overrides the request deadline budget.
     Returns: consistent AgentResponse shape every time.
     """
     request_id = str(uuid.uuid4())
+    deadline = deadline_in(resolve_budget(x_request_budget_ms, settings.agent_budget_seconds))
 
     try:
         result = await run_agent(
             message=request.message,
             request_id=request_id,
             metadata=request.metadata,
+            deadline=deadline,
         )
         result["actions_taken"] = _normalize_actions(result.get("actions_taken"))
         response = AgentResponse(**result)
@@ -138,7 +216,9 @@ async def agent(
 async def analyze_file(
     file: UploadFile = File(...),
     context: Optional[str] = Form(None),
+    use_cache: bool = Form(True),
     x_session_id: Optional[str] = Header(default=None),
+    x_request_budget_ms: Optional[str] = Header(default=None),
 ) -> AnalyzeResponse:
     """
     Document analysis endpoint.
@@ -146,24 +226,27 @@ async def analyze_file(
     Accepts: multipart/form-data with a PDF, DOCX, TXT, CSV, XLSX, or image file.
     Optional header X-Session-ID groups related calls into one session.
     Optional `context` field provides a hint to the classifier.
+    Optional `use_cache=false` field skips the analysis cache and re-analyzes
+    (a repeat upload is otherwise answered from it, marked by an
+    `analysis_cache` action with `cached: true`).
+    Optional header X-Request-Budget-Ms overrides the request deadline budget.
     Returns: AnalyzeResponse with doc_type, key_fields, summary, and action trail.
+    Uploads over MAX_UPLOAD_BYTES are rejected with 413.
     """
-    filename = (file.filename or "").strip()
-    if not filename:
-        raise HTTPException(status_code=400, detail="Missing filename on upload.")
-
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-
+    spooled = await _spool(file)
+    filename = spooled.filename
     request_id = str(uuid.uuid4())
+    deadline = deadline_in(resolve_budget(x_request_budget_ms, settings.analyze_budget_seconds))
 
     try:
         result = await run_analyze(
             filename=filename,
-            content=content,
+            content=spooled.path,
             request_id=request_id,
             context=context or "",
+            deadline=deadline,
+            content_sha256=spooled.sha256,
+            use_cache=use_cache,
         )
         result["actions_taken"] = _normalize_actions(result.get("actions_taken"))
         response = AnalyzeResponse(**result)
@@ -198,6 +281,304 @@ async def analyze_file(
             warnings=[str(e)],
         )
 
+    finally:
+        spooled.cleanup()
+
+
+@app.post("/agent/analyze/stream")
+async def analyze_file_stream(
+    file: UploadFile = File(...),
+    context: Optional[str] = Form(None),
+    use_cache: bool = Form(True),
+    x_session_id: Optional[str] = Header(default=None),
+    x_request_budget_ms: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """
+    Streaming document analysis endpoint (server-sent events).
+
+    Accepts the same multipart form as /agent/analyze. Emits `parsed`,
+    `classified` and `analyzer_started` progress events, `token` events with
+    narrative text as the analyzer generates it, and a final `result` event
+    whose data is the AnalyzeResponse — alone, when served from the analysis
+    cache. A `token_reset` event means discard the tokens so far: the fused
+    pass fell back to classify → analyze, whose narrative follows. Honours
+    `use_cache` and X-Request-Budget-Ms like /agent/analyze.
+    """
+    spooled = await _spool(file)
+    filename = spooled.filename
+    request_id = str(uuid.uuid4())
+    deadline = deadline_in(resolve_budget(x_request_budget_ms, settings.analyze_budget_seconds))
+
+    async def _events():
+        try:
+            async for event in stream_analyze(
+                filename=filename,
+                content=spooled.path,
+                request_id=request_id,
+                context=context or "",
+                deadline=deadline,
+                content_sha256=spooled.sha256,
+                use_cache=use_cache,
+            ):
+                name = event.pop("event", "message")
+                if name != "result":
+                    yield format_sse(name, event)
+                    continue
+
+                result = event["data"]
+                result["actions_taken"] = _normalize_actions(result.get("actions_taken"))
+                response = AnalyzeResponse(**result)
+                await save_analyze_session(
+                    session_id=x_session_id,
+                    request_id=request_id,
+                    filename=filename,
+                    doc_type=result.get("doc_type", "unknown"),
+                    doc_type_confidence=result.get("doc_type_confidence", 0.0),
+                    recommendation=_extract_recommendation(result.get("analysis", {})),
+                    summary=result.get("summary", ""),
+                    warnings=result.get("warnings", []),
+                )
+                yield format_sse("result", response.model_dump())
+
+        except Exception as e:
+            response = AnalyzeResponse(
+                request_id=request_id,
+                filename=filename,
+                doc_type="unknown",
+                doc_type_confidence=0.0,
+                summary="",
+                actions_taken=[
+                    ToolAction(kind="event", name="analyze_error", ok=False, ms=0,
+                               details={"error": str(e)})
+                ],
+                warnings=[str(e)],
+            )
+            yield format_sse("result", response.model_dump())
+
+        finally:
+            spooled.cleanup()
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Request-ID": request_id},
+    )
+
+
+async def _analyze_and_record(
+    filename: str,
+    content: bytes,
+    request_id: str,
+    context: str,
+    deadline: Optional[float],
+    session_id: Optional[str],
+    use_cache: bool = True,
+) -> AnalyzeResponse:
+    """Run the analyze pipeline and save its session record, as /agent/analyze does."""
+    result = await run_analyze(
+        filename=filename,
+        content=content,
+        request_id=request_id,
+        context=context,
+        deadline=deadline,
+        use_cache=use_cache,
+    )
+    result["actions_taken"] = _normalize_actions(result.get("actions_taken"))
+    response = AnalyzeResponse(**result)
+
+    await save_analyze_session(
+        session_id=session_id,
+        request_id=request_id,
+        filename=filename,
+        doc_type=result.get("doc_type", "unknown"),
+        doc_type_confidence=result.get("doc_type_confidence", 0.0),
+        recommendation=_extract_recommendation(result.get("analysis", {})),
+        summary=result.get("summary", ""),
+        warnings=result.get("warnings", []),
+    )
+    return response
+
+
+def _analyze_error_response(request_id: str, filename: str, error: str) -> AnalyzeResponse:
+    return AnalyzeResponse(
+        request_id=request_id,
+        filename=filename,
+        doc_type="unknown",
+        doc_type_confidence=0.0,
+        summary="",
+        actions_taken=[
+            ToolAction(kind="event", name="analyze_error", ok=False, ms=0,
+                       details={"error": error})
+        ],
+        warnings=[error],
+    )
+
+
+async def _process_analyze_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job worker handler: same pipeline and session record as /agent/analyze."""
+    response = await _analyze_and_record(
+        filename=job["filename"],
+        content=job["content"],
+        request_id=job["job_id"],
+        context=job["context"] or "",
+        deadline=deadline_in(settings.job_budget_seconds),
+        session_id=job["session_id"],
+        use_cache=bool(job["use_cache"]),
+    )
+    return response.model_dump()
+
+
+async def _spool_batch(files: List[UploadFile]) -> List[BatchEntry]:
+    """
+    Spool each batch part to a temp file against what is left of
+    ``batch_max_bytes``, expanding ZIP archives as they arrive. Once the
+    batch holds ``batch_max_files`` documents, or its bytes are spent, the
+    remaining parts are skipped without being read.
+    """
+    budget = BatchBudget()
+    entries: List[BatchEntry] = []
+    try:
+        for upload in files:
+            filename = (upload.filename or "").strip()
+            ext = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+            if ext != "zip" and ext not in SUPPORTED_EXTENSIONS:
+                entries.append(BatchEntry(filename=filename, skip_reason=f"Unsupported file type: .{ext}"))
+                continue
+            if budget.full:
+                entries.append(BatchEntry(
+                    filename=filename, skip_reason=f"Batch is limited to {settings.batch_max_files} files",
+                ))
+                continue
+            try:
+                spooled = await spool_upload(upload, filename, budget.remaining_bytes)
+            except UploadTooLarge:
+                entries.append(BatchEntry(filename=filename, skip_reason="Batch exceeds the size limit"))
+                continue
+            expanded = await asyncio.to_thread(expand_upload, filename, spooled.path, spooled.size, budget)
+            if ext == "zip" or not any(e.content for e in expanded):
+                spooled.cleanup()   # archive unpacked, or the part was skipped
+            entries.extend(expanded)
+    except BaseException:
+        for entry in entries:
+            entry.cleanup()
+        raise
+    logger.info(
+        "batch_expand uploads=%d entries=%d accepted=%d bytes=%d",
+        len(files), len(entries), budget.accepted, budget.used,
+    )
+    return entries
+
+
+@app.post("/agent/analyze/batch")
+async def analyze_batch(
+    files: List[UploadFile] = File(...),
+    context: Optional[str] = Form(None),
+    use_cache: bool = Form(True),
+    x_session_id: Optional[str] = Header(default=None),
+    x_request_budget_ms: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """
+    Batch document analysis, streamed as NDJSON.
+
+    Accepts several `files` parts, any of which may be a ZIP archive of
+    documents. Documents are analyzed `batch_concurrency` at a time (LLM calls
+    still queue behind the per-model rate governor) and one AnalyzeResponse
+    line is written as each finishes, in completion order. Skipped entries
+    (unsupported, empty, over the batch limits) get an error line too.
+    All results share one session: X-Session-ID, or a generated id returned
+    in the X-Session-ID response header. X-Request-Budget-Ms applies per document,
+    `use_cache=false` to every document.
+    """
+    if any(not (upload.filename or "").strip() for upload in files):
+        raise HTTPException(status_code=400, detail="Missing filename on upload.")
+    entries = await _spool_batch(files)
+    session_id = x_session_id or str(uuid.uuid4())
+    budget = resolve_budget(x_request_budget_ms, settings.analyze_budget_seconds)
+    semaphore = asyncio.Semaphore(max(settings.batch_concurrency, 1))
+
+    async def _one(entry: BatchEntry) -> AnalyzeResponse:
+        request_id = str(uuid.uuid4())
+        if entry.skip_reason:
+            return _analyze_error_response(request_id, entry.filename, entry.skip_reason)
+        async with semaphore:
+            try:
+                return await _analyze_and_record(
+                    filename=entry.filename,
+                    content=entry.content,
+                    request_id=request_id,
+                    context=context or "",
+                    deadline=deadline_in(budget),
+                    session_id=session_id,
+                    use_cache=use_cache,
+                )
+            except Exception as e:
+                return _analyze_error_response(request_id, entry.filename, str(e))
+            finally:
+                entry.cleanup()   # remove the spooled file once analyzed
+
+    async def _lines():
+        tasks = [asyncio.create_task(_one(entry)) for entry in entries]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                response = await next_done
+                yield response.model_dump_json() + "\n"
+        finally:
+            # client went away mid-batch: don't keep analyzing for nobody
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for entry in entries:
+                entry.cleanup()
+
+    logger.info("analyze_batch session_id=%s documents=%d", session_id, len(entries))
+    return StreamingResponse(
+        _lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Session-ID": session_id, "X-Batch-Size": str(len(entries))},
+    )
+
+
+@app.post("/agent/analyze/jobs", response_model=JobSubmitted, status_code=202)
+async def submit_analyze_job(
+    file: UploadFile = File(...),
+    context: Optional[str] = Form(None),
+    use_cache: bool = Form(True),
+    x_session_id: Optional[str] = Header(default=None),
+) -> JobSubmitted:
+    """
+    Queue a document for background analysis.
+
+    Accepts the same multipart form as /agent/analyze, `use_cache` included,
+    and returns immediately with a job id. Poll GET /agent/analyze/jobs/{job_id} for the result.
+    Jobs are persisted, so queued work survives a restart.
+    """
+    spooled = await _spool(file)
+    filename = spooled.filename
+    try:
+        if await count_jobs("queued") >= settings.job_queue_max:
+            raise HTTPException(status_code=503, detail="Analyze job queue is full; retry later.")
+        # the jobs table holds the upload until a worker has analyzed it
+        content = await asyncio.to_thread(spooled.read_bytes)
+    finally:
+        spooled.cleanup()
+
+    job_id = str(uuid.uuid4())
+    await create_job(
+        job_id=job_id, session_id=x_session_id, filename=filename,
+        context=context or "", content=content, use_cache=use_cache,
+    )
+    job_queue.submit(job_id)
+    return JobSubmitted(job_id=job_id, status_url=f"/agent/analyze/jobs/{job_id}")
+
+
+@app.get("/agent/analyze/jobs/{job_id}", response_model=JobStatus)
+async def get_analyze_job(job_id: str) -> JobStatus:
+    """Return a job's status, and its AnalyzeResponse once done."""
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job found: {job_id}")
+    return JobStatus(**job)
+
 
 @app.get("/sessions", response_model=List[SessionRecord])
 async def get_sessions(limit: int = Query(default=20, ge=1, le=100)):
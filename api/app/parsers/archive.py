@@ -0,0 +1,148 @@
+# api/app/parsers/archive.py
+from __future__ import annotations
+
+import io
+import logging
+import os
+import posixpath
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from api.app.parsers.document_parser import SUPPORTED_EXTENSIONS, DocumentSource
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchEntry:
+    """
+    One file of a batch upload; ``skip_reason`` is set when it won't be
+    analyzed. ZIP members are extracted to temp files, so ``content`` is
+    then a Path the caller must ``cleanup()``.
+    """
+    filename: str
+    content: DocumentSource = b""
+    skip_reason: Optional[str] = None
+
+    def cleanup(self) -> None:
+        if isinstance(self.content, Path):
+            self.content.unlink(missing_ok=True)
+        self.content = b""
+
+
+class BatchBudget:
+    """Files accepted and bytes used so far, against ``batch_max_files`` / ``batch_max_bytes``."""
+
+    def __init__(self) -> None:
+        self.accepted = 0
+        self.used = 0
+
+    @property
+    def remaining_bytes(self) -> int:
+        return max(settings.batch_max_bytes - self.used, 0)
+
+    @property
+    def full(self) -> bool:
+        return self.accepted >= settings.batch_max_files
+
+    def admit(self, entry: BatchEntry, size: int) -> BatchEntry:
+        """Count a readable entry against the limits, or mark it skipped."""
+        if not size:
+            entry.skip_reason = "Uploaded file is empty."
+        elif self.full:
+            entry.skip_reason = f"Batch is limited to {settings.batch_max_files} files"
+        else:
+            self.accepted += 1
+            self.used += size
+            return entry
+        entry.cleanup()
+        return entry
+
+
+def _extension(name: str) -> str:
+    return name.lower().rsplit(".", 1)[-1] if "." in name else ""
+
+
+def _is_junk(name: str) -> bool:
+    base = posixpath.basename(name)
+    return name.startswith("__MACOSX/") or base.startswith(".") or not base
+
+
+def _extract_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, limit: int) -> Optional[Tuple[Path, int]]:
+    """
+    Copy a member to a temp file in ``upload_chunk_bytes`` chunks. Declared
+    sizes can lie, so the copy stops (and the file is removed) once it
+    passes ``limit``; returns None then.
+    """
+    fd, name = tempfile.mkstemp(
+        prefix="batch-", suffix=Path(info.filename).suffix.lower(), dir=settings.upload_spool_dir or None,
+    )
+    path = Path(name)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as fh, archive.open(info) as member:
+            while chunk := member.read(settings.upload_chunk_bytes):
+                size += len(chunk)
+                if size > limit:
+                    path.unlink(missing_ok=True)
+                    return None
+                fh.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, size
+
+
+def _expand_zip(archive_name: str, content: DocumentSource, budget: BatchBudget) -> List[BatchEntry]:
+    """Unpack supported members of a ZIP against the batch budget."""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(content) if isinstance(content, bytes) else content)
+    except zipfile.BadZipFile:
+        return [BatchEntry(filename=archive_name, skip_reason="Not a valid ZIP archive")]
+
+    entries: List[BatchEntry] = []
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or _is_junk(info.filename):
+                continue
+            name = info.filename
+            ext = _extension(name)
+            if ext not in SUPPORTED_EXTENSIONS:
+                entries.append(BatchEntry(filename=name, skip_reason=f"Unsupported file type: .{ext}"))
+                continue
+            if budget.full:
+                entries.append(budget.admit(BatchEntry(filename=name), info.file_size))
+                continue
+            if info.file_size > budget.remaining_bytes:
+                entries.append(BatchEntry(filename=name, skip_reason="Archive exceeds the batch size limit"))
+                continue
+            extracted = _extract_member(archive, info, budget.remaining_bytes)
+            if extracted is None:
+                entries.append(BatchEntry(filename=name, skip_reason="Archive exceeds the batch size limit"))
+                continue
+            path, size = extracted
+            entries.append(budget.admit(BatchEntry(filename=name, content=path), size))
+    return entries
+
+
+def expand_upload(filename: str, content: DocumentSource, size: int, budget: BatchBudget) -> List[BatchEntry]:
+    """
+    One part of a batch upload → its documents. ZIP archives are expanded in
+    place (directories, dotfiles and macOS metadata dropped) and members are
+    extracted to temp files. Unsupported types, empty files and anything past
+    the budget come back with ``skip_reason`` set rather than being dropped,
+    so every input is accounted for in the response.
+    """
+    ext = _extension(filename)
+    if ext == "zip":
+        return _expand_zip(filename, content, budget)
+    if ext not in SUPPORTED_EXTENSIONS:
+        return [BatchEntry(filename=filename, skip_reason=f"Unsupported file type: .{ext}")]
+    if size > budget.remaining_bytes:
+        return [BatchEntry(filename=filename, skip_reason="Batch exceeds the size limit")]
+    return [budget.admit(BatchEntry(filename=filename, content=content), size)]
+
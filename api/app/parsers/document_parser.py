@@ -3,14 +3,26 @@ from __future__ import annotations
 
 import io
 import logging
+import time
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from api.app.parsers.image_preprocess import prepare_image
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
 SUPPORTED_EXTENSIONS = {"pdf", "docx", "txt", "csv", "xlsx", "xls", "jpg", "jpeg", "png", "webp"}
 IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "webp"}
-MAX_TEXT_CHARS = 12_000  # truncation ceiling before LLM calls
+MAX_TEXT_CHARS = 12_000  # rendered table text ceiling; prompts are fitted per node in tokens (text_budget)
+PDF_EXTRACT_CHARS = MAX_TEXT_CHARS + 8_000  # stop extracting PDF pages / DOCX blocks past this; margin for section selection
+MIN_PAGE_TEXT_CHARS = 40   # a page with images and less text than this is treated as scanned
+TABLE_SAMPLE_ROWS = 1_000  # rows handed to the graph (and CSV prompt text); stats cover the full table
+
+# Uploads arrive either in memory or spooled to disk; parsers open a Path
+# directly rather than reading it into another copy.
+DocumentSource = Union[bytes, Path]
 
 _MEDIA_TYPES = {
     "jpg": "image/jpeg",
@@ -20,6 +32,14 @@ _MEDIA_TYPES = {
 }
 
 
+@dataclass
+class PdfPage:
+    number: int                            # 1-based page number
+    text: str = ""                         # text layer, for typed pages
+    image_bytes: Optional[bytes] = None    # rendered page image, for scanned pages
+    image_media_type: str = "image/png"
+
+
 @dataclass
 class ParsedDocument:
     filename: str
@@ -30,18 +50,33 @@ class ParsedDocument:
     parse_error: Optional[str] = None
     image_bytes: Optional[bytes] = None   # set for image uploads; vision LLM transcribes
     image_media_type: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)   # parser details, e.g. pages_parsed/pages_total
+    pages: List[PdfPage] = field(default_factory=list)       # PDFs with scanned pages; text is stitched after vision
+    scorecard_stats: Optional[Dict[str, Any]] = None         # CSV/XLSX, aggregated while streaming; per sheet for multi-tab workbooks
 
     @property
-    def truncated_text(self) -> str:
-        """Text trimmed to MAX_TEXT_CHARS for LLM calls."""
-        if not self.text:
-            return ""
-        if len(self.text) > MAX_TEXT_CHARS:
-            return self.text[:MAX_TEXT_CHARS] + "\n[... truncated ...]"
-        return self.text
+    def scanned_pages(self) -> List[PdfPage]:
+        return [p for p in self.pages if p.image_bytes]
+
+    def stitch_pages(self, transcripts: Dict[int, str]) -> str:
+        """Rebuild document text in page order, with vision transcripts in place of scans."""
+        parts = [
+            transcripts.get(p.number, "") if p.image_bytes else p.text
+            for p in self.pages
+        ]
+        return "\n".join(part for part in parts if part and part.strip()).strip()
+
+
+def _open_source(content: DocumentSource) -> Union[io.BytesIO, str]:
+    """File-like object or path string, whichever the parser libraries can open."""
+    return io.BytesIO(content) if isinstance(content, bytes) else str(content)
+
+
+def _read_source(content: DocumentSource) -> bytes:
+    return content if isinstance(content, bytes) else content.read_bytes()
 
 
-def parse_document(filename: str, content: bytes) -> ParsedDocument:
+def parse_document(filename: str, content: DocumentSource) -> ParsedDocument:
     ext = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
     if ext == "pdf":
         return _parse_pdf(filename, ext, content)
@@ -60,21 +95,61 @@ def parse_document(filename: str, content: bytes) -> ParsedDocument:
         )
 
 
-def _parse_pdf(filename: str, ext: str, content: bytes) -> ParsedDocument:
+def _extract_pages(
+    pages: Iterable[Any],
+    extract: Callable[[Any], Optional[str]],
+    budget: int = PDF_EXTRACT_CHARS,
+) -> Tuple[str, int]:
+    """
+    Extract page text in order, stopping once ``budget`` characters are in hand.
+    Returns ``(text, pages_parsed)`` — later pages are never touched.
+    """
+    text_parts: List[str] = []
+    chars = 0
+    pages_parsed = 0
+    for page in pages:
+        t = extract(page)
+        pages_parsed += 1
+        if t and t.strip():
+            text_parts.append(t)
+            chars += len(t)
+            if chars >= budget:
+                break
+    return "\n".join(text_parts).strip(), pages_parsed
+
+
+def _parse_pdf(filename: str, ext: str, content: DocumentSource) -> ParsedDocument:
     import pdfplumber
     try:
-        text_parts: List[str] = []
-        page_count = 0
-        with pdfplumber.open(io.BytesIO(content)) as pdf:
+        scanned: List[int] = []
+
+        def _page_text(page: Any) -> Optional[str]:
+            try:
+                t = page.extract_text() or ""
+                if len(t.strip()) < MIN_PAGE_TEXT_CHARS and page.images:
+                    scanned.append(page.page_number)
+                return t
+            finally:
+                page.close()   # drop the page's cached layout objects as we go
+
+        with pdfplumber.open(_open_source(content)) as pdf:
             page_count = len(pdf.pages)
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t:
-                    text_parts.append(t)
-        text = "\n".join(text_parts).strip()
+            text, pages_parsed = _extract_pages(pdf.pages, _page_text)
+        if scanned:
+            # Mixed typed/scanned document — PyMuPDF routes each page and renders the scans
+            logger.info(
+                "pdf_scanned_pages filename=%s pages=%s — routing per page via pymupdf", filename, scanned,
+            )
+            return _parse_pdf_pymupdf(filename, ext, content)
         if text:
-            logger.info("pdf_parse filename=%s pages=%d chars=%d", filename, page_count, len(text))
-            return ParsedDocument(filename=filename, extension=ext, text=text)
+            logger.info(
+                "pdf_parse filename=%s pages=%d/%d chars=%d",
+                filename, pages_parsed, page_count, len(text),
+            )
+            return ParsedDocument(
+                filename=filename, extension=ext, text=text,
+                metadata={"parser": "pdfplumber", "pages_parsed": pages_parsed, "pages_total": page_count},
+            )
         # Text layer empty — try PyMuPDF (handles more encoding types and design-tool PDFs)
         logger.info("pdf_pdfplumber_empty filename=%s pages=%d — falling back to pymupdf", filename, page_count)
         return _parse_pdf_pymupdf(filename, ext, content)
@@ -83,84 +158,314 @@ def _parse_pdf(filename: str, ext: str, content: bytes) -> ParsedDocument:
         return ParsedDocument(filename=filename, extension=ext, parse_error=str(e))
 
 
-def _parse_pdf_pymupdf(filename: str, ext: str, content: bytes) -> ParsedDocument:
+def _parse_pdf_pymupdf(filename: str, ext: str, content: DocumentSource) -> ParsedDocument:
     """
-    Fallback PDF parser using PyMuPDF.
-    1. Tries text extraction (handles design-tool and non-standard encodings).
-    2. If still empty, renders the first page to PNG and routes through the vision pipeline.
+    Per-page PDF parser using PyMuPDF (handles design-tool and non-standard encodings).
+    Each page is routed on its own: pages with a text layer are extracted,
+    scanned pages (little text, embedded images) are rendered to PNG for the
+    vision pipeline, up to ``settings.vision_max_pages``. The runner transcribes those
+    and stitches everything back in page order. Extraction stops at
+    PDF_EXTRACT_CHARS like the pdfplumber path. A document with neither text
+    nor embedded images gets its first page rendered.
     """
     import fitz  # PyMuPDF
     try:
-        doc = fitz.open(stream=content, filetype="pdf")
-        text_parts: List[str] = []
-        for page in doc:
-            t = page.get_text()
-            if t.strip():
-                text_parts.append(t)
-        text = "\n".join(text_parts).strip()
-        if text:
-            logger.info("pdf_pymupdf filename=%s pages=%d chars=%d", filename, len(doc), len(text))
-            return ParsedDocument(filename=filename, extension=ext, text=text)
-        # Truly image-based PDF — render first page to PNG for vision model
-        logger.info("pdf_pymupdf_empty filename=%s — rendering page 1 to image for vision", filename)
-        page = doc[0]
-        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x scale for legibility
-        image_bytes = pix.tobytes("png")
-        return ParsedDocument(
-            filename=filename, extension=ext,
-            image_bytes=image_bytes, image_media_type="image/png",
-        )
+        if isinstance(content, bytes):
+            doc = fitz.open(stream=content, filetype="pdf")
+        else:
+            doc = fitz.open(content, filetype="pdf")
+        with doc:
+            pages: List[PdfPage] = []
+            chars = 0
+            pages_parsed = 0
+            skipped_scans = 0
+            for page in doc:
+                if chars >= PDF_EXTRACT_CHARS:
+                    break
+                pages_parsed += 1
+                t = page.get_text()
+                if len(t.strip()) >= MIN_PAGE_TEXT_CHARS or not page.get_images():
+                    if t.strip():
+                        pages.append(PdfPage(number=page.number + 1, text=t))
+                        chars += len(t)
+                    continue
+                if sum(1 for p in pages if p.image_bytes) >= settings.vision_max_pages:
+                    skipped_scans += 1
+                    continue
+                pages.append(_render_page(page, filename))
+
+            if not pages and len(doc):
+                # Truly image-based PDF without embedded images (e.g. outlined text)
+                logger.info("pdf_pymupdf_empty filename=%s — rendering page 1 to image for vision", filename)
+                pages.append(_render_page(doc[0], filename))
+
+            text = "\n".join(p.text for p in pages if p.text).strip()
+            rendered = sum(1 for p in pages if p.image_bytes)
+            metadata = {
+                "parser": "pymupdf", "pages_parsed": pages_parsed, "pages_total": len(doc),
+                "text_pages": len(pages) - rendered, "rendered_pages": rendered,
+            }
+            if skipped_scans:
+                metadata["scanned_pages_skipped"] = skipped_scans
+            logger.info(
+                "pdf_pymupdf filename=%s pages=%d/%d text_pages=%d rendered_pages=%d chars=%d",
+                filename, pages_parsed, len(doc), len(pages) - rendered, rendered, len(text),
+            )
+            return ParsedDocument(
+                filename=filename, extension=ext, text=text,
+                pages=pages if rendered else [], metadata=metadata,
+            )
     except Exception as e:
         logger.error("pdf_pymupdf_failed filename=%s error=%s", filename, e)
         return ParsedDocument(filename=filename, extension=ext, parse_error=str(e))
 
 
-def _parse_docx(filename: str, ext: str, content: bytes) -> ParsedDocument:
-    from docx import Document
+def _render_page(page: Any, filename: str) -> PdfPage:
+    import fitz  # PyMuPDF
+    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x scale for legibility
+    prepared = prepare_image(pix.tobytes("png"), "image/png", label=f"{filename}#p{page.number + 1}")
+    return PdfPage(
+        number=page.number + 1, image_bytes=prepared.data, image_media_type=prepared.media_type,
+    )
+
+
+def _table_rows(table: List[List[str]]) -> List[Dict[str, Any]]:
+    """Word table → row dicts keyed by its first row, the shape CSV rows have."""
+    from api.app.parsers.workbook import column_names
+
+    header = column_names([cell.strip() or None for cell in table[0]])
+    width = len(header)
+    return [dict(zip(header, (row + [""] * width)[:width])) for row in table[1:]]
+
+
+def _parse_docx(filename: str, ext: str, content: DocumentSource) -> ParsedDocument:
+    from api.app.parsers.docx_stream import extract_docx
     try:
-        doc = Document(io.BytesIO(content))
-        text = "\n".join(p.text for p in doc.paragraphs if p.text.strip())
-        logger.info("docx_parse filename=%s chars=%d", filename, len(text))
-        return ParsedDocument(filename=filename, extension=ext, text=text)
+        extracted = extract_docx(_open_source(content), budget=PDF_EXTRACT_CHARS)
+        # The biggest table is the one a scorecard or interview template lives in
+        table = max((t for t in extracted.tables if len(t) > 1), key=len, default=None)
+        rows: List[Dict[str, Any]] = []
+        stats = None
+        if table is not None:
+            from api.app.analytics.scorecard_stats import compute_scorecard_stats_from_rows
+            table_rows = _table_rows(table)
+            try:
+                stats = compute_scorecard_stats_from_rows(table_rows)
+            except Exception as e:
+                logger.warning("tabular_stats_failed table=%s error=%s", filename, e)
+            if stats and "error" not in stats:
+                rows = table_rows
+            else:
+                stats = None   # no rating columns: the table stays text-only
+        logger.info(
+            "docx_parse filename=%s chars=%d tables=%d rows=%d truncated=%s",
+            filename, len(extracted.text), len(extracted.tables), len(rows), extracted.truncated,
+        )
+        return ParsedDocument(
+            filename=filename, extension=ext, text=extracted.text,
+            rows=rows[:TABLE_SAMPLE_ROWS], row_count=len(rows), scorecard_stats=stats,
+            metadata={"parser": "docx_stream", "tables": len(extracted.tables), "truncated": extracted.truncated},
+        )
     except Exception as e:
         logger.error("docx_parse_failed filename=%s error=%s", filename, e)
         return ParsedDocument(filename=filename, extension=ext, parse_error=str(e))
 
 
-def _parse_txt(filename: str, ext: str, content: bytes) -> ParsedDocument:
+def _parse_txt(filename: str, ext: str, content: DocumentSource) -> ParsedDocument:
     try:
-        text = content.decode("utf-8", errors="replace")
+        text = _read_source(content).decode("utf-8", errors="replace")
         logger.info("txt_parse filename=%s chars=%d", filename, len(text))
         return ParsedDocument(filename=filename, extension=ext, text=text)
     except Exception as e:
         return ParsedDocument(filename=filename, extension=ext, parse_error=str(e))
 
 
-def _parse_image(filename: str, ext: str, content: bytes) -> ParsedDocument:
-    """Store raw image bytes for vision LLM transcription in analyze_runner."""
-    media_type = _MEDIA_TYPES.get(ext, "image/jpeg")
-    logger.info("image_parse filename=%s media_type=%s bytes=%d", filename, media_type, len(content))
+def _parse_image(filename: str, ext: str, content: DocumentSource) -> ParsedDocument:
+    """Shrink the image and store it for vision LLM transcription in analyze_runner."""
+    prepared = prepare_image(_read_source(content), _MEDIA_TYPES.get(ext, "image/jpeg"), label=filename)
+    logger.info(
+        "image_parse filename=%s media_type=%s bytes=%d", filename, prepared.media_type, len(prepared.data),
+    )
     return ParsedDocument(
         filename=filename, extension=ext,
-        image_bytes=content, image_media_type=media_type,
+        image_bytes=prepared.data, image_media_type=prepared.media_type,
+        metadata=prepared.metadata,
     )
 
 
-def _parse_tabular(filename: str, ext: str, content: bytes) -> ParsedDocument:
+def _parse_tabular(filename: str, ext: str, content: DocumentSource) -> ParsedDocument:
+    if ext == "csv":
+        return _parse_csv(filename, ext, content)
+    return _parse_workbook(filename, ext, content)
+
+
+def _rss_mb() -> Optional[float]:
+    """
+    Current RSS of this (parse worker) process in MB, from VmRSS; None where
+    /proc is unavailable. ``ru_maxrss`` would be the process-lifetime peak, so
+    a long-lived worker would report the same figure for every sheet.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+@dataclass
+class _TableDigest:
+    """One table (a CSV, or one sheet) after streaming: head sample, size and scorecard stats."""
+    sample: Any                    # first TABLE_SAMPLE_ROWS rows as a DataFrame
+    row_count: int
+    chunks: int
+    stats: Optional[Dict[str, Any]]
+
+    def text(self, budget: Optional[int] = None) -> str:
+        """The sample rendered as a table, cut to ``budget`` chars at a row boundary."""
+        rendered = self.sample.to_string(index=False)
+        shown = len(self.sample)
+        if budget is not None and len(rendered) > budget:
+            cut = rendered.rfind("\n", 0, budget)
+            rendered = rendered[:cut] if cut > 0 else rendered[:budget]
+            shown = rendered.count("\n")
+        if self.row_count > shown:
+            rendered += f"\n[... {self.row_count - shown:,} more rows ...]"
+        return rendered
+
+
+def _digest_table(
+    label: str, chunks: Iterable[Any], reread: Callable[[], Iterable[Any]],
+) -> Optional[_TableDigest]:
+    """
+    Consume a table chunk by chunk: scorecard stats are aggregated as it
+    goes and only the first TABLE_SAMPLE_ROWS rows are kept, so memory stays
+    flat however long the table is. Rarely, exact stats need ``reread()``.
+    None if the table has no header at all.
+    """
     import pandas as pd
+
+    from api.app.analytics.scorecard_stats import ScorecardAccumulator
+
+    accumulator: Optional[ScorecardAccumulator] = ScorecardAccumulator()
+    head: List[Any] = []
+    sampled = row_count = n_chunks = 0
+    for chunk in chunks:
+        n_chunks += 1
+        row_count += len(chunk)
+        if sampled < TABLE_SAMPLE_ROWS or not head:
+            head.append(chunk.head(TABLE_SAMPLE_ROWS - sampled))
+            sampled += len(head[-1])
+        if accumulator is not None:
+            try:
+                accumulator.add(chunk)
+            except Exception as e:
+                logger.warning("tabular_stats_failed table=%s error=%s", label, e)
+                accumulator = None
+    if not head:
+        return None
+
+    stats = None
+    if accumulator is not None:
+        try:
+            stats = accumulator.result(reread=reread)
+        except Exception as e:
+            logger.warning("tabular_stats_failed table=%s error=%s", label, e)
+    sample = pd.concat(head) if len(head) > 1 else head[0]
+    return _TableDigest(sample=sample, row_count=row_count, chunks=n_chunks, stats=stats)
+
+
+def _csv_chunks(content: DocumentSource) -> Iterator[Any]:
+    import pandas as pd
+    with pd.read_csv(_open_source(content), chunksize=settings.table_chunk_rows) as reader:
+        yield from reader
+
+
+def _parse_csv(filename: str, ext: str, content: DocumentSource) -> ParsedDocument:
     try:
-        if ext == "csv":
-            df = pd.read_csv(io.BytesIO(content))
-        else:
-            df = pd.read_excel(io.BytesIO(content))
-        rows = df.fillna("").to_dict(orient="records")
-        text = df.to_string(index=False)
+        digest = _digest_table(filename, _csv_chunks(content), lambda: _csv_chunks(content))
         logger.info(
-            "tabular_parse filename=%s rows=%d cols=%d", filename, len(rows), len(df.columns)
+            "tabular_parse filename=%s rows=%d cols=%d chunks=%d",
+            filename, digest.row_count, len(digest.sample.columns), digest.chunks,
         )
         return ParsedDocument(
             filename=filename, extension=ext,
-            text=text, rows=rows, row_count=len(rows),
+            text=digest.text(), rows=digest.sample.fillna("").to_dict(orient="records"),
+            row_count=digest.row_count, scorecard_stats=digest.stats,
+        )
+    except Exception as e:
+        logger.error("tabular_parse_failed filename=%s error=%s", filename, e)
+        return ParsedDocument(filename=filename, extension=ext, parse_error=str(e))
+
+
+def _parse_workbook(filename: str, ext: str, content: DocumentSource) -> ParsedDocument:
+    """
+    Every sheet of the workbook, streamed through the read-only reader (see
+    parsers/workbook.py) and digested separately. A workbook with several
+    scorecard sheets gets ``{"sheets": {name: stats}}``; with one, that
+    sheet's stats as for a CSV. Per-sheet rows, time and the RSS change
+    while digesting the sheet go into ``metadata["sheets"]``.
+    """
+    from api.app.parsers.workbook import Workbook
+    try:
+        digests: List[Tuple[str, _TableDigest]] = []
+        sheets: List[Dict[str, Any]] = []
+        chunk_rows = settings.table_chunk_rows
+        with Workbook(content, ext) as book:
+            for name in book.sheet_names:
+                t0 = time.perf_counter()
+                rss_before = _rss_mb()
+                digest = _digest_table(
+                    f"{filename}:{name}", book.chunks(name, chunk_rows),
+                    lambda name=name: book.chunks(name, chunk_rows),
+                )
+                summary = {
+                    "sheet": name,
+                    "rows": digest.row_count if digest else 0,
+                    "cols": len(digest.sample.columns) if digest else 0,
+                    "ms": int((time.perf_counter() - t0) * 1000),
+                }
+                rss_after = _rss_mb()
+                summary["rss_delta_mb"] = (
+                    round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None
+                )
+                sheets.append(summary)
+                logger.info(
+                    "xlsx_sheet filename=%s sheet=%s rows=%d cols=%d ms=%d rss_delta_mb=%s",
+                    filename, name, summary["rows"], summary["cols"], summary["ms"], summary["rss_delta_mb"],
+                )
+                if digest is not None:
+                    digests.append((name, digest))
+            engine = book.engine
+
+        scorecards = {name: d.stats for name, d in digests if d.stats and "error" not in d.stats}
+        if len(scorecards) > 1:
+            stats: Optional[Dict[str, Any]] = {"sheets": scorecards}
+        elif scorecards:
+            stats = next(iter(scorecards.values()))
+        else:
+            stats = digests[0][1].stats if digests else None
+
+        if len(digests) == 1:
+            text = digests[0][1].text()
+        else:
+            budget = MAX_TEXT_CHARS // max(len(digests), 1)
+            text = "\n\n".join(
+                f"Sheet: {name} ({d.row_count:,} rows)\n{d.text(budget)}" for name, d in digests
+            )
+        primary = next((d for name, d in digests if name in scorecards), digests[0][1] if digests else None)
+        row_count = sum(d.row_count for _, d in digests)
+        logger.info(
+            "tabular_parse filename=%s engine=%s sheets=%d rows=%d",
+            filename, engine, len(sheets), row_count,
+        )
+        return ParsedDocument(
+            filename=filename, extension=ext, text=text,
+            rows=primary.sample.fillna("").to_dict(orient="records") if primary is not None else [],
+            row_count=row_count, scorecard_stats=stats,
+            metadata={"engine": engine, "sheets": sheets},
         )
     except Exception as e:
         logger.error("tabular_parse_failed filename=%s error=%s", filename, e)
@@ -0,0 +1,103 @@
+# api/app/parsers/docx_stream.py
+from __future__ import annotations
+
+import logging
+import zipfile
+from dataclasses import dataclass, field
+from typing import IO, Any, List, Optional, Union
+from xml.etree.ElementTree import iterparse
+
+logger = logging.getLogger(__name__)
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P, _T, _TAB, _BR, _CR = f"{_W}p", f"{_W}t", f"{_W}tab", f"{_W}br", f"{_W}cr"
+_TBL, _TR, _TC = f"{_W}tbl", f"{_W}tr", f"{_W}tc"
+_BLOCK_DEPTH = 3   # w:document > w:body > paragraph/table
+
+
+@dataclass
+class DocxContent:
+    text: str = ""
+    tables: List[List[List[str]]] = field(default_factory=list)   # table → rows → cell text
+    truncated: bool = False                                        # stopped at the text budget
+
+
+def extract_docx(source: Union[str, IO[bytes]], budget: Optional[int] = None) -> DocxContent:
+    """
+    Stream ``word/document.xml`` with iterparse instead of building the
+    python-docx object model. Body paragraphs and tables come out in
+    document order; table rows are rendered as ``cell | cell`` lines in the
+    text and also returned cell by cell. Each finished block is dropped from
+    the tree, so memory stays flat on large files.
+
+    With ``budget``, extraction stops after the block that takes the text
+    past that many characters — a table already started is finished first.
+    """
+    out = DocxContent()
+    blocks: List[str] = []
+    chars = 0
+    depth = 0
+    body: Any = None
+    paragraphs: List[List[str]] = []     # open paragraphs; text-box paragraphs nest inside runs
+    table_depth = 0                      # nested tables fold into the outer table's cell
+    rows: List[List[str]] = []
+    row: List[str] = []
+    cell: List[str] = []
+
+    with zipfile.ZipFile(source) as archive, archive.open("word/document.xml") as xml:
+        for event, elem in iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                depth += 1
+                if depth == _BLOCK_DEPTH - 1:
+                    body = elem
+                if tag == _P:
+                    paragraphs.append([])
+                elif tag == _TBL:
+                    table_depth += 1
+                    if table_depth == 1:
+                        rows = []
+                elif table_depth == 1 and tag == _TR:
+                    row = []
+                elif table_depth == 1 and tag == _TC:
+                    cell = []
+                continue
+
+            depth -= 1
+            if tag == _T and paragraphs:
+                paragraphs[-1].append(elem.text or "")
+            elif tag == _TAB and paragraphs:
+                paragraphs[-1].append("\t")
+            elif tag in (_BR, _CR) and paragraphs:
+                paragraphs[-1].append("\n")
+            elif tag == _P:
+                text = "".join(paragraphs.pop())
+                if paragraphs:
+                    paragraphs[-1].append(text)
+                elif table_depth:
+                    cell.append(text)
+                elif text.strip():
+                    blocks.append(text)
+                    chars += len(text) + 1
+            elif tag == _TC and table_depth == 1:
+                row.append("\n".join(cell))
+            elif tag == _TR and table_depth == 1:
+                rows.append(row)
+            elif tag == _TBL:
+                table_depth -= 1
+                if table_depth == 0:
+                    out.tables.append(rows)
+                    lines = [" | ".join(" ".join(c.split()) for c in r) for r in rows]
+                    rendered = "\n".join(line for line in lines if line.strip(" |"))
+                    if rendered:
+                        blocks.append(rendered)
+                        chars += len(rendered) + 1
+
+            if depth == _BLOCK_DEPTH - 1 and body is not None:
+                body.clear()   # the finished paragraph/table is in blocks/tables now
+                if budget is not None and chars >= budget:
+                    out.truncated = True
+                    break
+
+    out.text = "\n".join(blocks).strip()
+    return out
@@ -0,0 +1,115 @@
+# api/app/parsers/image_preprocess.py
+from __future__ import annotations
+
+import io
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+import numpy as np
+
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_GRAYSCALE_SPREAD = 12    # max per-pixel channel spread (0-255) still treated as colourless
+_SAMPLE_EDGE = 256        # thumbnail edge used for the grayscale check
+
+_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    media_type: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def _is_effectively_grayscale(image: Any) -> bool:
+    """True when dropping colour loses nothing a transcriber would need."""
+    sample = image.convert("RGB")
+    sample.thumbnail((_SAMPLE_EDGE, _SAMPLE_EDGE))
+    pixels = np.asarray(sample, dtype=np.int16)
+    spread = pixels.max(axis=2) - pixels.min(axis=2)
+    return float(np.percentile(spread, 99)) <= _GRAYSCALE_SPREAD
+
+
+def prepare_image(data: bytes, media_type: str, label: str = "") -> PreparedImage:
+    """
+    Shrink an image before it is base64-encoded for the vision model.
+
+    Applies EXIF orientation, then downscales to ``image_max_long_edge``,
+    converts to grayscale when the image has no meaningful colour, and
+    re-encodes as ``image_output_format`` at ``image_quality``. Re-encoding
+    drops EXIF. If the result is no smaller and there was no EXIF to strip, or
+    the image can't be decoded, the original bytes are returned unchanged.
+    """
+    if not settings.image_preprocess_enabled:
+        return PreparedImage(data=data, media_type=media_type)
+
+    from PIL import Image, ImageOps
+
+    t0 = time.perf_counter()
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            had_exif = bool(original.getexif())
+            size_in = original.size
+            image = ImageOps.exif_transpose(original)
+
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                # flatten onto white so transparent screenshots don't turn black
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel("A"))
+
+            long_edge = max(image.size)
+            if long_edge > settings.image_max_long_edge:
+                scale = settings.image_max_long_edge / long_edge
+                image = image.resize(
+                    (max(int(image.width * scale), 1), max(int(image.height * scale), 1)),
+                    Image.Resampling.LANCZOS,
+                )
+
+            grayscale = _is_effectively_grayscale(image)
+            image = image.convert("L" if grayscale else "RGB")
+
+            pil_format, out_media_type = _FORMATS.get(settings.image_output_format, _FORMATS["jpeg"])
+            buffer = io.BytesIO()
+            image.save(buffer, format=pil_format, quality=settings.image_quality, optimize=True)
+            out = buffer.getvalue()
+    except Exception as exc:
+        logger.warning("image_preprocess label=%s failed=%s — sending original", label, exc)
+        return PreparedImage(data=data, media_type=media_type, metadata={"preprocess": "failed"})
+
+    elapsed_ms = int((time.perf_counter() - t0) * 1000)
+    if len(out) >= len(data) and not had_exif:
+        logger.info(
+            "image_preprocess label=%s bytes_in=%d bytes_out=%d kept=original ms=%d",
+            label, len(data), len(out), elapsed_ms,
+        )
+        return PreparedImage(
+            data=data, media_type=media_type,
+            metadata={"preprocess": "skipped", "bytes_in": len(data), "bytes_out": len(data)},
+        )
+
+    logger.info(
+        "image_preprocess label=%s bytes_in=%d bytes_out=%d size_in=%dx%d size_out=%dx%d "
+        "grayscale=%s format=%s ms=%d",
+        label, len(data), len(out), *size_in, *image.size, grayscale, pil_format.lower(), elapsed_ms,
+    )
+    return PreparedImage(
+        data=out,
+        media_type=out_media_type,
+        metadata={
+            "preprocess": "applied",
+            "bytes_in": len(data),
+            "bytes_out": len(out),
+            "size_out": f"{image.width}x{image.height}",
+            "grayscale": grayscale,
+            "exif_stripped": had_exif,
+        },
+    )
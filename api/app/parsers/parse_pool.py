@@ -0,0 +1,204 @@
+# api/app/parsers/parse_pool.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from api.app.parsers.document_parser import DocumentSource, ParsedDocument, parse_document
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Pools torn down on purpose; jobs still on them break through no fault of their own
+_recycled: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+# Submissions per parse, whatever broke the pools in between
+_MAX_ATTEMPTS = 3
+
+_stats: Dict[str, Any] = {
+    "submitted": 0,
+    "in_flight": 0,
+    "timeouts": 0,
+    "crashes": 0,
+    "total_queue_ms": 0,
+    "max_queue_ms": 0,
+    "last_queue_ms": 0,
+}
+
+
+def _timed_parse(filename: str, content: DocumentSource, submitted_at: float) -> Tuple[ParsedDocument, float, int]:
+    """Worker entry point: parse and report when the job actually started."""
+    started_at = time.time()
+    t0 = time.perf_counter()
+    parsed = parse_document(filename, content)
+    return parsed, started_at, int((time.perf_counter() - t0) * 1000)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent holds an event loop, threads and open sockets
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.parse_pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("parse_pool started workers=%d", settings.parse_pool_size)
+        return _pool
+
+
+def _kill_workers(pool: ProcessPoolExecutor) -> int:
+    """Shut ``pool`` down without waiting and terminate its workers; returns how many there were."""
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    return len(processes)
+
+
+def _recycle_pool(reason: str, pool: ProcessPoolExecutor, deliberate: bool = True) -> None:
+    """
+    Drop ``pool`` and kill its workers. A parse that overran its timeout
+    would otherwise keep a worker busy indefinitely. Does nothing once
+    ``pool`` is no longer current, so a fresh pool another request already
+    resubmitted to is never killed. ``deliberate`` marks the pool in
+    ``_recycled``; a pool that broke on its own is not marked.
+    """
+    global _pool
+    with _pool_lock:
+        if pool is not _pool:
+            return
+        _pool = None
+        if deliberate:
+            _recycled.add(pool)
+    logger.warning("parse_pool recycled reason=%s workers_killed=%d", reason, _kill_workers(pool))
+
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def parse_pool_stats() -> Dict[str, Any]:
+    """Pool size, in-flight parses and queue-time metrics, for /health."""
+    submitted = _stats["submitted"]
+    return {
+        "workers": settings.parse_pool_size,
+        "in_flight": _stats["in_flight"],
+        "submitted": submitted,
+        "timeouts": _stats["timeouts"],
+        "crashes": _stats["crashes"],
+        "avg_queue_ms": int(_stats["total_queue_ms"] / submitted) if submitted else 0,
+        "max_queue_ms": _stats["max_queue_ms"],
+        "last_queue_ms": _stats["last_queue_ms"],
+    }
+
+
+async def parse_document_async(
+    filename: str, content: DocumentSource,
+) -> Tuple[ParsedDocument, Dict[str, Any]]:
+    """
+    Parse off the event loop and return ``(parsed, metrics)``.
+
+    With ``parse_pool_size > 0`` the parse runs in a bounded process pool;
+    ``queue_ms`` is the time the job waited for a free worker. With 0 it runs
+    in a thread instead. A parse exceeding ``parse_timeout_seconds`` (or a
+    crashed worker) comes back as a ParsedDocument with ``parse_error`` set.
+    When a worker dies, the file is rerun once in a worker of its own, and
+    only a crash there is blamed on it.
+    Pass a spooled upload's Path rather than its bytes so only the path is
+    pickled to the worker, which opens the file itself.
+    """
+    ext = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+    t0 = time.perf_counter()
+
+    if settings.parse_pool_size <= 0:
+        try:
+            parsed = await asyncio.wait_for(
+                asyncio.to_thread(parse_document, filename, content), settings.parse_timeout_seconds,
+            )
+        except TimeoutError:
+            _stats["timeouts"] += 1
+            parsed = ParsedDocument(
+                filename=filename, extension=ext,
+                parse_error=f"Parsing timed out after {settings.parse_timeout_seconds:g}s",
+            )
+        parse_ms = int((time.perf_counter() - t0) * 1000)
+        return parsed, {"executor": "thread", "queue_ms": 0, "parse_ms": parse_ms}
+
+    _stats["submitted"] += 1
+    _stats["in_flight"] += 1
+    isolated: Optional[ProcessPoolExecutor] = None
+    try:
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            submitted_at = time.time()
+            pool = isolated or _get_pool()
+            future = pool.submit(_timed_parse, filename, content, submitted_at)
+            try:
+                parsed, started_at, parse_ms = await asyncio.wait_for(
+                    asyncio.wrap_future(future), settings.parse_timeout_seconds,
+                )
+                break
+            except BrokenProcessPool as exc:
+                if pool is isolated:
+                    # Alone in its own worker and it still died: this file is the cause
+                    _stats["crashes"] += 1
+                    logger.error("parse_pool worker_crashed filename=%s error=%s", filename, exc)
+                    return ParsedDocument(
+                        filename=filename, extension=ext, parse_error="Parser worker crashed on this file",
+                    ), {"executor": "process", "queue_ms": None,
+                        "parse_ms": int((time.perf_counter() - t0) * 1000)}
+                if pool not in _recycled:
+                    # A worker died: this file, or another one sharing the pool.
+                    # Rerun it in a worker of its own to tell apart.
+                    _recycle_pool("broken", pool, deliberate=False)
+                    isolated = ProcessPoolExecutor(
+                        max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                    )
+                # else another request's timeout recycled the pool under this job
+                logger.warning("parse_pool resubmit filename=%s attempt=%d", filename, attempt)
+        else:
+            logger.error("parse_pool gave_up filename=%s attempts=%d", filename, _MAX_ATTEMPTS)
+            return ParsedDocument(
+                filename=filename, extension=ext,
+                parse_error=f"Parser pool was restarted {_MAX_ATTEMPTS} times while parsing this file",
+            ), {"executor": "process", "queue_ms": None, "parse_ms": int((time.perf_counter() - t0) * 1000)}
+    except TimeoutError:
+        _stats["timeouts"] += 1
+        # Timing out cancels a job still waiting for a worker; only a job that
+        # is actually running needs its worker killed.
+        if pool is isolated:
+            _kill_workers(pool)
+        elif not future.cancelled():
+            _recycle_pool("timeout", pool)
+        elapsed_ms = int((time.perf_counter() - t0) * 1000)
+        logger.error(
+            "parse_pool timeout filename=%s queued=%s ms=%d", filename, future.cancelled(), elapsed_ms,
+        )
+        return ParsedDocument(
+            filename=filename, extension=ext,
+            parse_error=f"Parsing timed out after {settings.parse_timeout_seconds:g}s",
+        ), {"executor": "process", "queue_ms": None, "parse_ms": elapsed_ms}
+    finally:
+        _stats["in_flight"] -= 1
+        if isolated is not None:
+            isolated.shutdown(wait=False)
+
+    queue_ms = max(int((started_at - submitted_at) * 1000), 0)
+    _stats["total_queue_ms"] += queue_ms
+    _stats["max_queue_ms"] = max(_stats["max_queue_ms"], queue_ms)
+    _stats["last_queue_ms"] = queue_ms
+    logger.info("parse_pool filename=%s queue_ms=%d parse_ms=%d", filename, queue_ms, parse_ms)
+    return parsed, {"executor": "process", "queue_ms": queue_ms, "parse_ms": parse_ms}
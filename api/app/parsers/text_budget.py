@@ -0,0 +1,237 @@
+# api/app/parsers/text_budget.py
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4            # the same rough estimate the rate governor charges prompts at
+_MIN_PARTIAL_CHARS = 200       # don't bother keeping a shorter prefix of a section
+_MIN_SHARE_CHARS = 120         # smallest per-section share when sampling for classification
+_FILL_WEIGHT = 0.3             # sections below this only fill space left over at the end
+_HEAD_SHARE = 2 / 3            # unstructured text: keep this much from the start, the rest from the end
+_TRUNCATED = "\n[... truncated ...]"
+
+# Heading keywords → section kind; the first match wins
+_HEADING_KINDS = (
+    (("experience", "employment", "work history", "career history", "positions held"), "experience"),
+    (("skill", "technolog", "tech stack", "tools", "competenc", "expertise"), "skills"),
+    (("education", "academic", "degree", "qualification"), "education"),
+    (("certif", "licen"), "certifications"),
+    (("project",), "projects"),
+    (("achievement", "accomplishment", "award", "honor", "honour", "publication"), "achievements"),
+    (("summary", "profile", "objective", "about me", "overview", "introduction"), "summary"),
+    (("recommendation", "decision", "verdict", "conclusion", "next step", "overall", "final"), "recommendation"),
+    (("strength", "positive", "highlight"), "strengths"),
+    (("concern", "weakness", "red flag", "risk", "improvement", "development area"), "concerns"),
+    (("feedback", "assessment", "evaluation", "rating", "goals"), "assessment"),
+    (("question",), "qa"),
+    (("language",), "languages"),
+    (("volunteer", "community"), "volunteer"),
+    (("interest", "hobbies", "hobby", "activities"), "interests"),
+    (("reference",), "references"),
+)
+
+# Relevance of each section kind per doc type; "preamble" is the text before
+# the first heading (a resume's name and contact line, a letter's salutation)
+_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "resume": {
+        "preamble": 1.0, "experience": 1.0, "skills": 0.9, "summary": 0.8, "projects": 0.6,
+        "education": 0.55, "certifications": 0.5, "achievements": 0.5, "languages": 0.3,
+        "volunteer": 0.25, "interests": 0.1, "references": 0.05,
+    },
+    "interview_notes": {
+        "recommendation": 1.0, "summary": 0.95, "preamble": 0.9, "concerns": 0.9, "strengths": 0.85,
+        "assessment": 0.85, "qa": 0.5,
+    },
+    "perf_review": {
+        "preamble": 0.9, "summary": 0.9, "assessment": 0.9, "recommendation": 0.9, "concerns": 0.85,
+        "achievements": 0.85, "strengths": 0.8,
+    },
+    "job_desc": {
+        "preamble": 1.0, "summary": 0.9, "skills": 1.0, "experience": 0.8, "qa": 0.3, "education": 0.5,
+    },
+    "cover_letter": {"preamble": 1.0},
+}
+_DEFAULT_WEIGHT = 0.4
+
+_QA_LINE = re.compile(r"^(?:Q\s*\d*|Question\s*\d*)\s*[:.)\-]", re.IGNORECASE)
+_BULLET = re.compile(r"^(?:[-*•·▪◦]|\d+[.)])\s")
+_DECORATION = re.compile(r"^[#*=_\-\s]+|[*=_\-\s:]+$")
+
+
+@dataclass
+class Section:
+    kind: str       # "preamble", a kind from _HEADING_KINDS, or "other" for an unrecognised heading
+    title: str      # the heading as written; "" for the preamble
+    text: str       # heading line(s) and body
+    index: int      # position in the document
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _heading_kind(line: str) -> Optional[str]:
+    """The section kind a line opens, or None if it is not a heading."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 60:
+        return None
+    if _QA_LINE.match(stripped):
+        return "qa"
+    if _BULLET.match(stripped):
+        return None
+    title = _DECORATION.sub("", stripped)
+    if not title or len(title.split()) > 6 or title[-1] in ".,;!?":
+        return None
+    lower = title.lower()
+    if len(title.split()) <= 4:
+        for keywords, kind in _HEADING_KINDS:
+            if any(keyword in lower for keyword in keywords):
+                return kind
+    shouted = title.isupper() and any(c.isalpha() for c in title)
+    if shouted or stripped.startswith("#") or stripped.endswith(":"):
+        return "other"
+    return None
+
+
+def split_sections(text: str) -> List[Section]:
+    """
+    Split text at heading lines — known resume / notes headings, short ALL
+    CAPS or colon-terminated lines, markdown headings — and at each Q/A block.
+    Text before the first heading is the ``preamble`` section.
+    """
+    sections: List[Section] = []
+    kind, title, lines = "preamble", "", []
+    for line in text.splitlines():
+        opens = _heading_kind(line)
+        if opens is not None:
+            if any(line.strip() for line in lines):
+                sections.append(Section(kind, title, "\n".join(lines).strip("\n"), len(sections)))
+            kind, title, lines = opens, line.strip(), []
+        lines.append(line)
+    if any(line.strip() for line in lines):
+        sections.append(Section(kind, title, "\n".join(lines).strip("\n"), len(sections)))
+    return sections
+
+
+def _prefix(text: str, chars: int) -> str:
+    """``text`` cut to ``chars`` at a line boundary where one is near, marked as truncated."""
+    if chars <= len(_TRUNCATED):
+        return text[:chars]
+    limit = chars - len(_TRUNCATED)
+    cut = text.rfind("\n", 0, limit)
+    return (text[:cut] if cut > limit // 2 else text[:limit]).rstrip() + _TRUNCATED
+
+
+def _head_and_tail(text: str, chars: int) -> str:
+    """No structure to select from: keep the opening and the conclusion, drop the middle."""
+    marker = "\n[... {:,} characters omitted ...]\n"
+    room = chars - len(marker.format(len(text)))
+    if room <= 0:
+        return text[:chars]
+    head = text[:int(room * _HEAD_SHARE)]
+    cut = head.rfind("\n")
+    head = head[:cut] if cut > len(head) // 2 else head
+    tail = text[len(text) - (room - len(head)):]
+    cut = tail.find("\n")
+    tail = tail[cut + 1:] if 0 <= cut < len(tail) // 2 else tail
+    return head.rstrip() + marker.format(len(text) - len(head) - len(tail)) + tail.lstrip()
+
+
+def _choose(sections: List[Section], chars: int, doc_type: Optional[str]) -> Dict[int, int]:
+    """
+    Characters to keep per section index. With a doc type, sections are
+    taken whole in order of relevance; whatever is left goes to prefixes of
+    the relevant sections that did not fit; low-relevance sections only fill
+    the remainder. Without one (classification), sections sampled evenly
+    across the document split the budget, so the sample spans all of it.
+    """
+    keep: Dict[int, int] = {}
+    if doc_type is None:
+        # Too many sections for a useful share each: sample them evenly, first and last included
+        n, k = len(sections), max(chars // _MIN_SHARE_CHARS, 1)
+        sampled = sections if n <= k else [sections[0]] if k == 1 else [
+            sections[round(i * (n - 1) / (k - 1))] for i in range(k)
+        ]
+        left = len(sampled)
+        for section in sorted(sampled, key=lambda s: len(s.text)):
+            share = chars // left
+            keep[section.index] = min(len(section.text), share)
+            chars -= keep[section.index]
+            left -= 1
+        return keep
+
+    weights = _WEIGHTS.get(doc_type, {})
+    ranked = sorted(sections, key=lambda s: (-weights.get(s.kind, _DEFAULT_WEIGHT), s.index))
+    relevant = [s for s in ranked if weights.get(s.kind, _DEFAULT_WEIGHT) >= _FILL_WEIGHT]
+    filler = [s for s in ranked if weights.get(s.kind, _DEFAULT_WEIGHT) < _FILL_WEIGHT]
+    for section in relevant:
+        if len(section.text) <= chars:
+            keep[section.index] = len(section.text)
+            chars -= len(section.text)
+    for section in relevant:
+        if section.index not in keep and chars >= _MIN_PARTIAL_CHARS:
+            keep[section.index] = chars
+            chars = 0
+    for section in filler:
+        if len(section.text) <= chars:
+            keep[section.index] = len(section.text)
+            chars -= len(section.text)
+    return keep
+
+
+def _render(sections: List[Section], keep: Dict[int, int]) -> str:
+    """Kept sections in document order, with a marker for each run of dropped ones."""
+    parts: List[str] = []
+    omitted = 0
+    for section in sections:
+        kept = keep.get(section.index, 0)
+        if not kept:
+            omitted += 1
+            continue
+        if omitted:
+            parts.append(f"[... {omitted} section(s) omitted ...]")
+            omitted = 0
+        parts.append(section.text if kept >= len(section.text) else _prefix(section.text, kept))
+    if omitted:
+        parts.append(f"[... {omitted} section(s) omitted ...]")
+    return "\n\n".join(parts)
+
+
+def fit_text(text: str, max_tokens: int, doc_type: Optional[str] = None) -> str:
+    """
+    ``text`` reduced to about ``max_tokens`` for an LLM prompt. Text that
+    fits is returned unchanged. Otherwise the text is split into sections
+    and the most relevant ones for ``doc_type`` are kept, in document order,
+    with a marker where sections were dropped or cut. Text with no
+    recognisable sections keeps its opening and its ending.
+    """
+    chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= chars:
+        return text
+    sections = split_sections(text)
+    if len(sections) < 2:
+        return _head_and_tail(text, chars)
+
+    # Markers and separators take room too: shrink the section budget by any overshoot
+    room = chars
+    for _ in range(3):
+        fitted = _render(sections, _choose(sections, room, doc_type))
+        if len(fitted) <= chars:
+            break
+        room -= len(fitted) - chars
+
+    logger.debug(
+        "text_budget doc_type=%s tokens=%d budget=%d sections=%d fitted_tokens=%d",
+        doc_type, estimate_tokens(text), max_tokens, len(sections), estimate_tokens(fitted),
+    )
+    if len(fitted) > chars:
+        # Still over: cut at a line boundary with room kept for the marker, so
+        # no marker line is split; too small a budget gets a plain head slice
+        cut = fitted.rfind("\n", 0, chars - len(_TRUNCATED)) if chars > len(_TRUNCATED) else -1
+        fitted = fitted[:cut].rstrip() + _TRUNCATED if cut > 0 else text[:chars]
+    return fitted
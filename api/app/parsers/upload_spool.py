@@ -0,0 +1,69 @@
+# api/app/parsers/upload_spool.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(ValueError):
+    """The upload grew past ``max_upload_bytes`` while being spooled."""
+
+
+@dataclass
+class SpooledUpload:
+    filename: str
+    path: Path
+    size: int
+    sha256: str
+
+    def read_bytes(self) -> bytes:
+        return self.path.read_bytes()
+
+    def cleanup(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+async def spool_upload(upload: Any, filename: str, max_bytes: int) -> SpooledUpload:
+    """
+    Copy an upload (anything with ``async read(n)``, e.g. UploadFile) to a
+    temp file in ``upload_chunk_bytes`` chunks, hashing as it goes. At most
+    one chunk is held in memory. Raises UploadTooLarge as soon as more than
+    ``max_bytes`` have been read; the partial file is removed.
+
+    The caller owns the returned file and must ``cleanup()`` it.
+    """
+    suffix = Path(filename).suffix.lower()
+    fd, name = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=settings.upload_spool_dir or None)
+    path = Path(name)
+    digest = hashlib.sha256()
+    size = 0
+    t0 = time.perf_counter()
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            while chunk := await upload.read(settings.upload_chunk_bytes):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes:,} byte limit.")
+                digest.update(chunk)
+                await asyncio.to_thread(fh.write, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    spooled = SpooledUpload(filename=filename, path=path, size=size, sha256=digest.hexdigest())
+    logger.info(
+        "upload_spooled filename=%s bytes=%d sha256=%s ms=%d",
+        filename, size, spooled.sha256[:12], int((time.perf_counter() - t0) * 1000),
+    )
+    return spooled
@@ -0,0 +1,148 @@
+# api/app/parsers/workbook.py
+from __future__ import annotations
+
+import io
+import logging
+import math
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Union
+
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Strings pd.read_excel turns into NaN by default
+_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+_MISSING = math.nan   # one shared object, so blank cells can be tested with ``is``
+
+
+def workbook_engine(ext: str) -> str:
+    """
+    ``calamine`` (python-calamine, if installed) or ``openpyxl`` in read-only
+    mode for .xlsx, per XLSX_ENGINE. Legacy .xls needs calamine; without it
+    pd.read_excel is used as before.
+    """
+    preferred = settings.xlsx_engine
+    if preferred in ("auto", "calamine"):
+        try:
+            import python_calamine  # noqa: F401
+            return "calamine"
+        except ImportError:
+            if preferred == "calamine":
+                logger.warning("workbook calamine_missing — falling back to openpyxl")
+    return "openpyxl" if ext == "xlsx" else "pandas"
+
+
+def _cell(value: Any) -> Any:
+    """A cell as pd.read_excel would see it: blanks and NA strings → NaN, integral floats → int."""
+    if value is None:
+        return _MISSING
+    kind = type(value)
+    if kind is str:
+        return _MISSING if value in _NA_STRINGS else value
+    if kind is float and value.is_integer():
+        return int(value)
+    return value
+
+
+def column_names(values: Sequence[Any]) -> List[str]:
+    """
+    Column names as pd.read_excel makes them: blanks (``_MISSING`` or None)
+    → "Unnamed: i", repeats → "name.1".
+    """
+    names: List[str] = []
+    seen: dict = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is _MISSING or value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _framed(rows: Iterable[Sequence[Any]], chunk_rows: int) -> Iterator[Any]:
+    """
+    Raw sheet rows → DataFrame chunks of ``chunk_rows``. The first non-blank
+    row is the header; blank rows inside the data are kept (read_excel keeps
+    them too) but trailing ones are dropped.
+    """
+    import pandas as pd
+
+    header: Optional[List[str]] = None
+    blanks = 0
+    yielded = False
+    buffer: List[List[Any]] = []
+    for raw in rows:
+        cells = [_cell(v) for v in raw]
+        if header is None:
+            while cells and cells[-1] is _MISSING:
+                cells.pop()
+            if cells:
+                header = column_names(cells)
+            continue
+        if all(v is _MISSING for v in cells):
+            blanks += 1
+            continue
+        width = len(header)
+        cells = (cells + [_MISSING] * width)[:width]
+        buffer.extend([[_MISSING] * width] * blanks)
+        blanks = 0
+        buffer.append(cells)
+        if len(buffer) >= chunk_rows:
+            yield pd.DataFrame.from_records(buffer, columns=header)
+            buffer, yielded = [], True
+    if header is not None and (buffer or not yielded):
+        yield pd.DataFrame.from_records(buffer, columns=header)
+
+
+class Workbook:
+    """
+    Every sheet of an XLSX/XLS upload, streamed as DataFrame chunks. Sheets
+    can be read more than once (scorecard stats sometimes need a second,
+    exact pass). Use as a context manager.
+    """
+
+    def __init__(self, content: Union[bytes, Path], ext: str) -> None:
+        self.engine = workbook_engine(ext)
+        self._book: Any = None
+        if self.engine == "calamine":
+            from python_calamine import CalamineWorkbook
+            self._book = (
+                CalamineWorkbook.from_path(str(content)) if isinstance(content, Path)
+                else CalamineWorkbook.from_filelike(io.BytesIO(content))
+            )
+            self.sheet_names: List[str] = list(self._book.sheet_names)
+        elif self.engine == "openpyxl":
+            from openpyxl import load_workbook
+            source = str(content) if isinstance(content, Path) else io.BytesIO(content)
+            self._book = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+            self.sheet_names = list(self._book.sheetnames)
+        else:
+            import pandas as pd
+            self._book = pd.ExcelFile(str(content) if isinstance(content, Path) else io.BytesIO(content))
+            self.sheet_names = [str(name) for name in self._book.sheet_names]
+
+    def chunks(self, sheet: str, chunk_rows: int) -> Iterator[Any]:
+        if self.engine == "calamine":
+            yield from _framed(self._book.get_sheet_by_name(sheet).iter_rows(), chunk_rows)
+        elif self.engine == "openpyxl":
+            yield from _framed(self._book[sheet].iter_rows(values_only=True), chunk_rows)
+        else:
+            # No streaming reader for this format: the sheet is one chunk
+            yield self._book.parse(sheet)
+
+    def close(self) -> None:
+        if self._book is not None:
+            self._book.close()
+            self._book = None
+
+    def __enter__(self) -> "Workbook":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
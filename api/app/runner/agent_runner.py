@@ -10,9 +10,10 @@ async def run_agent(
     message: str,
     request_id: str,
     metadata: Optional[Dict[str, Any]] = None,
+    deadline: Optional[float] = None,
 ) -> Dict[str, Any]:
     """
     Orchestrates the agent run. Today: simple graph stub.
     Later: LangGraph compile + invoke.
     """
-    return await run_graph(message=message, request_id=request_id, metadata=metadata)
+    return await run_graph(message=message, request_id=request_id, metadata=metadata, deadline=deadline)
@@ -0,0 +1,151 @@
+# runner/analysis_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from api.app.clients.inference_client import llm_cache_path
+from api.app.clients.response_cache import ResponseCache, fingerprint
+from api.app.graph.nodes import (
+    analyze_cover_letter,
+    analyze_interview,
+    analyze_resume,
+    analyze_scorecard,
+    classify_and_analyze,
+    classify_document,
+)
+from api.app.graph.nodes.classify_document import filename_precheck
+from api.app.parsers.document_parser import DocumentSource, ParsedDocument
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when parser output changes (PARSE) or when graph output changes in code
+# (ANALYSIS); old entries then simply stop matching and age out. Prompt edits
+# need no bump: every system prompt the graph sends is part of the key.
+PARSE_CACHE_VERSION = 1
+ANALYSIS_CACHE_VERSION = 2
+
+_HASH_BLOCK_BYTES = 1_048_576
+
+# Both share the LLM cache database, each in its own table
+_parse_cache = ResponseCache(
+    table="parse_cache",
+    max_entries=settings.parse_cache_max_entries,
+    ttl_seconds=settings.analysis_cache_ttl_seconds,
+    max_persisted=settings.analysis_cache_max_persisted,
+)
+_analysis_cache = ResponseCache(
+    table="analysis_cache",
+    max_entries=settings.analysis_cache_max_entries,
+    ttl_seconds=settings.analysis_cache_ttl_seconds,
+    max_persisted=settings.analysis_cache_max_persisted,
+)
+
+
+def content_sha256(content: DocumentSource) -> str:
+    """sha256 of the upload bytes, read in blocks when the upload is spooled to disk."""
+    if isinstance(content, bytes):
+        return hashlib.sha256(content).hexdigest()
+    digest = hashlib.sha256()
+    with Path(content).open("rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extension(filename: str) -> str:
+    return filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+
+
+def _prompts_sha256() -> str:
+    """sha256 over every system prompt the analyze graph can send."""
+    return hashlib.sha256("\0".join((
+        classify_document._CLASSIFY_SYSTEM_PROMPT,
+        classify_and_analyze._FUSED_SYSTEM_PROMPT,
+        analyze_resume._ANALYZE_RESUME_SYSTEM,
+        analyze_cover_letter._SYSTEM_PROMPT,
+        analyze_interview._ANALYZE_INTERVIEW_SYSTEM,
+        analyze_scorecard._ANALYZE_SCORECARD_SYSTEM,
+    )).encode()).hexdigest()
+
+
+def parse_cache_key(sha256: str, filename: str) -> str:
+    """Parsed text depends on the bytes, the parser picked by extension, and the vision model for scans."""
+    return fingerprint("parse", PARSE_CACHE_VERSION, sha256, _extension(filename), settings.groq_vision_model)
+
+
+def analysis_cache_key(sha256: str, filename: str, context: str) -> str:
+    """
+    Everything the analyze graph's output depends on besides the parsed
+    document: prompts, models, and the settings that steer classification
+    and routing. The filename only matters through the classifier's filename
+    pre-check — unless fused mode puts the name itself into the prompt.
+    """
+    name = filename if settings.analyze_fused_mode else filename_precheck(filename)
+    return fingerprint(
+        "analysis", ANALYSIS_CACHE_VERSION, _prompts_sha256(), sha256, _extension(filename), name, context,
+        settings.groq_model, settings.groq_vision_model, settings.analyze_fused_mode,
+        settings.fused_min_confidence, settings.local_classifier_enabled, settings.local_classifier_threshold,
+        settings.classify_text_tokens, settings.analyze_text_tokens,
+    )
+
+
+async def get_parsed(key: str, filename: str) -> Tuple[Optional[ParsedDocument], str]:
+    """``(parsed, tier)`` — the prepared document (vision transcripts stitched in), or None on a miss."""
+    if not settings.analysis_cache_enabled:
+        return None, "off"
+    _parse_cache.db_path = llm_cache_path()
+    cached, tier = await _parse_cache.get(key)
+    if cached is None:
+        return None, tier
+    entry = json.loads(cached)
+    return ParsedDocument(
+        filename=filename, extension=_extension(filename), text=entry["text"],
+        rows=entry["rows"], row_count=entry["row_count"],
+        scorecard_stats=entry["scorecard_stats"], metadata=entry["metadata"],
+    ), tier
+
+
+async def put_parsed(key: str, parsed: ParsedDocument) -> None:
+    """Store a document after parsing and transcription; page images are not kept."""
+    if not settings.analysis_cache_enabled:
+        return
+    entry = {
+        "text": parsed.text, "rows": parsed.rows, "row_count": parsed.row_count,
+        "scorecard_stats": parsed.scorecard_stats, "metadata": parsed.metadata,
+    }
+    _parse_cache.db_path = llm_cache_path()
+    await _parse_cache.set(key, json.dumps(entry, default=str))
+
+
+async def get_analysis(key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """``(result, tier)`` — a stored analyze result without its request_id/filename/actions, or None."""
+    if not settings.analysis_cache_enabled:
+        return None, "off"
+    _analysis_cache.db_path = llm_cache_path()
+    cached, tier = await _analysis_cache.get(key)
+    return (json.loads(cached) if cached is not None else None), tier
+
+
+async def put_analysis(key: str, result: Dict[str, Any]) -> None:
+    """
+    Store a finished analyze result. Results with warnings (a failed LLM call,
+    a fallback classification) are not cached, so a transient failure is
+    never replayed.
+    """
+    if not settings.analysis_cache_enabled or result.get("warnings"):
+        return
+    entry = {k: v for k, v in result.items() if k not in ("request_id", "filename", "actions_taken")}
+    entry["source_request_id"] = result.get("request_id")
+    _analysis_cache.db_path = llm_cache_path()
+    await _analysis_cache.set(key, json.dumps(entry, default=str))
+
+
+def clear_memory() -> None:
+    """Drop both in-memory tiers (tests; the SQLite tier is left alone)."""
+    _parse_cache.clear_memory()
+    _analysis_cache.clear_memory()
@@ -1,14 +1,18 @@
 # runner/analyze_runner.py
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from api.app.parsers.document_parser import parse_document
-from api.app.clients.inference_client import run_vision_inference
-from api.app.graph.analyze_graph import run_analyze_graph
+from api.app.parsers.document_parser import DocumentSource, ParsedDocument, PdfPage
+from api.app.parsers.parse_pool import parse_document_async
+from api.app.clients.inference_client import run_vision_inference_result
+from api.app.graph.analyze_graph import run_analyze_graph, stream_analyze_graph
+from api.app.runner import analysis_cache
 from api.app.schemas.agent import ToolAction
+from api.app.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -20,83 +24,330 @@ _TRANSCRIBE_PROMPT = (
 )
 
 
+_CACHE_HITS = {"memory", "sqlite"}
+
+
+def _check_transcript(raw: str) -> str:
+    """Reject an empty transcription so it is reported as a failure, not cached."""
+    if not raw.strip():
+        raise ValueError("Vision model returned no text")
+    return raw
+
+
+def _failure(request_id: str, filename: str, actions: list, warning: str) -> Dict[str, Any]:
+    return {
+        "request_id": request_id,
+        "filename": filename,
+        "doc_type": "unknown",
+        "doc_type_confidence": 0.0,
+        "key_fields": {},
+        "analysis": {},
+        "summary": "",
+        "actions_taken": actions,
+        "warnings": [warning],
+    }
+
+
+async def _transcribe_scanned_pages(
+    parsed: ParsedDocument,
+    deadline: Optional[float] = None,
+    use_cache: bool = True,
+) -> Tuple[List[ToolAction], Optional[str]]:
+    """
+    Transcribe a PDF's scanned pages concurrently — at most
+    ``vision_concurrency`` calls in flight — and stitch the transcripts back
+    into ``parsed.text`` in page order. Pages that fail are left out.
+
+    Returns one ``vision_page`` action per page, a ``vision_transcribe``
+    summary action, and an error if every page failed with no typed text.
+    """
+    scans = parsed.scanned_pages
+    semaphore = asyncio.Semaphore(max(settings.vision_concurrency, 1))
+
+    async def _page(page: PdfPage) -> ToolAction:
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                result = await run_vision_inference_result(
+                    prompt=_TRANSCRIBE_PROMPT, image_bytes=page.image_bytes,
+                    media_type=page.image_media_type, deadline=deadline,
+                    use_cache=use_cache, parse=_check_transcript,
+                )
+            except Exception as exc:
+                elapsed_ms = int((time.perf_counter() - t0) * 1000)
+                logger.warning("vision_page filename=%s page=%d failed=%s ms=%d",
+                               parsed.filename, page.number, exc, elapsed_ms)
+                return ToolAction(kind="llm", name="vision_page", ok=False, ms=elapsed_ms,
+                                  details={"page": page.number, "error": str(exc)})
+            elapsed_ms = int((time.perf_counter() - t0) * 1000)
+            transcripts[page.number] = result.content
+            return ToolAction(kind="llm", name="vision_page", ok=True, ms=elapsed_ms,
+                              details={"page": page.number, "chars": len(result.content),
+                                       "cache": result.cache})
+
+    transcripts: Dict[int, str] = {}
+    t0 = time.perf_counter()
+    page_actions = list(await asyncio.gather(*[_page(page) for page in scans]))
+    elapsed_ms = int((time.perf_counter() - t0) * 1000)
+
+    failed = {a.details["page"]: a.details["error"] for a in page_actions if not a.ok}
+    parsed.text = parsed.stitch_pages(transcripts)
+
+    logger.info(
+        "vision_transcribe_pages filename=%s pages=%d failed=%d concurrency=%d chars=%d ms=%d",
+        parsed.filename, len(scans), len(failed), settings.vision_concurrency, len(parsed.text), elapsed_ms,
+    )
+    summary = ToolAction(
+        kind="llm", name="vision_transcribe", ok=not failed, ms=elapsed_ms,
+        details={"pages": sorted(transcripts), "failed_pages": failed, "chars": len(parsed.text),
+                 "skipped_pages": parsed.metadata.get("scanned_pages_skipped", 0),
+                 "cached_pages": sum(1 for a in page_actions if a.details.get("cache") in _CACHE_HITS)},
+    )
+    actions = page_actions + [summary]
+    if failed and not parsed.text:
+        return actions, next(iter(failed.values()))
+    return actions, None
+
+
+async def _prepare(
+    filename: str,
+    content: DocumentSource,
+    request_id: str,
+    deadline: Optional[float] = None,
+    content_sha256: Optional[str] = None,
+    use_cache: bool = True,
+) -> Tuple[Optional[ParsedDocument], List[ToolAction], Optional[Dict[str, Any]]]:
+    """
+    Parse the upload off the event loop and, for images and scanned PDF pages,
+    transcribe via vision.
+
+    With ``content_sha256`` the prepared document is looked up in, and stored
+    to, the parse cache; ``use_cache=False`` skips the lookup but still
+    refreshes the entry.
+
+    Returns ``(parsed, actions, failure)``. When ``failure`` is set the
+    document cannot go through the graph and it is the final result.
+    """
+    key = analysis_cache.parse_cache_key(content_sha256, filename) if content_sha256 else None
+    if key and use_cache:
+        t0 = time.perf_counter()
+        parsed, tier = await analysis_cache.get_parsed(key, filename)
+        if parsed is not None:
+            elapsed_ms = int((time.perf_counter() - t0) * 1000)
+            logger.info("analyze_runner parse_cache_hit filename=%s tier=%s ms=%d", filename, tier, elapsed_ms)
+            return parsed, [ToolAction(
+                kind="tool", name="parse_document", ok=True, ms=elapsed_ms,
+                details={"sha256": content_sha256, "cache": tier, "cached": True, **parsed.metadata},
+            )], None
+
+    parsed, actions, failure = await _parse_and_transcribe(
+        filename, content, request_id, deadline, content_sha256, use_cache,
+    )
+    if key and failure is None and all(a.ok for a in actions):
+        await analysis_cache.put_parsed(key, parsed)
+    return parsed, actions, failure
+
+
+async def _parse_and_transcribe(
+    filename: str,
+    content: DocumentSource,
+    request_id: str,
+    deadline: Optional[float],
+    content_sha256: Optional[str],
+    use_cache: bool = True,
+) -> Tuple[Optional[ParsedDocument], List[ToolAction], Optional[Dict[str, Any]]]:
+    t0 = time.perf_counter()
+    parsed, metrics = await parse_document_async(filename, content)
+    if content_sha256:
+        metrics["sha256"] = content_sha256
+    parse_action = ToolAction(
+        kind="tool", name="parse_document", ok=not parsed.parse_error,
+        ms=int((time.perf_counter() - t0) * 1000), details={**metrics, **parsed.metadata},
+    )
+
+    if parsed.parse_error:
+        logger.error("analyze_runner parse_failed filename=%s error=%s", filename, parsed.parse_error)
+        return None, [parse_action], _failure(
+            request_id, filename, [parse_action], f"File could not be parsed: {parsed.parse_error}",
+        )
+
+    # Mixed/scanned PDF: transcribe only the image pages, keep the text layer elsewhere
+    if parsed.scanned_pages:
+        vision_actions, error = await _transcribe_scanned_pages(parsed, deadline, use_cache)
+        if error:
+            return None, [parse_action], _failure(
+                request_id, filename, [parse_action, *vision_actions],
+                f"Scanned page transcription failed: {error}",
+            )
+        return parsed, [parse_action, *vision_actions], None
+
+    # Image path: transcribe via vision LLM before passing to the graph
+    if not parsed.image_bytes:
+        return parsed, [parse_action], None
+
+    t0 = time.perf_counter()
+    try:
+        result = await run_vision_inference_result(
+            prompt=_TRANSCRIBE_PROMPT,
+            image_bytes=parsed.image_bytes,
+            media_type=parsed.image_media_type or "image/jpeg",
+            deadline=deadline,
+            use_cache=use_cache,
+            parse=_check_transcript,
+        )
+    except Exception as exc:
+        elapsed_ms = int((time.perf_counter() - t0) * 1000)
+        logger.error("vision_transcribe failed=%s ms=%d", exc, elapsed_ms)
+        return None, [parse_action], _failure(
+            request_id, filename,
+            [parse_action,
+             ToolAction(kind="llm", name="vision_transcribe", ok=False, ms=elapsed_ms,
+                        details={"error": str(exc)})],
+            f"Image transcription failed: {exc}",
+        )
+
+    elapsed_ms = int((time.perf_counter() - t0) * 1000)
+    parsed.text = result.content
+    logger.info(
+        "vision_transcribe filename=%s chars=%d cache=%s ms=%d ok=true",
+        filename, len(result.content), result.cache, elapsed_ms,
+    )
+    return parsed, [
+        parse_action,
+        ToolAction(kind="llm", name="vision_transcribe", ok=True, ms=elapsed_ms,
+                   details={"chars": len(result.content), "media_type": parsed.image_media_type,
+                            "cache": result.cache, "cached": result.cache in _CACHE_HITS})
+    ], None
+
+
+async def _analysis_key(
+    filename: str, content: DocumentSource, context: str, content_sha256: Optional[str],
+) -> Tuple[Optional[str], Optional[str]]:
+    """``(sha256, analysis cache key)``; no key while the cache is disabled."""
+    if not settings.analysis_cache_enabled:
+        return content_sha256, None
+    sha256 = content_sha256 or await asyncio.to_thread(analysis_cache.content_sha256, content)
+    return sha256, analysis_cache.analysis_cache_key(sha256, filename, context)
+
+
+async def _cached_result(key: str, request_id: str, filename: str, sha256: str) -> Optional[Dict[str, Any]]:
+    """A stored result re-issued under this request's id, with an ``analysis_cache`` action in place of the trail."""
+    t0 = time.perf_counter()
+    cached, tier = await analysis_cache.get_analysis(key)
+    if cached is None:
+        return None
+    elapsed_ms = int((time.perf_counter() - t0) * 1000)
+    source_request_id = cached.pop("source_request_id", None)
+    logger.info(
+        "analyze_runner analysis_cache_hit filename=%s tier=%s source_request_id=%s ms=%d",
+        filename, tier, source_request_id, elapsed_ms,
+    )
+    return {
+        **cached,
+        "request_id": request_id,
+        "filename": filename,
+        "actions_taken": [ToolAction(
+            kind="event", name="analysis_cache", ok=True, ms=elapsed_ms,
+            details={"cached": True, "cache": tier, "sha256": sha256, "source_request_id": source_request_id},
+        )],
+    }
+
+
 async def run_analyze(
     filename: str,
-    content: bytes,
+    content: DocumentSource,
     request_id: str,
     context: str = "",
+    deadline: Optional[float] = None,
+    content_sha256: Optional[str] = None,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
     """
     Parse an uploaded file and run it through the analyze graph.
     For image uploads (JPG, PNG, WEBP), uses Groq vision to transcribe
     before passing to the graph. Returns a dict mapping onto AnalyzeResponse.
-    """
-    parsed = parse_document(filename, content)
+    ``deadline`` (time.monotonic()) bounds every LLM call made along the way.
+    ``content`` may be the upload bytes or the Path of a spooled upload.
 
-    if parsed.parse_error:
-        logger.error("analyze_runner parse_failed filename=%s error=%s", filename, parsed.parse_error)
-        return {
-            "request_id": request_id,
-            "filename": filename,
-            "doc_type": "unknown",
-            "doc_type_confidence": 0.0,
-            "key_fields": {},
-            "analysis": {},
-            "summary": "",
-            "actions_taken": [],
-            "warnings": [f"File could not be parsed: {parsed.parse_error}"],
-        }
+    Identical uploads (same sha256, context and models) are answered from
+    the analysis cache; ``use_cache=False`` forces a fresh run, whose result
+    replaces the cached one.
+    """
+    sha256, key = await _analysis_key(filename, content, context, content_sha256)
+    if key and use_cache:
+        cached = await _cached_result(key, request_id, filename, sha256)
+        if cached is not None:
+            return cached
 
-    # Image path: transcribe via vision LLM before passing to the graph
-    vision_action: list = []
-    if parsed.image_bytes:
-        t0 = time.perf_counter()
-        try:
-            transcribed = await run_vision_inference(
-                prompt=_TRANSCRIBE_PROMPT,
-                image_bytes=parsed.image_bytes,
-                media_type=parsed.image_media_type or "image/jpeg",
-            )
-            elapsed_ms = int((time.perf_counter() - t0) * 1000)
-            parsed.text = transcribed
-            logger.info(
-                "vision_transcribe filename=%s chars=%d ms=%d ok=true",
-                filename, len(transcribed), elapsed_ms,
-            )
-            vision_action = [
-                ToolAction(kind="llm", name="vision_transcribe", ok=True, ms=elapsed_ms,
-                           details={"chars": len(transcribed), "media_type": parsed.image_media_type})
-            ]
-        except Exception as exc:
-            elapsed_ms = int((time.perf_counter() - t0) * 1000)
-            logger.error("vision_transcribe failed=%s ms=%d", exc, elapsed_ms)
-            return {
-                "request_id": request_id,
-                "filename": filename,
-                "doc_type": "unknown",
-                "doc_type_confidence": 0.0,
-                "key_fields": {},
-                "analysis": {},
-                "summary": "",
-                "actions_taken": [
-                    ToolAction(kind="llm", name="vision_transcribe", ok=False, ms=elapsed_ms,
-                               details={"error": str(exc)})
-                ],
-                "warnings": [f"Image transcription failed: {exc}"],
-            }
+    parsed, pre_actions, failure = await _prepare(filename, content, request_id, deadline, sha256, use_cache)
+    if failure:
+        return failure
 
     result = await run_analyze_graph(
         filename=parsed.filename,
         extension=parsed.extension,
-        text=parsed.truncated_text,
+        text=parsed.text or "",
         rows=parsed.rows,
         row_count=parsed.row_count,
+        scorecard_stats=parsed.scorecard_stats,
         request_id=request_id,
         context=context,
+        deadline=deadline,
+        use_cache=use_cache,
     )
+    if key and all(a.ok for a in pre_actions):
+        await analysis_cache.put_analysis(key, result)
 
-    # Prepend the vision transcription action so the caller can see it happened
-    if vision_action:
-        result["actions_taken"] = vision_action + result.get("actions_taken", [])
+    # Prepend the parse and vision transcription actions so the caller can see them
+    if pre_actions:
+        result["actions_taken"] = pre_actions + result.get("actions_taken", [])
 
     return result
+
+
+async def stream_analyze(
+    filename: str,
+    content: DocumentSource,
+    request_id: str,
+    context: str = "",
+    deadline: Optional[float] = None,
+    content_sha256: Optional[str] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of run_analyze. Yields ``parsed``, graph progress and
+    narrative ``token`` events, then a final ``result`` event. A cache hit
+    yields the ``result`` event alone.
+    """
+    sha256, key = await _analysis_key(filename, content, context, content_sha256)
+    if key and use_cache:
+        cached = await _cached_result(key, request_id, filename, sha256)
+        if cached is not None:
+            yield {"event": "result", "data": cached}
+            return
+
+    parsed, pre_actions, failure = await _prepare(filename, content, request_id, deadline, sha256, use_cache)
+    if failure:
+        yield {"event": "result", "data": failure}
+        return
+
+    yield {"event": "parsed", "chars": len(parsed.text or ""), "rows": parsed.row_count}
+
+    async for event in stream_analyze_graph(
+        filename=parsed.filename,
+        extension=parsed.extension,
+        text=parsed.text or "",
+        rows=parsed.rows,
+        row_count=parsed.row_count,
+        scorecard_stats=parsed.scorecard_stats,
+        request_id=request_id,
+        context=context,
+        deadline=deadline,
+        use_cache=use_cache,
+    ):
+        if event.get("event") == "result":
+            if key and all(a.ok for a in pre_actions):
+                await analysis_cache.put_analysis(key, event["data"])
+            if pre_actions:
+                event["data"]["actions_taken"] = pre_actions + event["data"].get("actions_taken", [])
+        yield event
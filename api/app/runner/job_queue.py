@@ -0,0 +1,98 @@
+# runner/job_queue.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from api.app.db.repository import claim_job, finish_job, requeue_unfinished_jobs
+from api.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Receives the claimed job row (including ``content``) and returns the
+# AnalyzeResponse dict to store as the job result.
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    Background analyze jobs: a bounded set of worker tasks fed from an
+    in-process queue of job ids. The jobs table is the source of truth — the
+    queue only carries ids, workers claim the row (queued → running) and load
+    the upload bytes from it, so anything still queued at shutdown is picked
+    up again by ``start`` on the next boot.
+    """
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue[str]] = None
+        self._workers: List[asyncio.Task] = []
+        self._handler: Optional[JobHandler] = None
+        self.running = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self, handler: JobHandler) -> None:
+        self._handler = handler
+        self._queue = asyncio.Queue()
+        pending = await requeue_unfinished_jobs(settings.job_max_attempts)
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        self._workers = [
+            asyncio.create_task(self._worker(n), name=f"analyze-job-worker-{n}")
+            for n in range(max(settings.job_workers, 1))
+        ]
+        logger.info("job_queue started workers=%d resumed=%d", len(self._workers), len(pending))
+
+    async def stop(self) -> None:
+        """Cancel workers. A job cut off mid-run stays 'running' and is requeued on next start."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, job_id: str) -> None:
+        if self._queue is None:
+            raise RuntimeError("job queue is not running")
+        self._queue.put_nowait(job_id)
+
+    async def _worker(self, n: int) -> None:
+        assert self._queue is not None and self._handler is not None
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = await claim_job(job_id)
+        if job is None:
+            return  # already claimed or finished
+        t0 = time.perf_counter()
+        self.running += 1
+        try:
+            result = await self._handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("job_failed job_id=%s error=%s", job_id, exc)
+            await finish_job(job_id, error=str(exc))
+        else:
+            await finish_job(job_id, result=result)
+            logger.info(
+                "job_done job_id=%s filename=%s ms=%d",
+                job_id, job["filename"], int((time.perf_counter() - t0) * 1000),
+            )
+        finally:
+            self.running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": len(self._workers), "queued": self.depth, "running": self.running}
+
+
+job_queue = JobQueue()
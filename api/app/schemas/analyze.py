@@ -24,11 +24,15 @@ class AnalyzeState(TypedDict):
     """Shared state passed through every node in the LangGraph analyze graph."""
     filename: str
     extension: str
-    text: str                              # extracted text (may be truncated)
-    rows: List[Dict[str, Any]]             # populated for CSV/XLSX only
+    text: str                              # extracted text; each node fits it to its token budget
+    rows: List[Dict[str, Any]]             # populated for CSV/XLSX only (first TABLE_SAMPLE_ROWS)
     row_count: int
+    scorecard_stats: Optional[Dict[str, Any]]  # computed from the full table at parse time
     request_id: str
     context: str                           # optional user-provided hint
+    stream_tokens: bool                    # analyzers stream narrative deltas via the graph writer
+    deadline: Optional[float]              # time.monotonic() request deadline; None = unbounded
+    use_cache: bool                        # False: LLM calls skip the response cache lookup
     doc_type: Optional[str]               # set by classify_document node
     doc_type_confidence: float
     key_fields: Dict[str, Any]            # extracted by classify_document
@@ -12,6 +12,7 @@ class GraphState(TypedDict):
     message: str
     request_id: str
     metadata: Dict[str, Any]
+    deadline: Optional[float]                      # time.monotonic() request deadline; None = unbounded
     target_date: Optional[str]
     intent: Optional[str]                          # "anomaly_check" | "general"
     analytics_result: Optional[Dict[str, Any]]
@@ -0,0 +1,29 @@
+# schemas/job.py
+from __future__ import annotations
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from api.app.schemas.analyze import AnalyzeResponse
+
+JobStatusName = Literal["queued", "running", "done", "failed"]
+
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: JobStatusName = "queued"
+    status_url: str
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: JobStatusName
+    filename: str
+    session_id: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    attempts: int = 0
+    result: Optional[AnalyzeResponse] = None   # set once status == "done"
+    error: Optional[str] = None                # set when status == "failed"
@@ -11,6 +11,96 @@ class Settings(BaseSettings):
     inference_timeout_seconds: int = 30
     vision_timeout_seconds: int = 60
 
+    # Document parsing — bounded process pool keeps parsers off the event loop
+    parse_pool_size: int = 2              # 0 = parse in a thread instead
+    parse_timeout_seconds: float = 30.0
+    table_chunk_rows: int = 100_000       # CSV/XLSX rows read and aggregated at a time
+    xlsx_engine: str = "auto"             # auto | calamine | openpyxl — auto uses python-calamine if installed
+
+    # Upload spooling — uploads are streamed to a temp file, never held whole in memory
+    max_upload_bytes: int = 25_000_000    # per file; larger uploads get 413
+    upload_chunk_bytes: int = 1_048_576
+    upload_spool_dir: str = ""            # default: system temp dir
+
+    # Image pre-processing before vision calls
+    image_preprocess_enabled: bool = True
+    image_max_long_edge: int = 2_048
+    image_output_format: str = "jpeg"     # jpeg | webp
+    image_quality: int = 80
+
+    # Vision transcription of scanned PDF pages
+    vision_concurrency: int = 4           # vision calls in flight per document
+    vision_max_pages: int = 10            # scanned pages rendered per PDF; the rest are skipped
+
+    # Async analyze jobs — POST /agent/analyze/jobs, poll GET /agent/analyze/jobs/{id}
+    job_workers: int = 2
+    job_queue_max: int = 100              # queued jobs before submissions get 503
+    job_max_attempts: int = 3             # restarts a job may be interrupted by
+    job_budget_seconds: float = 300.0     # deadline budget per job, counted from start
+
+    # Batch analyze — POST /agent/analyze/batch, results streamed as NDJSON
+    batch_concurrency: int = 4            # documents analyzed at once per batch
+    batch_max_files: int = 300
+    batch_max_bytes: int = 200_000_000    # total upload size, ZIP members uncompressed
+
+    # Request deadline budget — LLM timeouts and retries are clipped to what is left
+    analyze_budget_seconds: float = 45.0
+    agent_budget_seconds: float = 20.0
+    max_request_budget_seconds: float = 120.0   # cap for the X-Request-Budget-Ms header
+    deadline_min_attempt_seconds: float = 1.0   # don't start an LLM attempt with less left
+
+    # Groq rate governor — per-model requests/tokens per minute
+    rate_limit_enabled: bool = True
+    groq_rpm_limit: int = 30
+    groq_tpm_limit: int = 12_000
+    groq_vision_rpm_limit: int = 30
+    groq_vision_tpm_limit: int = 30_000
+
+    # Circuit breaker — fail fast to node fallbacks while Groq is down
+    circuit_breaker_enabled: bool = True
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+
+    # Shared HTTP connection pool (Groq + n8n)
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http2_enabled: bool = True
+
+    # LLM response cache — in-memory LRU plus optional SQLite tier
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 512
+    llm_cache_ttl_seconds: int = 86_400
+    llm_cache_persist: bool = True
+    llm_cache_db_path: str = ""           # default: llm_cache.db next to db_path
+    llm_cache_max_persisted: int = 10_000
+
+    # Vision transcription cache — same tiers as the LLM cache, own table
+    vision_cache_enabled: bool = True
+    vision_cache_max_entries: int = 256
+    vision_cache_ttl_seconds: int = 604_800
+    vision_cache_max_persisted: int = 5_000
+
+    # Analyze result cache — parsed documents and whole responses, keyed by upload sha256
+    analysis_cache_enabled: bool = True
+    analysis_cache_max_entries: int = 256
+    parse_cache_max_entries: int = 128
+    analysis_cache_ttl_seconds: int = 604_800
+    analysis_cache_max_persisted: int = 5_000   # per table
+
+    # LLM input budgets — document text is fitted section by section (parsers/text_budget.py)
+    classify_text_tokens: int = 750       # classify_document's LLM prompt
+    analyze_text_tokens: int = 3_000      # analyzers and fused classify+analyze
+
+    # Local document-type classifier — LLM consulted only below the threshold
+    local_classifier_enabled: bool = True
+    local_classifier_threshold: float = 0.85
+
+    # Analyze graph — fused single-call classify+analyze mode
+    analyze_fused_mode: bool = False
+    fused_min_confidence: float = 0.75
+    fused_max_tokens: int = 1_200
+
     # Application
     log_level: str = "INFO"
     debug: bool = False
@@ -0,0 +1,114 @@
+# benchmarks/bench_csv_stream.py
+"""
+CSV scorecard parsing: whole-file read vs chunked streaming, time and peak RSS.
+
+    python -m benchmarks.bench_csv_stream                  # 250k, 1M, 4M rows
+    python -m benchmarks.bench_csv_stream 8000000 --no-whole
+    python -m benchmarks.bench_csv_stream 1000000 4000000 --candidates 5000 --no-whole
+
+Writes synthetic panel exports (same shape as bench_scorecard_stats) to a
+temp directory, then parses each one in a fresh subprocess so the peak RSS
+is that run's own peak:
+
+- whole:   ``pd.read_csv`` + ``compute_scorecard_stats`` + ``df.to_string``
+           (the parser before streaming)
+- chunked: ``parse_document`` on the path, as the API does with a spooled upload
+
+and checks the two produce identical stats. The chunked parser's memory
+tracks the number of distinct candidates (rows/8 by default; fix it with
+``--candidates``), not the number of rows.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.memory import peak_rss_mb
+
+_BLOCK_ROWS = 250_000
+
+
+def write_panel_csv(path: Path, n_rows: int, n_candidates: Optional[int] = None, seed: int = 7) -> None:
+    """~8 evaluators per candidate, 200 evaluators, 1% blank and 0.1% "n/a" ratings; written block by block."""
+    rng = np.random.default_rng(seed)
+    n_candidates = n_candidates or max(n_rows // 8, 1)
+    with path.open("w", encoding="utf-8") as fh:
+        for start in range(0, n_rows, _BLOCK_ROWS):
+            size = min(_BLOCK_ROWS, n_rows - start)
+            frame = {
+                "candidate_name": [f"Candidate {i:07d}" for i in rng.integers(0, n_candidates, size)],
+                "evaluator": [f"Evaluator {i:03d}" for i in rng.integers(0, 200, size)],
+            }
+            for dim in ("technical", "communication", "problem_solving", "culture_fit"):
+                scores = np.round(rng.uniform(1, 5, size), 1).astype(object)
+                scores[rng.random(size) < 0.01] = np.nan
+                scores[rng.random(size) < 0.001] = "n/a"
+                if start == 0:
+                    scores[0] = 3.0   # keep the first row numeric so every dimension is detected as a rating
+                frame[dim] = scores
+            pd.DataFrame(frame).to_csv(fh, index=False, header=start == 0)
+
+
+def _child(mode: str, path: str) -> None:
+    t0 = time.perf_counter()
+    if mode == "whole":
+        from api.app.analytics.scorecard_stats import compute_scorecard_stats
+        df = pd.read_csv(path)
+        stats = compute_scorecard_stats(df)
+        df.to_string(index=False)
+    else:
+        from api.app.parsers.document_parser import parse_document
+        stats = parse_document(Path(path).name, Path(path)).scorecard_stats
+    seconds = time.perf_counter() - t0
+    peak_mb = peak_rss_mb()
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_mb, "stats": stats}))
+
+
+def _run(mode: str, path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_csv_stream", "--child", mode, str(path)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[250_000, 1_000_000, 4_000_000])
+    parser.add_argument("--candidates", type=int, help="distinct candidates (default: rows/8)")
+    parser.add_argument("--no-whole", action="store_true", help="time the chunked parser only")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(*args.child)
+        return
+
+    print(f"{'rows':>10} {'file_mb':>8} {'whole_s':>8} {'whole_mb':>9} {'chunked_s':>10} {'chunked_mb':>11}  identical")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            path = Path(tmp) / f"panel-{n_rows}.csv"
+            write_panel_csv(path, n_rows, args.candidates)
+            file_mb = path.stat().st_size / 1e6
+            chunked = _run("chunked", path)
+            if args.no_whole:
+                print(f"{n_rows:>10} {file_mb:>8.1f} {'-':>8} {'-':>9} "
+                      f"{chunked['seconds']:>10.2f} {chunked['peak_mb']:>11.0f}  -")
+            else:
+                whole = _run("whole", path)
+                identical = json.dumps(whole["stats"]) == json.dumps(chunked["stats"])
+                print(f"{n_rows:>10} {file_mb:>8.1f} {whole['seconds']:>8.2f} {whole['peak_mb']:>9.0f} "
+                      f"{chunked['seconds']:>10.2f} {chunked['peak_mb']:>11.0f}  {identical}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_docx_extract.py
+"""
+DOCX extraction: python-docx object model vs the streaming iterparse extractor.
+
+    python -m benchmarks.bench_docx_extract                # 1k, 10k, 50k paragraphs
+    python -m benchmarks.bench_docx_extract 100000 --table-rows 2000
+
+Builds interview-template style documents with python-docx (paragraphs of
+notes followed by a scorecard table) and extracts each in a fresh
+subprocess so the peak RSS is that run's own peak:
+
+- python-docx: ``Document(path)`` + ``doc.paragraphs`` (the parser before streaming)
+- stream:      ``extract_docx`` with no budget — the whole document, tables included
+- budgeted:    ``extract_docx`` with the parser's text budget, as ``_parse_docx`` runs it
+
+and checks the streamed text contains every paragraph python-docx returns.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from copy import deepcopy
+from pathlib import Path
+
+from benchmarks.memory import peak_rss_mb
+
+_NOTE = "Candidate walked through the design trade-offs clearly; follow up on testing strategy."
+
+
+def write_docx(path: Path, paragraphs: int, table_rows: int) -> None:
+    from docx import Document
+
+    doc = Document()
+    # doc.add_paragraph is O(n) per call; clone one paragraph's XML instead
+    template = doc.add_paragraph(_NOTE)._p
+    for i in range(paragraphs):
+        clone = deepcopy(template)
+        clone.xpath("./w:r/w:t")[0].text = f"{i}. {_NOTE}"
+        template.addprevious(clone)
+    template.getparent().remove(template)
+    table = doc.add_table(rows=table_rows + 1, cols=4)
+    for c, name in enumerate(("Candidate", "Interviewer", "Technical", "Communication")):
+        table.cell(0, c).text = name
+    for r in range(1, table_rows + 1):
+        for c, value in enumerate((f"Candidate {r % 50}", f"Interviewer {r % 7}", str(r % 5 + 1), str(r % 4 + 2))):
+            table.cell(r, c).text = value
+    doc.save(path)
+
+
+def _child(mode: str, path: str) -> None:
+    # Imports stay outside the timed region; peak RSS includes them for every mode alike
+    from docx import Document
+
+    from api.app.parsers.document_parser import PDF_EXTRACT_CHARS
+    from api.app.parsers.docx_stream import extract_docx
+
+    t0 = time.perf_counter()
+    if mode == "python-docx":
+        doc = Document(path)
+        text = "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+        tables = 0
+    else:
+        extracted = extract_docx(path, budget=PDF_EXTRACT_CHARS if mode == "budgeted" else None)
+        text, tables = extracted.text, len(extracted.tables)
+    seconds = time.perf_counter() - t0
+    peak_mb = peak_rss_mb()
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_mb, "chars": len(text), "tables": tables, "text": text}))
+
+
+def _run(mode: str, path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_docx_extract", "--child", mode, str(path)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[1_000, 10_000, 50_000], help="paragraphs")
+    parser.add_argument("--table-rows", type=int, default=500)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(*args.child)
+        return
+
+    print(f"{'paragraphs':>10} {'file_mb':>8} {'mode':>12} {'seconds':>8} {'peak_mb':>8} {'chars':>9} {'tables':>6}  complete")
+    with tempfile.TemporaryDirectory() as tmp:
+        for paragraphs in args.sizes:
+            path = Path(tmp) / f"notes-{paragraphs}.docx"
+            write_docx(path, paragraphs, args.table_rows)
+            file_mb = path.stat().st_size / 1e6
+            baseline = _run("python-docx", path)
+            for mode in ("python-docx", "stream", "budgeted"):
+                result = baseline if mode == "python-docx" else _run(mode, path)
+                complete = result["text"].startswith(baseline["text"]) if mode == "stream" else "-"
+                print(f"{paragraphs:>10} {file_mb:>8.2f} {mode:>12} {result['seconds']:>8.3f} "
+                      f"{result['peak_mb']:>8.0f} {result['chars']:>9} {result['tables']:>6}  {complete}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
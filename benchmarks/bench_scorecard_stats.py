@@ -0,0 +1,147 @@
+# benchmarks/bench_scorecard_stats.py
+"""
+Scorecard statistics: row-dict loop vs the vectorized DataFrame engine.
+
+    python -m benchmarks.bench_scorecard_stats            # 10k, 100k, 1M rows
+    python -m benchmarks.bench_scorecard_stats 5000000 --no-legacy
+
+Generates a synthetic panel export (candidate, evaluator, four 1–5 ratings
+with one decimal, some blanks and "n/a") read back through ``pd.read_csv``
+as the parser does, times both implementations — including the
+``df.fillna("").to_dict("records")`` step the row loop needs — and checks
+that the outputs are identical.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from api.app.analytics.scorecard_stats import compute_scorecard_stats
+
+
+def legacy_scorecard_stats(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The previous per-row implementation, kept verbatim as the reference."""
+    if not rows:
+        return {}
+    sample = rows[0]
+    id_cols: List[str] = []
+    rating_cols: List[str] = []
+    for col, val in sample.items():
+        try:
+            float(str(val).replace(",", ""))
+            rating_cols.append(col)
+        except (ValueError, TypeError):
+            id_cols.append(col)
+    if not rating_cols:
+        return {"error": "No numeric rating columns found in scorecard."}
+    candidate_col = next(
+        (c for c in id_cols if any(k in c.lower() for k in ("candidate", "name", "applicant"))),
+        id_cols[0] if id_cols else None,
+    )
+    evaluator_col = next(
+        (c for c in id_cols if any(k in c.lower() for k in ("evaluator", "interviewer", "reviewer", "rater"))),
+        id_cols[1] if len(id_cols) > 1 else None,
+    )
+
+    def safe_float(v: Any) -> float:
+        try:
+            return float(str(v).replace(",", ""))
+        except (ValueError, TypeError):
+            return 0.0
+
+    for row in rows:
+        row["_overall"] = sum(safe_float(row.get(c, 0)) for c in rating_cols) / len(rating_cols)
+    all_scores = [r["_overall"] for r in rows]
+    global_mean = statistics.mean(all_scores) if all_scores else 0
+    global_stdev = statistics.stdev(all_scores) if len(all_scores) > 1 else 0
+
+    candidate_stats: Dict[str, Any] = {}
+    if candidate_col:
+        candidates_grouped: Dict[str, List[float]] = {}
+        for row in rows:
+            candidates_grouped.setdefault(str(row.get(candidate_col, "unknown")), []).append(row["_overall"])
+        for cname, scores in candidates_grouped.items():
+            mean = statistics.mean(scores)
+            var = statistics.stdev(scores) if len(scores) > 1 else 0
+            candidate_stats[cname] = {
+                "mean": round(mean, 2), "stdev": round(var, 2),
+                "n_evaluators": len(scores), "high_variance": var > 1.0,
+            }
+
+    evaluator_stats: Dict[str, Any] = {}
+    if evaluator_col:
+        evaluators_grouped: Dict[str, List[float]] = {}
+        for row in rows:
+            evaluators_grouped.setdefault(str(row.get(evaluator_col, "unknown")), []).append(row["_overall"])
+        for ename, scores in evaluators_grouped.items():
+            mean = statistics.mean(scores)
+            deviation = mean - global_mean
+            evaluator_stats[ename] = {
+                "mean": round(mean, 2), "deviation_from_panel": round(deviation, 2),
+                "outlier": abs(deviation) > max(global_stdev * 1.5, 0.5), "n_ratings": len(scores),
+            }
+
+    return {
+        "rating_columns": rating_cols,
+        "candidate_column": candidate_col,
+        "evaluator_column": evaluator_col,
+        "global_mean": round(global_mean, 2),
+        "global_stdev": round(global_stdev, 2),
+        "n_rows": len(rows),
+        "candidate_stats": candidate_stats,
+        "evaluator_stats": evaluator_stats,
+    }
+
+
+def panel_export(n_rows: int, seed: int = 7) -> pd.DataFrame:
+    """~8 evaluators per candidate, 200 evaluators, 1% blank and 0.1% "n/a" ratings."""
+    rng = np.random.default_rng(seed)
+    n_candidates = max(n_rows // 8, 1)
+    frame = {
+        "candidate_name": [f"Candidate {i:07d}" for i in rng.integers(0, n_candidates, n_rows)],
+        "evaluator": [f"Evaluator {i:03d}" for i in rng.integers(0, 200, n_rows)],
+    }
+    for dim in ("technical", "communication", "problem_solving", "culture_fit"):
+        scores = np.round(rng.uniform(1, 5, n_rows), 1).astype(object)
+        scores[rng.random(n_rows) < 0.01] = np.nan
+        scores[rng.random(n_rows) < 0.001] = "n/a"
+        frame[dim] = scores
+    df = pd.DataFrame(frame)
+    df.iloc[0, 2:] = 3.0   # keep the first row numeric so every dimension is detected as a rating
+    # Round-trip through CSV so dtypes match what _parse_tabular hands over ("n/a" → NaN)
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)))
+
+
+def _time(fn, *args) -> tuple:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--no-legacy", action="store_true", help="time the vectorized engine only")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy_s':>10} {'vectorized_s':>13} {'speedup':>8}  identical")
+    for n_rows in args.sizes:
+        df = panel_export(n_rows)
+        new, new_s = _time(compute_scorecard_stats, df)
+        if args.no_legacy:
+            print(f"{n_rows:>10} {'-':>10} {new_s:>13.3f} {'-':>8}  -")
+            continue
+        old, old_s = _time(lambda: legacy_scorecard_stats(df.fillna("").to_dict(orient="records")))
+        identical = json.dumps(old) == json.dumps(new)
+        print(f"{n_rows:>10} {old_s:>10.3f} {new_s:>13.3f} {old_s / new_s:>7.1f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
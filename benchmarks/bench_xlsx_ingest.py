@@ -0,0 +1,116 @@
+# benchmarks/bench_xlsx_ingest.py
+"""
+XLSX parsing: pd.read_excel vs the streaming read-only engines, time and peak RSS.
+
+    python -m benchmarks.bench_xlsx_ingest                 # 3 sheets × 20k, 100k rows
+    python -m benchmarks.bench_xlsx_ingest 200000 --sheets 5
+
+Writes multi-tab evaluation workbooks (one panel export per sheet, same
+shape as bench_scorecard_stats) with openpyxl's write-only mode, then parses
+each in a fresh subprocess so the peak RSS is that run's own peak:
+
+- read_excel: ``pd.read_excel(sheet_name=None)`` + ``compute_scorecard_stats``
+              + ``df.to_string`` per sheet (the parser before streaming)
+- openpyxl:   ``parse_document`` with XLSX_ENGINE=openpyxl (read-only, chunked)
+- calamine:   ``parse_document`` with XLSX_ENGINE=calamine, if python-calamine is installed
+
+and checks every engine produces the same per-sheet stats.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.memory import peak_rss_mb
+
+_DIMENSIONS = ("technical", "communication", "problem_solving", "culture_fit")
+
+
+def write_workbook(path: Path, rows_per_sheet: int, sheets: int, seed: int = 7) -> None:
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"Round {s + 1}")
+        ws.append(["candidate_name", "evaluator", *_DIMENSIONS])
+        candidates = rng.integers(0, max(rows_per_sheet // 8, 1), rows_per_sheet)
+        evaluators = rng.integers(0, 200, rows_per_sheet)
+        scores = np.round(rng.uniform(1, 5, (rows_per_sheet, len(_DIMENSIONS))), 1)
+        blanks = rng.random((rows_per_sheet, len(_DIMENSIONS))) < 0.01
+        for i in range(rows_per_sheet):
+            ratings = [None if blank else float(v) for v, blank in zip(scores[i], blanks[i])]
+            if i == 0:
+                ratings = [3.0] * len(_DIMENSIONS)   # keep the first row numeric so every dimension is a rating
+            ws.append([f"Candidate {candidates[i]:07d}", f"Evaluator {evaluators[i]:03d}", *ratings])
+    wb.save(path)
+
+
+def _child(mode: str, path: str) -> None:
+    t0 = time.perf_counter()
+    if mode == "read_excel":
+        import pandas as pd
+
+        from api.app.analytics.scorecard_stats import compute_scorecard_stats
+        stats = {}
+        for name, df in pd.read_excel(path, sheet_name=None).items():
+            stats[name] = compute_scorecard_stats(df)
+            df.to_string(index=False)
+    else:
+        os.environ["XLSX_ENGINE"] = mode
+        from api.app.parsers.document_parser import parse_document
+        parsed = parse_document(Path(path).name, Path(path))
+        stats = parsed.scorecard_stats.get("sheets", parsed.scorecard_stats)
+    seconds = time.perf_counter() - t0
+    peak_mb = peak_rss_mb()
+    print(json.dumps({"seconds": seconds, "peak_mb": peak_mb, "stats": stats}))
+
+
+def _run(mode: str, path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_xlsx_ingest", "--child", mode, str(path)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[20_000, 100_000], help="rows per sheet")
+    parser.add_argument("--sheets", type=int, default=3)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(*args.child)
+        return
+
+    modes = ["read_excel", "openpyxl"]
+    if importlib.util.find_spec("python_calamine") is not None:
+        modes.append("calamine")
+    print(f"{'rows/sheet':>10} {'sheets':>6} {'file_mb':>8} {'engine':>11} {'seconds':>8} {'peak_mb':>8}  same_stats")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            path = Path(tmp) / f"panel-{rows}.xlsx"
+            write_workbook(path, rows, args.sheets)
+            file_mb = path.stat().st_size / 1e6
+            baseline = None
+            for mode in modes:
+                result = _run(mode, path)
+                stats = json.dumps(result["stats"])
+                baseline = baseline or stats
+                print(f"{rows:>10} {args.sheets:>6} {file_mb:>8.1f} {mode:>11} "
+                      f"{result['seconds']:>8.2f} {result['peak_mb']:>8.0f}  {stats == baseline}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+# benchmarks/memory.py
+"""Peak memory of the current process, for the subprocess-per-run benchmarks."""
+from __future__ import annotations
+
+import resource
+
+
+def peak_rss_mb() -> float:
+    """
+    High-water RSS of this process in MB. Reads VmHWM on Linux: ``ru_maxrss``
+    survives exec, so a child would report its parent's peak (e.g. from
+    generating the test file) instead of its own.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
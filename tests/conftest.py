@@ -1,8 +1,8 @@
 """
 Shared fixtures for the AgentFlow test suite.
 
-The ``client`` fixture patches both async runners (run_agent, run_analyze) so
-tests never touch the Groq API.  Each test gets a fresh TestClient backed by a
+The ``client`` fixture patches the async runners (run_agent, run_analyze,
+stream_analyze) so tests never touch the Groq API.  Each test gets a fresh TestClient backed by a
 temporary SQLite database via ``monkeypatch`` + ``tmp_path``.
 """
 from __future__ import annotations
@@ -73,17 +73,33 @@ def mock_analyze() -> AsyncMock:
 
 
 @pytest.fixture()
-def client(tmp_path, monkeypatch, mock_agent, mock_analyze) -> TestClient:
+def mock_stream_analyze():
+    """Stand-in for api.app.runner.analyze_runner.stream_analyze — progress, tokens, result."""
+    async def _stream(filename, content, request_id, context="", deadline=None, content_sha256=None,
+                      use_cache=True):
+        yield {"event": "parsed", "chars": content.stat().st_size, "rows": 0}
+        yield {"event": "classified", "doc_type": "resume", "confidence": 0.95}
+        yield {"event": "analyzer_started", "node": "analyze_resume"}
+        for text in ("Strong ", "candidate."):
+            yield {"event": "token", "node": "analyze_resume", "text": text}
+        yield {"event": "result", "data": {**_ANALYZE_RESULT, "request_id": request_id}}
+
+    return _stream
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch, mock_agent, mock_analyze, mock_stream_analyze) -> TestClient:
     """
     FastAPI TestClient with:
-    - both async runners replaced with deterministic AsyncMocks
+    - the async runners replaced with deterministic mocks
     - SQLite DB redirected to a per-test temp file (no leftover state)
     """
     monkeypatch.setattr(settings, "db_path", str(tmp_path / "test.db"))
 
     with (
-        patch("api.app.main.run_agent",   mock_agent),
-        patch("api.app.main.run_analyze", mock_analyze),
+        patch("api.app.main.run_agent",      mock_agent),
+        patch("api.app.main.run_analyze",    mock_analyze),
+        patch("api.app.main.stream_analyze", mock_stream_analyze),
     ):
         with TestClient(app) as c:
             yield c
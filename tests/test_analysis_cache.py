@@ -0,0 +1,145 @@
+"""
+Parse and analysis result caching in analyze_runner.
+
+The analyze graph is replaced with a counting fake; parsing runs for real
+(in a thread) on small TXT uploads. Each test gets its own SQLite cache file.
+"""
+from __future__ import annotations
+
+import pytest
+
+from api.app.runner import analysis_cache, analyze_runner
+from api.app.schemas.agent import ToolAction
+from api.app.settings import settings
+
+_RESUME = b"Jane Doe\nSenior Python Engineer\nExperience: 8 years\nSkills: FastAPI, LangGraph"
+
+
+@pytest.fixture()
+def graph(tmp_path, monkeypatch):
+    """Counting stand-in for run_analyze_graph; ``graph.warnings`` is put on the next result."""
+    async def fake_graph(filename, extension, text, rows, row_count, scorecard_stats,
+                         request_id, context="", deadline=None, use_cache=True):
+        graph.calls.append({"text": text, "context": context})
+        return {
+            "request_id": request_id, "filename": filename, "doc_type": "resume",
+            "doc_type_confidence": 0.93, "key_fields": {"name": "Jane Doe"},
+            "analysis": {"recommendation": "advance"}, "summary": "Strong backend engineer.",
+            "actions_taken": [ToolAction(kind="llm", name="analyze_resume", ok=True, ms=900)],
+            "warnings": list(graph.warnings),
+        }
+    graph.calls = []
+    graph.warnings = []
+
+    monkeypatch.setattr(settings, "db_path", str(tmp_path / "test.db"))
+    monkeypatch.setattr(settings, "parse_pool_size", 0)
+    monkeypatch.setattr(analyze_runner, "run_analyze_graph", fake_graph)
+    analysis_cache.clear_memory()
+    yield graph
+    analysis_cache.clear_memory()
+
+
+@pytest.mark.unit
+async def test_repeat_upload_is_served_from_cache_with_marker(graph):
+    first = await analyze_runner.run_analyze("jane.txt", _RESUME, "req-1")
+    second = await analyze_runner.run_analyze("jane.txt", _RESUME, "req-2")
+
+    assert len(graph.calls) == 1
+    assert second["request_id"] == "req-2"
+    assert {k: second[k] for k in ("doc_type", "key_fields", "analysis", "summary")} == \
+           {k: first[k] for k in ("doc_type", "key_fields", "analysis", "summary")}
+    [action] = second["actions_taken"]
+    assert action.name == "analysis_cache"
+    assert action.details["cached"] is True
+    assert action.details["cache"] == "memory"
+    assert action.details["source_request_id"] == "req-1"
+
+
+@pytest.mark.unit
+async def test_opt_out_reruns_and_refreshes_entry(graph):
+    await analyze_runner.run_analyze("jane.txt", _RESUME, "req-1")
+    fresh = await analyze_runner.run_analyze("jane.txt", _RESUME, "req-2", use_cache=False)
+    again = await analyze_runner.run_analyze("jane.txt", _RESUME, "req-3")
+
+    assert len(graph.calls) == 2
+    assert fresh["actions_taken"][0].name == "parse_document"
+    assert "cached" not in fresh["actions_taken"][0].details
+    assert again["actions_taken"][0].details["source_request_id"] == "req-2"
+
+
+@pytest.mark.unit
+async def test_new_context_reanalyzes_but_reuses_parse(graph):
+    await analyze_runner.run_analyze("jane.txt", _RESUME, "req-1")
+    result = await analyze_runner.run_analyze("jane.txt", _RESUME, "req-2", context="backend role")
+
+    assert [c["context"] for c in graph.calls] == ["", "backend role"]
+    assert graph.calls[0]["text"] == graph.calls[1]["text"]
+    parse_action = result["actions_taken"][0]
+    assert parse_action.name == "parse_document"
+    assert parse_action.details["cached"] is True
+
+
+@pytest.mark.unit
+async def test_result_with_warnings_is_not_cached(graph):
+    graph.warnings = ["Resume analysis failed: upstream timeout"]
+    await analyze_runner.run_analyze("jane.txt", _RESUME, "req-1")
+    graph.warnings = []
+    await analyze_runner.run_analyze("jane.txt", _RESUME, "req-2")
+
+    assert len(graph.calls) == 2
+
+
+@pytest.mark.unit
+async def test_sqlite_tier_survives_memory_loss(graph):
+    await analyze_runner.run_analyze("jane.txt", _RESUME, "req-1")
+    analysis_cache.clear_memory()   # as after a restart
+    result = await analyze_runner.run_analyze("jane.txt", _RESUME, "req-2")
+
+    assert len(graph.calls) == 1
+    assert result["actions_taken"][0].details["cache"] == "sqlite"
+
+
+@pytest.mark.unit
+async def test_stream_cache_hit_yields_result_only(graph):
+    await analyze_runner.run_analyze("jane.txt", _RESUME, "req-1")
+    events = [e async for e in analyze_runner.stream_analyze("jane.txt", _RESUME, "req-2")]
+
+    assert [e["event"] for e in events] == ["result"]
+    assert events[0]["data"]["request_id"] == "req-2"
+    assert events[0]["data"]["actions_taken"][0].details["cached"] is True
+
+
+@pytest.mark.unit
+async def test_cache_disabled_always_runs_graph(graph, monkeypatch):
+    monkeypatch.setattr(settings, "analysis_cache_enabled", False)
+    await analyze_runner.run_analyze("jane.txt", _RESUME, "req-1")
+    await analyze_runner.run_analyze("jane.txt", _RESUME, "req-2")
+
+    assert len(graph.calls) == 2
+
+
+@pytest.mark.unit
+def test_filename_only_keys_through_precheck():
+    sha = analysis_cache.content_sha256(_RESUME)
+    assert analysis_cache.analysis_cache_key(sha, "jane.pdf", "") == \
+           analysis_cache.analysis_cache_key(sha, "candidate-42.pdf", "")
+    assert analysis_cache.analysis_cache_key(sha, "jane.pdf", "") != \
+           analysis_cache.analysis_cache_key(sha, "jane cover letter.pdf", "")
+    assert analysis_cache.analysis_cache_key(sha, "jane.pdf", "") != \
+           analysis_cache.analysis_cache_key(sha, "jane.docx", "")
+
+
+@pytest.mark.unit
+def test_key_follows_prompts_and_routing_settings(monkeypatch):
+    sha = analysis_cache.content_sha256(_RESUME)
+    base = analysis_cache.analysis_cache_key(sha, "jane.pdf", "")
+
+    for name, value in (("local_classifier_enabled", False), ("local_classifier_threshold", 0.5),
+                        ("fused_min_confidence", 0.9)):
+        with monkeypatch.context() as m:
+            m.setattr(settings, name, value)
+            assert analysis_cache.analysis_cache_key(sha, "jane.pdf", "") != base, name
+
+    from api.app.graph.nodes import analyze_resume
+    monkeypatch.setattr(analyze_resume, "_ANALYZE_RESUME_SYSTEM", analyze_resume._ANALYZE_RESUME_SYSTEM + " Be brief.")
+    assert analysis_cache.analysis_cache_key(sha, "jane.pdf", "") != base
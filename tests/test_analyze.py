@@ -99,3 +99,50 @@ def test_analyze_rejects_empty_file(client):
 def test_analyze_rejects_missing_file_field(client):
     r = client.post("/agent/analyze", data={"context": "hint"})
     assert r.status_code == 422
+
+
+# ---------------------------------------------------------------------------
+# Upload spooling — size limit, hand-off by path
+# ---------------------------------------------------------------------------
+
+def test_analyze_passes_spooled_path_and_sha256_to_runner(client, mock_analyze):
+    import hashlib
+
+    r = client.post("/agent/analyze", files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")})
+    assert r.status_code == 200
+
+    kwargs = mock_analyze.await_args.kwargs
+    assert kwargs["content_sha256"] == hashlib.sha256(_MINIMAL_TXT).hexdigest()
+    assert kwargs["content"].suffix == ".txt"
+    assert not kwargs["content"].exists()   # temp file removed once the request is done
+
+
+def test_analyze_use_cache_field_reaches_runner(client, mock_analyze):
+    client.post("/agent/analyze", files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")})
+    assert mock_analyze.await_args.kwargs["use_cache"] is True
+
+    client.post(
+        "/agent/analyze",
+        files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")},
+        data={"use_cache": "false"},
+    )
+    assert mock_analyze.await_args.kwargs["use_cache"] is False
+
+
+def test_analyze_rejects_oversized_upload_while_spooling(client, monkeypatch):
+    from api.app.settings import settings
+    monkeypatch.setattr(settings, "max_upload_bytes", 10)
+    monkeypatch.setattr(settings, "upload_chunk_bytes", 4)
+
+    r = client.post("/agent/analyze", files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")})
+    assert r.status_code == 413
+
+
+def test_analyze_rejects_oversized_content_length_up_front(client, mock_analyze, monkeypatch):
+    from api.app.settings import settings
+    monkeypatch.setattr(settings, "max_upload_bytes", 10)
+
+    r = client.post("/agent/analyze/stream", files={"file": ("big.txt", b"x" * 100_000, "text/plain")})
+    assert r.status_code == 413
+    assert "byte limit" in r.json()["detail"]
+    mock_analyze.assert_not_awaited()
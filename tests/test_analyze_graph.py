@@ -0,0 +1,310 @@
+"""
+Unit tests for the analyze graph's routing and nodes.
+
+Marked ``unit`` — nodes run against a patched ``run_inference_result`` so no
+Groq calls are made.
+"""
+import json
+import time
+
+import pytest
+
+from api.app.classifier.local_classifier import classify_locally
+from api.app.clients.inference_client import InferenceResult
+from api.app.graph import analyze_graph
+from api.app.graph.nodes import classify_and_analyze as fused_node
+from api.app.graph.nodes import classify_document as classify_node
+from api.app.settings import settings
+
+
+def _state(**overrides):
+    state = analyze_graph._initial_state(
+        filename="jane_doe.pdf", extension="pdf", text="Jane Doe — Experience ...",
+        rows=[], row_count=0, request_id="req", context="",
+    )
+    state.update(overrides)
+    return state
+
+
+def _reply(payload: dict, parse=None, **_) -> InferenceResult:
+    """What run_inference_result returns for ``payload``, run through the caller's ``parse``."""
+    content = json.dumps(payload)
+    return InferenceResult(content=content, cache="miss", parsed=parse(content) if parse else None)
+
+
+def _fake_inference(payload: dict):
+    async def _run(system_prompt, user_prompt, **kwargs):
+        return _reply(payload, **kwargs)
+    return _run
+
+
+# ---------------------------------------------------------------------------
+# Fused classify+analyze mode
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+def test_entry_uses_two_step_path_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "analyze_fused_mode", False)
+    assert analyze_graph._route_entry(_state()) == "classify_document"
+
+
+@pytest.mark.unit
+def test_entry_uses_fused_node_for_text_documents(monkeypatch):
+    monkeypatch.setattr(settings, "analyze_fused_mode", True)
+    assert analyze_graph._route_entry(_state()) == "classify_and_analyze"
+    assert analyze_graph._route_entry(_state(rows=[{"a": 1}])) == "classify_document"
+
+
+@pytest.mark.unit
+async def test_fused_node_returns_shaped_analysis(monkeypatch):
+    monkeypatch.setattr(fused_node, "run_inference_result", _fake_inference({
+        "doc_type": "resume", "confidence": 0.92, "summary": "A resume.",
+        "key_fields": {"name": "Jane Doe"},
+        "analysis": {"strengths": ["Python"], "recommendation": "hire",
+                     "recommendation_confidence": 0.8, "narrative": "Hire Jane."},
+    }))
+    update = await fused_node.classify_and_analyze(_state(), writer=lambda _: None)
+
+    assert update["doc_type"] == "resume"
+    assert update["analysis"]["recommendation"] == "hire"
+    assert update["summary"] == "Hire Jane."
+    assert analyze_graph._route_after_fused({**_state(), **update}) == "write_analyze_memo"
+
+
+@pytest.mark.unit
+async def test_fused_node_defers_to_two_step_below_confidence(monkeypatch):
+    monkeypatch.setattr(settings, "fused_min_confidence", 0.75)
+    monkeypatch.setattr(fused_node, "run_inference_result", _fake_inference({
+        "doc_type": "resume", "confidence": 0.4, "analysis": {"narrative": "maybe"},
+    }))
+    update = await fused_node.classify_and_analyze(_state(), writer=lambda _: None)
+
+    assert "doc_type" not in update
+    assert update["actions_taken"][0].details["reason"] == "low_confidence"
+    assert analyze_graph._route_after_fused({**_state(), **update}) == "classify_document"
+
+
+def _streamed_reply(reply: str):
+    """run_inference_result stand-in that streams ``reply`` in small deltas, then parses it."""
+    async def _run(system_prompt, user_prompt, on_token=None, parse=None, **kwargs):
+        for i in range(0, len(reply), 7):
+            if on_token:
+                on_token(reply[i:i + 7])
+        return InferenceResult(content=reply, cache="miss", parsed=parse(reply) if parse else None)
+    return _run
+
+
+async def _stream_tokens(monkeypatch, fused_reply: str):
+    """Run the real graph in fused streaming mode; two-step nodes answer with TWO STEP NARRATIVE."""
+    from api.app.graph.nodes import analyze_resume as resume_node
+
+    monkeypatch.setattr(settings, "analyze_fused_mode", True)
+    monkeypatch.setattr(settings, "fused_min_confidence", 0.75)
+    monkeypatch.setattr(settings, "n8n_enabled", False)
+    monkeypatch.setattr(fused_node, "run_inference_result", _streamed_reply(fused_reply))
+    monkeypatch.setattr(classify_node, "run_inference_result", _streamed_reply(json.dumps({
+        "doc_type": "resume", "confidence": 0.9, "summary": "A resume.", "key_fields": {},
+    })))
+    monkeypatch.setattr(resume_node, "run_inference_result", _streamed_reply(json.dumps({
+        "recommendation": "hire", "narrative": "TWO STEP NARRATIVE",
+    })))
+    events = [e async for e in analyze_graph.stream_analyze_graph(
+        filename="jane_doe.txt", extension="txt", text=_RESUME_TEXT, rows=[], row_count=0, request_id="req",
+    )]
+    stream = "".join(
+        "|" if e["event"] == "token_reset" else e["text"]
+        for e in events if e["event"] in ("token", "token_reset")
+    )
+    return stream, events[-1]["data"]
+
+
+@pytest.mark.unit
+async def test_fused_stream_holds_narrative_when_falling_back(monkeypatch):
+    stream, result = await _stream_tokens(monkeypatch, json.dumps({
+        "doc_type": "resume", "confidence": 0.4, "analysis": {"narrative": "FUSED NARRATIVE"},
+    }))
+
+    assert stream == "TWO STEP NARRATIVE"
+    assert result["summary"] == "TWO STEP NARRATIVE"
+
+
+@pytest.mark.unit
+async def test_fused_stream_resets_tokens_when_reply_breaks_after_gate(monkeypatch):
+    truncated = '{"doc_type": "resume", "confidence": 0.9, "analysis": {"narrative": "FUSED NARR'
+    stream, _ = await _stream_tokens(monkeypatch, truncated)
+
+    assert stream == "FUSED NARR|TWO STEP NARRATIVE"
+
+
+@pytest.mark.unit
+async def test_fused_stream_passes_confident_narrative_through(monkeypatch):
+    stream, result = await _stream_tokens(monkeypatch, json.dumps({
+        "doc_type": "resume", "confidence": 0.92, "key_fields": {},
+        "analysis": {"recommendation": "hire", "narrative": "FUSED NARRATIVE"},
+    }))
+
+    assert stream == "FUSED NARRATIVE"
+    assert result["summary"] == "FUSED NARRATIVE"
+
+
+# ---------------------------------------------------------------------------
+# Local statistical classifier
+# ---------------------------------------------------------------------------
+
+_RESUME_TEXT = """Jane Doe
+Senior Software Engineer
+jane@email.com | (555) 123-4567
+
+WORK EXPERIENCE
+Senior Software Engineer — Globex
+2019 – Present
+• Led migration of legacy services to Kubernetes, cutting costs 30%
+• Mentored 4 junior team members
+
+Software Engineer — Initech
+2015 – 2019
+• Built dashboards in SQL used by 200 stakeholders
+
+EDUCATION
+B.S. Computer Science, Georgia Tech, 2015
+
+SKILLS
+Python, AWS, PostgreSQL, Docker, Terraform"""
+
+
+@pytest.mark.unit
+def test_local_classifier_recognises_obvious_resume():
+    prediction = classify_locally(_RESUME_TEXT)
+    assert prediction.doc_type == "resume"
+    assert prediction.confidence >= 0.85
+    assert prediction.ms < 5
+
+
+@pytest.mark.unit
+async def test_classify_skips_llm_when_local_model_is_confident(monkeypatch):
+    async def _must_not_call(*args, **kwargs):
+        raise AssertionError("LLM should not be consulted")
+
+    monkeypatch.setattr(classify_node, "run_inference_result", _must_not_call)
+    monkeypatch.setattr(settings, "local_classifier_threshold", 0.85)
+    update = await classify_node.classify_document(_state(text=_RESUME_TEXT))
+
+    assert update["doc_type"] == "resume"
+    assert update["actions_taken"][0].details["method"] == "local_model"
+
+
+@pytest.mark.unit
+async def test_classify_consults_llm_below_local_threshold(monkeypatch):
+    monkeypatch.setattr(classify_node, "run_inference_result", _fake_inference({
+        "doc_type": "job_desc", "confidence": 0.9, "summary": "A JD.", "key_fields": {},
+    }))
+    monkeypatch.setattr(settings, "local_classifier_threshold", 1.01)
+    update = await classify_node.classify_document(_state(text=_RESUME_TEXT))
+
+    assert update["doc_type"] == "job_desc"
+    assert update["actions_taken"][0].kind == "llm"
+
+
+@pytest.mark.unit
+async def test_classify_prompt_gets_smaller_text_budget_than_analyzer(monkeypatch):
+    from api.app.graph.nodes import analyze_resume as resume_node
+
+    prompts = {}
+
+    def _capture(name, payload):
+        async def _run(system_prompt, user_prompt, **kwargs):
+            prompts[name] = user_prompt
+            return _reply(payload, **kwargs)
+        return _run
+
+    long_resume = _RESUME_TEXT + "\n\nEXPERIENCE\n" + "- Shipped a payments service in Go\n" * 2_000
+    monkeypatch.setattr(settings, "local_classifier_threshold", 1.01)
+    monkeypatch.setattr(classify_node, "run_inference_result", _capture("classify", {
+        "doc_type": "resume", "confidence": 0.9, "summary": "A resume.", "key_fields": {},
+    }))
+    monkeypatch.setattr(resume_node, "run_inference_result", _capture("analyze", {"narrative": "Hire."}))
+    await classify_node.classify_document(_state(text=long_resume))
+    await resume_node.analyze_resume(_state(text=long_resume), writer=lambda _: None)
+
+    assert len(prompts["classify"]) < settings.classify_text_tokens * 4 + 200
+    assert settings.classify_text_tokens * 4 < len(prompts["analyze"]) < settings.analyze_text_tokens * 4 + 400
+
+
+@pytest.mark.unit
+async def test_cache_opt_out_reaches_the_llm_call(monkeypatch):
+    from api.app.graph.nodes import analyze_resume as resume_node
+
+    seen = []
+
+    async def _run(system_prompt, user_prompt, **kwargs):
+        seen.append(kwargs["use_cache"])
+        return _reply({"narrative": "Hire."}, **kwargs)
+
+    monkeypatch.setattr(resume_node, "run_inference_result", _run)
+    await resume_node.analyze_resume(_state(text=_RESUME_TEXT, use_cache=False), writer=lambda _: None)
+    await resume_node.analyze_resume(_state(text=_RESUME_TEXT), writer=lambda _: None)
+
+    assert seen == [False, True]
+
+
+@pytest.mark.unit
+async def test_cover_letter_node_returns_analysis(monkeypatch):
+    from api.app.graph.nodes import analyze_cover_letter as cover_node
+
+    monkeypatch.setattr(cover_node, "run_inference_result", _fake_inference({
+        "candidate_name": "Jane Doe", "recommendation": "follow_up", "recommendation_confidence": 0.7,
+        "red_flags": ["Generic opening"], "narrative": "Worth a screening call.",
+    }))
+    update = await cover_node.analyze_cover_letter(
+        _state(filename="jane_cover_letter.pdf", text="Dear hiring manager, ..."), writer=lambda _: None,
+    )
+
+    assert "warnings" not in update
+    assert update["analysis"]["candidate_name"] == "Jane Doe"
+    assert update["summary"] == "Worth a screening call."
+    action = update["actions_taken"][0]
+    assert action.ok and action.details["red_flags"] == 1 and action.details["recommendation"] == "follow_up"
+
+
+# ---------------------------------------------------------------------------
+# Request deadline budget
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+async def test_classify_degrades_to_extension_when_budget_is_spent(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "db_path", str(tmp_path / "test.db"))
+    monkeypatch.setattr(settings, "local_classifier_threshold", 1.01)
+    update = await classify_node.classify_document(
+        _state(text=_RESUME_TEXT, deadline=time.monotonic() - 1)
+    )
+
+    assert update["doc_type"] == "unknown"          # extension fallback for .pdf
+    action = update["actions_taken"][0]
+    assert not action.ok and "budget" in action.details["error"]
+
+
+# ---------------------------------------------------------------------------
+# Scorecard analyzer — statistics computed at parse time
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+async def test_scorecard_uses_parse_time_stats_over_row_sample(monkeypatch):
+    from api.app.graph.nodes import analyze_scorecard as scorecard_node
+
+    prompts = []
+
+    async def _run(system_prompt, user_prompt, **kwargs):
+        prompts.append(user_prompt)
+        return _reply({"narrative": "Panel aligned."}, **kwargs)
+
+    monkeypatch.setattr(scorecard_node, "run_inference_result", _run)
+    full_table_stats = {"n_rows": 250_000, "global_mean": 3.4}
+    state = _state(
+        filename="panel.csv", extension="csv", rows=[{"candidate": "Jane", "score": 4}],
+        row_count=250_000, scorecard_stats=full_table_stats,
+    )
+    update = await scorecard_node.analyze_scorecard(state, writer=lambda _: None)
+
+    assert update["analysis"]["stats"] == full_table_stats
+    assert '"n_rows": 250000' in prompts[0]
+    assert update["actions_taken"][0].details["rows_analyzed"] == 250_000
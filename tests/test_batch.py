@@ -0,0 +1,195 @@
+"""
+Contract tests for POST /agent/analyze/batch.
+
+Uses the ``client`` fixture, so ``run_analyze`` is mocked — these cover
+upload/ZIP expansion, the NDJSON stream and session grouping, not the graph.
+"""
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi import UploadFile
+
+from api.app.main import _spool_batch
+from api.app.parsers.archive import BatchBudget, expand_upload
+from api.app.settings import settings
+
+_MINIMAL_TXT = b"Jane Doe\nSenior Python Engineer\n5 years experience"
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_batch_streams_one_ndjson_line_per_file(client, mock_analyze):
+    files = [
+        ("files", ("a.txt", _MINIMAL_TXT, "text/plain")),
+        ("files", ("b.txt", _MINIMAL_TXT, "text/plain")),
+    ]
+    r = client.post("/agent/analyze/batch", files=files)
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines(r)
+    assert len(lines) == 2
+    assert all(line["doc_type"] == "resume" for line in lines)
+    assert mock_analyze.await_count == 2
+
+
+def test_batch_groups_results_under_one_session(client):
+    zipped = _zip({"round/a.txt": _MINIMAL_TXT, "round/b.txt": _MINIMAL_TXT})
+    files = [
+        ("files", ("round.zip", zipped, "application/zip")),
+        ("files", ("c.txt", _MINIMAL_TXT, "text/plain")),
+    ]
+    r = client.post("/agent/analyze/batch", files=files, headers={"X-Session-ID": "round-7"})
+
+    assert len(_lines(r)) == 3
+    assert r.headers["x-session-id"] == "round-7"
+    assert len(client.get("/sessions/round-7").json()) == 3
+
+
+def test_batch_generates_session_id_when_absent(client):
+    r = client.post("/agent/analyze/batch", files=[("files", ("a.txt", _MINIMAL_TXT, "text/plain"))])
+    session_id = r.headers["x-session-id"]
+    assert len(client.get(f"/sessions/{session_id}").json()) == 1
+
+
+def test_batch_reports_skipped_entries_and_keeps_going(client, mock_analyze):
+    mock_analyze.side_effect = [RuntimeError("parser exploded")]
+    files = [
+        ("files", ("bad.txt", _MINIMAL_TXT, "text/plain")),
+        ("files", ("archive.rar", b"Rar!", "application/octet-stream")),
+    ]
+    lines = _lines(client.post("/agent/analyze/batch", files=files))
+
+    warnings = sorted(line["warnings"][0] for line in lines)
+    assert warnings == ["Unsupported file type: .rar", "parser exploded"]
+    assert all(line["doc_type"] == "unknown" for line in lines)
+
+
+def test_batch_stops_reading_parts_at_the_limits(client, mock_analyze, monkeypatch, tmp_path):
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+    monkeypatch.setattr(settings, "upload_spool_dir", str(spool_dir))
+    monkeypatch.setattr(settings, "batch_max_bytes", 80)
+    monkeypatch.setattr(settings, "upload_chunk_bytes", 16)
+    files = [
+        ("files", ("a.txt", _MINIMAL_TXT, "text/plain")),
+        ("files", ("b.txt", _MINIMAL_TXT, "text/plain")),     # past the byte budget
+        ("files", ("c.txt", b"short", "text/plain")),
+    ]
+    lines = _lines(client.post("/agent/analyze/batch", files=files))
+
+    warnings = {line["filename"]: line["warnings"] for line in lines}
+    assert warnings["b.txt"] == ["Batch exceeds the size limit"]
+    assert mock_analyze.await_count == 2
+
+    monkeypatch.setattr(settings, "batch_max_files", 1)
+    lines = _lines(client.post("/agent/analyze/batch", files=files))
+
+    skipped = sorted(line["filename"] for line in lines if line["warnings"] == ["Batch is limited to 1 files"])
+    assert skipped == ["b.txt", "c.txt"]
+    assert mock_analyze.await_count == 3
+    assert list(spool_dir.iterdir()) == []    # every spooled part was removed
+
+
+def test_batch_rejects_oversized_content_length_up_front(client, mock_analyze, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_bytes", 1_000)
+    monkeypatch.setattr(settings, "batch_max_files", 1)
+
+    r = client.post("/agent/analyze/batch", files=[("files", ("big.txt", b"x" * 200_000, "text/plain"))])
+
+    assert r.status_code == 413
+    assert "1,000 byte limit" in r.json()["detail"]
+    mock_analyze.assert_not_awaited()
+
+
+class _Part(UploadFile):
+    """An UploadFile that records whether the batch ever read it."""
+
+    read_from = False
+
+    async def read(self, size: int = -1) -> bytes:
+        self.read_from = True
+        return await super().read(size)
+
+
+def _part(filename, data):
+    return _Part(io.BytesIO(data), filename=filename)
+
+
+@pytest.mark.unit
+async def test_spool_batch_drops_zip_junk_and_stops_at_the_file_limit(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "upload_spool_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "batch_max_files", 1)
+    zipped = _zip({
+        "__MACOSX/._a.txt": b"junk",
+        ".DS_Store": b"junk",
+        "a.txt": b"first",
+        "b.txt": b"second",
+        "empty.txt": b"",
+    })
+    later = _part("later.txt", b"never read")
+    entries = await _spool_batch([_part("round.zip", zipped), _part("notes.exe", b"MZ"), later])
+
+    assert [(e.filename, e.skip_reason) for e in entries] == [
+        ("a.txt", None),
+        ("b.txt", "Batch is limited to 1 files"),
+        ("empty.txt", "Uploaded file is empty."),
+        ("notes.exe", "Unsupported file type: .exe"),
+        ("later.txt", "Batch is limited to 1 files"),
+    ]
+    assert not later.read_from
+    assert [p.read_bytes() for p in tmp_path.iterdir()] == [b"first"]    # the zip itself is gone
+    for entry in entries:
+        entry.cleanup()
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.unit
+async def test_spool_batch_skips_parts_past_the_remaining_bytes(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "upload_spool_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "batch_max_bytes", 10)
+    monkeypatch.setattr(settings, "upload_chunk_bytes", 4)
+    entries = await _spool_batch([
+        _part("a.txt", b"123456"), _part("b.txt", b"123456"), _part("c.txt", b"1234"),
+    ])
+
+    assert [(e.filename, e.skip_reason) for e in entries] == [
+        ("a.txt", None),
+        ("b.txt", "Batch exceeds the size limit"),
+        ("c.txt", None),
+    ]
+    assert len(list(tmp_path.iterdir())) == 2
+    for entry in entries:
+        entry.cleanup()
+
+
+@pytest.mark.unit
+def test_expand_upload_caps_uncompressed_size(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "upload_spool_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "batch_max_bytes", 10)
+    budget = BatchBudget()
+    zipped = _zip({"small.txt": b"12345", "big.txt": b"x" * 1_000})
+    entries = expand_upload("round.zip", zipped, len(zipped), budget)
+    entries += expand_upload("bad.zip", b"not a zip", 9, budget)
+    entries += expand_upload("late.txt", b"123456", 6, budget)
+
+    assert [(e.filename, e.skip_reason) for e in entries] == [
+        ("small.txt", None),
+        ("big.txt", "Archive exceeds the batch size limit"),
+        ("bad.zip", "Not a valid ZIP archive"),
+        ("late.txt", "Batch exceeds the size limit"),
+    ]
+    assert (budget.accepted, budget.used, budget.remaining_bytes) == (1, 5, 5)
+    entries[0].cleanup()
@@ -0,0 +1,149 @@
+"""
+Unit tests for the offline bulk-analysis CLI.
+
+``run_analyze`` is patched, so these exercise directory walking, JSONL output,
+checkpoint/resume and the timing report without parsing or Groq calls.
+"""
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from api.app.cli import bulk_analyze
+from api.app.schemas.agent import ToolAction
+from api.app.schemas.analyze import AnalyzeResponse
+
+
+def _fake_run_analyze(calls):
+    async def _run(filename, content, request_id, context="", deadline=None, use_cache=True, **kwargs):
+        assert isinstance(content, Path)
+        calls.append(filename if use_cache else f"{filename} (no cache)")
+        return {
+            "request_id": request_id,
+            "filename": filename,
+            "doc_type": "unknown",
+            "doc_type_confidence": 0.9,
+            "summary": "ok",
+            "actions_taken": [
+                ToolAction(kind="tool", name="parse_document", ok=True, ms=5,
+                           details={"executor": "process", "queue_ms": 1}),
+            ],
+            "warnings": ["Resume analysis failed: timeout"] if filename.startswith("bad") else [],
+        }
+    return _run
+
+
+@pytest.fixture()
+def corpus(tmp_path):
+    root = tmp_path / "round"
+    (root / "sub").mkdir(parents=True)
+    (root / ".git").mkdir()
+    (root / "a.txt").write_text("Jane Doe resume")
+    (root / "sub" / "b.txt").write_text("Interview notes")
+    (root / "sub" / "bad.txt").write_text("???")
+    (root / "notes.md").write_text("not a supported type")
+    (root / ".git" / "c.txt").write_text("ignored")
+    return root
+
+
+async def _run(root, out, checkpoint, finished, limit=None, use_cache=True):
+    return await bulk_analyze.run_bulk(
+        root=root, out=out, checkpoint=checkpoint, finished=finished,
+        concurrency=2, budget=30.0, limit=limit, use_cache=use_cache,
+    )
+
+
+@pytest.mark.unit
+def test_iter_documents_skips_unsupported_and_hidden(corpus):
+    found = [p.relative_to(corpus).as_posix() for p in bulk_analyze.iter_documents(corpus)]
+    assert found == ["a.txt", "sub/b.txt", "sub/bad.txt"]
+
+
+@pytest.mark.unit
+async def test_run_bulk_writes_jsonl_and_checkpoint(corpus, monkeypatch):
+    calls = []
+    monkeypatch.setattr(bulk_analyze, "run_analyze", _fake_run_analyze(calls))
+    out, checkpoint = io.StringIO(), io.StringIO()
+
+    stats = await _run(corpus, out, checkpoint, set())
+
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sorted(r["path"] for r in rows) == ["a.txt", "sub/b.txt", "sub/bad.txt"]
+    assert all(r["request_id"] and r["sha256"] for r in rows)
+    assert len(checkpoint.getvalue().splitlines()) == 3
+    assert (stats.done, stats.failed) == (3, 1)
+    assert len(stats.timings["parse"]) == 3
+    assert stats.timings["vision"] == []
+
+
+@pytest.mark.unit
+async def test_resume_skips_checkpointed_documents(corpus, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(bulk_analyze, "run_analyze", _fake_run_analyze(calls))
+    checkpoint_path = tmp_path / "results.jsonl.checkpoint"
+
+    with checkpoint_path.open("a") as checkpoint:
+        await _run(corpus, io.StringIO(), checkpoint, set(), limit=2)
+    assert len(calls) == 2
+
+    # An edited document is analyzed again even though its path was checkpointed
+    (corpus / "a.txt").write_text("Jane Doe resume, updated")
+    calls.clear()
+    with checkpoint_path.open("a") as checkpoint:
+        stats = await _run(corpus, io.StringIO(), checkpoint, bulk_analyze.load_checkpoint(checkpoint_path))
+
+    assert sorted(calls) == ["a.txt", "bad.txt"]
+    assert stats.resumed == 1
+
+
+@pytest.mark.unit
+def test_failure_comes_from_warnings_and_failed_llm_calls():
+    def response(actions=(), warnings=()):
+        return AnalyzeResponse(request_id="r", filename="f.txt", doc_type="unknown", doc_type_confidence=0.0,
+                               actions_taken=list(actions), warnings=list(warnings))
+
+    fused_fallback = ToolAction(kind="llm", name="classify_and_analyze", ok=False, ms=1,
+                                details={"fallback": "two_step", "reason": "low_confidence"})
+    failed_page = ToolAction(kind="llm", name="vision_page", ok=False, ms=1, details={"error": "timeout"})
+
+    assert not bulk_analyze.document_failed(response())
+    assert not bulk_analyze.document_failed(response([fused_fallback]))
+    assert bulk_analyze.document_failed(response([failed_page]))
+    assert bulk_analyze.document_failed(response(warnings=["File could not be parsed: empty"]))
+
+
+@pytest.mark.unit
+async def test_no_cache_reaches_every_document(corpus, monkeypatch):
+    calls = []
+    monkeypatch.setattr(bulk_analyze, "run_analyze", _fake_run_analyze(calls))
+    await _run(corpus, io.StringIO(), io.StringIO(), set(), use_cache=False)
+
+    assert sorted(calls) == ["a.txt (no cache)", "b.txt (no cache)", "bad.txt (no cache)"]
+
+
+@pytest.mark.unit
+def test_percentile_and_report():
+    assert bulk_analyze.percentile([], 95) == 0
+    assert bulk_analyze.percentile([10, 20, 30, 40], 50) == 20
+    assert bulk_analyze.percentile(list(range(1, 101)), 95) == 95
+
+    stats = bulk_analyze.BulkStats(done=2)
+    stats.record("total", 100)
+    stats.record("total", 300)
+    report = bulk_analyze.format_report(stats, elapsed_s=6.0)
+    assert "throughput=20.0/min" in report
+    assert "total" in report and "300" in report
+
+
+@pytest.mark.unit
+async def test_retry_failed_reruns_only_failures(corpus, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(bulk_analyze, "run_analyze", _fake_run_analyze(calls))
+    checkpoint_path = tmp_path / "results.jsonl.checkpoint"
+    with checkpoint_path.open("a") as checkpoint:
+        await _run(corpus, io.StringIO(), checkpoint, set())
+
+    assert len(bulk_analyze.load_checkpoint(checkpoint_path)) == 3
+    finished = bulk_analyze.load_checkpoint(checkpoint_path, retry_failed=True)
+    assert sorted(path for path, _ in finished) == ["a.txt", "sub/b.txt"]
@@ -0,0 +1,396 @@
+"""
+Unit tests for document_parser.
+
+Marked ``unit`` — PDFs are generated in-memory with PyMuPDF; vision is faked.
+"""
+import asyncio
+import io
+
+import fitz
+import pytest
+
+from api.app.clients.inference_client import InferenceResult
+from api.app.parsers import document_parser, image_preprocess
+from api.app.parsers.document_parser import MAX_TEXT_CHARS, parse_document
+from api.app.runner import analyze_runner
+from api.app.settings import settings
+
+
+def _png() -> bytes:
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 200, 100), 0)
+    pix.set_rect(pix.irect, (240, 240, 240))
+    return pix.tobytes("png")
+
+
+def _mixed_pdf(layout: str) -> bytes:
+    """``layout`` is one letter per page: T = typed text, S = scanned image."""
+    doc = fitz.open()
+    for n, kind in enumerate(layout, start=1):
+        page = doc.new_page()
+        if kind == "T":
+            page.insert_textbox(
+                fitz.Rect(36, 36, 576, 806), f"Typed page {n}: interviewer notes on the candidate.",
+            )
+        else:
+            page.insert_image(fitz.Rect(36, 36, 576, 400), stream=_png())
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _pdf(pages: int, chars_per_page: int = 1_500) -> bytes:
+    doc = fitz.open()
+    line = "Policy section text for the employee handbook. "
+    for n in range(pages):
+        page = doc.new_page()
+        body = f"Page {n + 1}\n" + "\n".join([line] * (chars_per_page // len(line)))
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), body, fontsize=6)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.mark.unit
+def test_pdf_extraction_stops_once_text_budget_is_filled():
+    parsed = parse_document("handbook.pdf", _pdf(pages=60))
+
+    assert parsed.metadata["parser"] == "pdfplumber"
+    assert parsed.metadata["pages_total"] == 60
+    assert parsed.metadata["pages_parsed"] < 60
+    assert len(parsed.text) >= MAX_TEXT_CHARS
+    assert "Page 60" not in parsed.text
+
+
+@pytest.mark.unit
+def test_short_pdf_is_parsed_completely():
+    parsed = parse_document("memo.pdf", _pdf(pages=3))
+    assert parsed.metadata["pages_parsed"] == parsed.metadata["pages_total"] == 3
+
+
+@pytest.mark.unit
+def test_pymupdf_fallback_also_stops_early():
+    parsed = document_parser._parse_pdf_pymupdf("handbook.pdf", "pdf", _pdf(pages=60))
+
+    assert parsed.metadata["parser"] == "pymupdf"
+    assert parsed.metadata["pages_parsed"] < parsed.metadata["pages_total"] == 60
+
+
+@pytest.mark.unit
+def test_pymupdf_closes_the_document_even_when_parsing_fails(monkeypatch):
+    typed, scanned = _pdf(pages=2), _mixed_pdf("S")
+    opened = []
+    real_open = fitz.open
+
+    def _open(*args, **kwargs):
+        opened.append(real_open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(fitz, "open", _open)
+    document_parser._parse_pdf_pymupdf("memo.pdf", "pdf", typed)
+
+    def _boom(page, filename):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(document_parser, "_render_page", _boom)
+    parsed = document_parser._parse_pdf_pymupdf("scan.pdf", "pdf", scanned)
+
+    assert parsed.parse_error == "render failed"
+    assert [doc.is_closed for doc in opened] == [True, True]
+
+
+@pytest.mark.unit
+def test_mixed_pdf_routes_each_page():
+    parsed = parse_document("packet.pdf", _mixed_pdf("TSTS"))
+
+    assert [p.number for p in parsed.pages] == [1, 2, 3, 4]
+    assert [p.number for p in parsed.scanned_pages] == [2, 4]
+    assert "Typed page 3" in parsed.text
+    assert parsed.metadata["rendered_pages"] == 2
+    assert parsed.metadata["text_pages"] == 2
+
+
+@pytest.mark.unit
+def test_typed_pdf_has_no_page_routing():
+    parsed = parse_document("memo.pdf", _mixed_pdf("TT"))
+    assert parsed.pages == []
+    assert parsed.metadata["parser"] == "pdfplumber"
+
+
+@pytest.mark.unit
+def test_stitch_pages_restores_page_order():
+    parsed = parse_document("packet.pdf", _mixed_pdf("STS"))
+    text = parsed.stitch_pages({1: "scan one", 3: "scan three"})
+
+    assert text.index("scan one") < text.index("Typed page 2") < text.index("scan three")
+
+
+@pytest.mark.unit
+async def test_runner_transcribes_only_scanned_pages(monkeypatch):
+    calls = []
+
+    async def fake_vision(prompt, image_bytes, media_type, deadline=None, **kwargs):
+        calls.append(image_bytes)
+        return InferenceResult(content=f"transcript {len(calls)}", cache="miss")
+
+    monkeypatch.setattr(settings, "parse_pool_size", 0)
+    monkeypatch.setattr(analyze_runner, "run_vision_inference_result", fake_vision)
+    parsed, actions, failure = await analyze_runner._prepare("packet.pdf", _mixed_pdf("TSTS"), "req")
+
+    assert failure is None
+    assert len(calls) == 2
+    assert parsed.text.index("Typed page 1") < parsed.text.index("transcript") < parsed.text.index("Typed page 3")
+    assert [a.name for a in actions] == ["parse_document", "vision_page", "vision_page", "vision_transcribe"]
+    assert [a.details["page"] for a in actions[1:3]] == [2, 4]
+    assert actions[-1].details["pages"] == [2, 4]
+
+
+@pytest.mark.unit
+async def test_scanned_pages_respect_concurrency_cap_and_page_limit(monkeypatch):
+    in_flight, peak = 0, 0
+
+    async def fake_vision(prompt, image_bytes, media_type, deadline=None, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return InferenceResult(content="handwritten page", cache="miss")
+
+    monkeypatch.setattr(settings, "parse_pool_size", 0)
+    monkeypatch.setattr(settings, "vision_concurrency", 2)
+    monkeypatch.setattr(settings, "vision_max_pages", 5)
+    monkeypatch.setattr(analyze_runner, "run_vision_inference_result", fake_vision)
+    parsed, actions, failure = await analyze_runner._prepare("notes.pdf", _mixed_pdf("S" * 7), "req")
+
+    assert failure is None
+    assert peak == 2
+    assert len(parsed.scanned_pages) == 5
+    assert actions[-1].details["skipped_pages"] == 2
+
+
+@pytest.mark.unit
+async def test_failed_page_is_reported_and_others_kept(monkeypatch):
+    async def fake_vision(prompt, image_bytes, media_type, deadline=None, **kwargs):
+        fake_vision.calls += 1
+        if fake_vision.calls == 1:
+            raise RuntimeError("vision down")
+        return InferenceResult(content="second scan", cache="miss")
+    fake_vision.calls = 0
+
+    monkeypatch.setattr(settings, "parse_pool_size", 0)
+    monkeypatch.setattr(settings, "vision_concurrency", 1)
+    monkeypatch.setattr(analyze_runner, "run_vision_inference_result", fake_vision)
+    parsed, actions, failure = await analyze_runner._prepare("notes.pdf", _mixed_pdf("SS"), "req")
+
+    assert failure is None
+    assert parsed.text == "second scan"
+    assert actions[-1].details["failed_pages"] == {1: "vision down"}
+
+
+# ---------------------------------------------------------------------------
+# Image pre-processing
+# ---------------------------------------------------------------------------
+
+def _photo(size=(4000, 3000), color=True, orientation=None, fmt="JPEG") -> bytes:
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    if color:
+        pixels = rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    else:
+        pixels = np.repeat(rng.integers(200, 255, (size[1], size[0], 1), dtype=np.uint8), 3, axis=2)
+    image = Image.fromarray(pixels)
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=95, exif=exif)
+    return buffer.getvalue()
+
+
+@pytest.mark.unit
+def test_phone_photo_is_downscaled_and_stripped():
+    from PIL import Image
+
+    raw = _photo()
+    prepared = image_preprocess.prepare_image(raw, "image/jpeg")
+
+    assert len(prepared.data) < len(raw)
+    with Image.open(io.BytesIO(prepared.data)) as out:
+        assert max(out.size) == settings.image_max_long_edge
+        assert not out.getexif()
+    assert prepared.metadata["exif_stripped"] is True
+
+
+@pytest.mark.unit
+def test_colourless_scan_becomes_grayscale():
+    prepared = image_preprocess.prepare_image(_photo((800, 600), color=False), "image/jpeg")
+    assert prepared.metadata["grayscale"] is True
+    assert prepared.media_type == "image/jpeg"
+
+
+@pytest.mark.unit
+def test_exif_orientation_is_applied_before_stripping():
+    from PIL import Image
+
+    prepared = image_preprocess.prepare_image(_photo((300, 100), orientation=6), "image/jpeg")
+    with Image.open(io.BytesIO(prepared.data)) as out:
+        assert out.size == (100, 300)
+
+
+@pytest.mark.unit
+def test_undecodable_image_is_sent_unchanged():
+    prepared = image_preprocess.prepare_image(b"not an image", "image/png")
+    assert prepared.data == b"not an image"
+    assert prepared.metadata["preprocess"] == "failed"
+
+
+@pytest.mark.unit
+def test_image_upload_records_byte_savings():
+    parsed = parse_document("notes.jpg", _photo())
+    assert parsed.metadata["bytes_out"] < parsed.metadata["bytes_in"]
+    assert parsed.image_media_type == "image/jpeg"
+
+
+@pytest.mark.unit
+async def test_cached_transcription_is_marked_on_the_action(monkeypatch):
+    async def fake_vision(prompt, image_bytes, media_type, deadline=None, **kwargs):
+        return InferenceResult(content="notes from cache", cache="sqlite")
+
+    monkeypatch.setattr(settings, "parse_pool_size", 0)
+    monkeypatch.setattr(analyze_runner, "run_vision_inference_result", fake_vision)
+    parsed, actions, failure = await analyze_runner._prepare("notes.jpg", _photo((400, 300)), "req")
+
+    assert parsed.text == "notes from cache"
+    assert actions[-1].name == "vision_transcribe"
+    assert actions[-1].details["cached"] is True
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name,data", [
+    ("notes.txt", b"Interview notes for Jane"),
+    ("scores.csv", b"candidate,score\nJane,4\n"),
+])
+def test_parse_document_opens_spooled_path(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    assert parse_document(name, path).text == parse_document(name, data).text
+
+
+@pytest.mark.unit
+def test_parse_pdf_from_path_routes_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "image_preprocess_enabled", False)
+    path = tmp_path / "notes.pdf"
+    path.write_bytes(_mixed_pdf("TS"))
+
+    parsed = parse_document("notes.pdf", path)
+    assert parsed.parse_error is None
+    assert [p.number for p in parsed.scanned_pages] == [2]
+
+
+@pytest.mark.unit
+async def test_spool_upload_hashes_incrementally_and_enforces_limit(monkeypatch):
+    import hashlib
+
+    from api.app.parsers.upload_spool import UploadTooLarge, spool_upload
+
+    class _Upload:
+        def __init__(self, data):
+            self._buffer = io.BytesIO(data)
+
+        async def read(self, n):
+            return self._buffer.read(n)
+
+    monkeypatch.setattr(settings, "upload_chunk_bytes", 3)
+    data = b"Jane Doe resume text"
+    spooled = await spool_upload(_Upload(data), "resume.txt", max_bytes=100)
+    try:
+        assert spooled.size == len(data)
+        assert spooled.sha256 == hashlib.sha256(data).hexdigest()
+        assert spooled.read_bytes() == data
+    finally:
+        spooled.cleanup()
+    assert not spooled.path.exists()
+
+    with pytest.raises(UploadTooLarge):
+        await spool_upload(_Upload(data), "resume.txt", max_bytes=5)
+
+
+def _docx(paragraphs, tables=()) -> bytes:
+    """python-docx document: ``paragraphs`` first, then one table per list of rows."""
+    from docx import Document
+
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    for rows in tables:
+        table = doc.add_table(rows=len(rows), cols=len(rows[0]))
+        for r, values in enumerate(rows):
+            for c, value in enumerate(values):
+                table.cell(r, c).text = value
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+_SCORECARD_TABLE = [
+    ["Candidate", "Interviewer", "Technical", "Communication"],
+    ["Jane", "Ann", "4", "5"],
+    ["Jane", "Bob", "3", "4"],
+    ["Raj", "Ann", "5", "3"],
+]
+
+
+@pytest.mark.unit
+def test_docx_stream_matches_python_docx_paragraphs():
+    from docx import Document
+
+    data = _docx(["Interview notes", "Jane Doe\tSenior engineer", "", "Strong on systems design"])
+    expected = "\n".join(p.text for p in Document(io.BytesIO(data)).paragraphs if p.text.strip())
+
+    parsed = parse_document("notes.docx", data)
+    assert parsed.text == expected
+    assert parsed.rows == [] and parsed.scorecard_stats is None
+    assert parsed.metadata["parser"] == "docx_stream"
+
+
+@pytest.mark.unit
+def test_docx_tables_become_rows_and_stats(tmp_path):
+    path = tmp_path / "panel.docx"
+    path.write_bytes(_docx(["Panel scorecard"], [[["Section", "Notes"], ["Intro", "fine"]], _SCORECARD_TABLE]))
+
+    parsed = parse_document("panel.docx", path)
+
+    assert "Jane | Ann | 4 | 5" in parsed.text
+    assert "Intro | fine" in parsed.text
+    assert parsed.metadata["tables"] == 2
+    assert parsed.row_count == 3
+    assert parsed.rows[0] == {"Candidate": "Jane", "Interviewer": "Ann", "Technical": "4", "Communication": "5"}
+    assert parsed.scorecard_stats["candidate_stats"]["Jane"]["mean"] == 4.0
+
+
+@pytest.mark.unit
+def test_docx_blank_header_cells_are_unnamed_like_csv():
+    table = [[row[0], "" if i == 0 else "note", *row[1:], " " if i == 0 else "x"]
+             for i, row in enumerate(_SCORECARD_TABLE)]
+
+    parsed = parse_document("panel.docx", _docx(["Panel scorecard"], [table]))
+
+    assert list(parsed.rows[0]) == [
+        "Candidate", "Unnamed: 1", "Interviewer", "Technical", "Communication", "Unnamed: 5",
+    ]
+    assert parsed.scorecard_stats["candidate_stats"]["Jane"]["mean"] == 4.0
+
+
+@pytest.mark.unit
+def test_docx_extraction_stops_at_the_text_budget():
+    line = "Policy section text for the employee handbook. " * 10
+    data = _docx([line] * 200, [_SCORECARD_TABLE])
+
+    parsed = parse_document("policy.docx", data)
+
+    assert parsed.metadata["truncated"] is True
+    assert document_parser.PDF_EXTRACT_CHARS <= len(parsed.text) < document_parser.PDF_EXTRACT_CHARS + len(line) + 1
+    assert parsed.metadata["tables"] == 0    # the table comes after the budget and is never read
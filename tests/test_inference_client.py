@@ -0,0 +1,421 @@
+"""
+Unit tests for the inference client layer.
+
+Marked ``unit`` — no network.  Groq is never contacted; where a request
+would go out, the shared HTTP client is replaced with an ``httpx.MockTransport``.
+"""
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from api.app.clients import http_client, inference_client
+from api.app.clients.deadline import DeadlineExceeded, deadline_in, resolve_budget
+from api.app.clients.response_cache import ResponseCache
+from api.app.settings import settings
+
+# ---------------------------------------------------------------------------
+# Shared pooled HTTP client
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+async def test_http_client_is_shared_until_closed():
+    opened = await http_client.open_http_client()
+    assert http_client.get_http_client() is opened
+    assert await http_client.open_http_client() is opened
+
+    await http_client.close_http_client()
+    assert opened.is_closed
+
+
+@pytest.mark.unit
+async def test_get_http_client_opens_lazily_outside_lifespan():
+    await http_client.close_http_client()
+    client = http_client.get_http_client()
+    assert not client.is_closed
+    await http_client.close_http_client()
+
+
+# ---------------------------------------------------------------------------
+# Fixtures — fake Groq endpoint
+# ---------------------------------------------------------------------------
+
+@pytest.fixture()
+def groq_calls(tmp_path, monkeypatch):
+    """
+    Route the shared client through a MockTransport that answers every chat
+    completion with ``{"ok": true}`` and records each request payload.
+    """
+    monkeypatch.setattr(settings, "db_path", str(tmp_path / "test.db"))
+    inference_client._llm_cache.clear_memory()
+    inference_client._vision_cache.clear_memory()
+    inference_client._governors.clear()
+    inference_client._breakers.clear()
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        return httpx.Response(
+            200, json={"choices": [{"message": {"content": '{"ok": true}'}}], "usage": {}},
+        )
+
+    monkeypatch.setattr(
+        http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    yield calls
+    inference_client._llm_cache.clear_memory()
+    inference_client._vision_cache.clear_memory()
+    inference_client._breakers.clear()
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+async def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(table="t", max_entries=2, ttl_seconds=60)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    await cache.get("a")
+    await cache.set("c", "3")
+
+    assert (await cache.get("a"))[1] == "memory"
+    assert (await cache.get("b")) == (None, "miss")
+
+
+@pytest.mark.unit
+async def test_response_cache_expires_after_ttl():
+    cache = ResponseCache(table="t", max_entries=8, ttl_seconds=0)
+    await cache.set("a", "1")
+    time.sleep(0.01)
+    assert (await cache.get("a")) == (None, "miss")
+
+
+@pytest.mark.unit
+async def test_response_cache_sqlite_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResponseCache(table="t", max_entries=8, ttl_seconds=60, db_path=path)
+    await first.set("k", "value")
+
+    second = ResponseCache(table="t", max_entries=8, ttl_seconds=60, db_path=path)
+    assert await second.get("k") == ("value", "sqlite")
+    assert await second.get("k") == ("value", "memory")
+
+
+@pytest.mark.unit
+async def test_run_inference_serves_identical_request_from_cache(groq_calls):
+    first = await inference_client.run_inference_result("sys", "same resume")
+    second = await inference_client.run_inference_result("sys", "same resume")
+
+    assert first.cache == "miss"
+    assert second.cache == "memory"
+    assert second.content == first.content
+    assert len(groq_calls) == 1
+
+
+@pytest.mark.unit
+async def test_run_inference_cache_key_includes_prompt(groq_calls):
+    await inference_client.run_inference_result("sys", "resume A")
+    await inference_client.run_inference_result("sys", "resume B")
+    assert len(groq_calls) == 2
+
+
+@pytest.mark.unit
+async def test_reply_is_cached_only_once_parse_accepts_it(groq_calls):
+    def reject(raw):
+        raise ValueError("truncated")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await inference_client.run_inference_result("sys", "cut off", parse=reject)
+    assert len(groq_calls) == 2
+
+    first = await inference_client.run_inference_result("sys", "cut off", parse=inference_client.parse_json_reply)
+    second = await inference_client.run_inference_result("sys", "cut off", parse=inference_client.parse_json_reply)
+    assert (first.cache, second.cache) == ("miss", "memory")
+    assert second.parsed == {"ok": True}
+    assert len(groq_calls) == 3
+
+
+@pytest.mark.unit
+def test_parse_json_reply_strips_fences_and_rejects_non_objects():
+    assert inference_client.parse_json_reply('```json\n{"a": 1}\n```') == {"a": 1}
+    with pytest.raises(ValueError):
+        inference_client.parse_json_reply('{"a": 1')
+    with pytest.raises(ValueError):
+        inference_client.parse_json_reply("[1, 2]")
+
+
+@pytest.mark.unit
+async def test_vision_transcription_is_cached_by_image_content(groq_calls):
+    first = await inference_client.run_vision_inference_result("transcribe", b"scan-bytes", "image/jpeg")
+    again = await inference_client.run_vision_inference_result("transcribe", b"scan-bytes", "image/jpeg")
+    other = await inference_client.run_vision_inference_result("transcribe", b"other-scan", "image/jpeg")
+
+    assert (first.cache, again.cache, other.cache) == ("miss", "memory", "miss")
+    assert len(groq_calls) == 2
+
+
+@pytest.mark.unit
+async def test_vision_cache_survives_restart(groq_calls):
+    await inference_client.run_vision_inference_result("transcribe", b"scan-bytes", "image/jpeg")
+    inference_client._vision_cache.clear_memory()
+
+    again = await inference_client.run_vision_inference_result("transcribe", b"scan-bytes", "image/jpeg")
+    assert again.cache == "sqlite"
+    assert len(groq_calls) == 1
+
+
+# ---------------------------------------------------------------------------
+# Single-flight coalescing
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+async def test_concurrent_identical_requests_share_one_upstream_call(groq_calls):
+    results = await asyncio.gather(*[
+        inference_client.run_inference_result("sys", "panel upload", use_cache=False)
+        for _ in range(5)
+    ])
+
+    assert len(groq_calls) == 1
+    assert {r.content for r in results} == {'{"ok": true}'}
+    assert sorted(r.cache for r in results) == ["coalesced"] * 4 + ["off"]
+
+
+@pytest.mark.unit
+async def test_single_flight_releases_key_after_completion():
+    flight = inference_client._SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0)
+        return "done"
+
+    assert await flight.do("k", work) == ("done", False)
+    assert flight.in_flight == 0
+    assert await flight.do("k", work) == ("done", False)
+
+
+# ---------------------------------------------------------------------------
+# Rate governor
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+@pytest.mark.parametrize("raw,seconds", [
+    ("7.66s", 7.66),
+    ("2m59.56s", 179.56),
+    ("120ms", 0.12),
+    ("1h", 3600.0),
+    ("3", 3.0),
+    ("", None),
+])
+def test_parse_duration_handles_groq_reset_formats(raw, seconds):
+    parsed = inference_client._parse_duration(raw)
+    if seconds is None:
+        assert parsed is None
+    else:
+        assert parsed == pytest.approx(seconds)
+
+
+@pytest.mark.unit
+def test_governor_honors_retry_after_on_429():
+    governor = inference_client._RateGovernor("m", rpm=30, tpm=10_000)
+    governor.observe(httpx.Response(429, headers={"retry-after": "5"}))
+    assert 4_000 < governor.stats()["blocked_for_ms"] <= 5_000
+
+
+@pytest.mark.unit
+def test_governor_adopts_remaining_tokens_from_headers():
+    governor = inference_client._RateGovernor("m", rpm=30, tpm=10_000)
+    governor.observe(httpx.Response(200, headers={
+        "x-ratelimit-remaining-tokens": "250",
+        "x-ratelimit-reset-tokens": "7.5s",
+    }))
+    assert governor.tokens.level == pytest.approx(250, abs=1)
+    assert governor.tokens.delay_for(1_000) > 0
+
+
+@pytest.mark.unit
+async def test_governor_queues_when_request_budget_is_spent(monkeypatch):
+    governor = inference_client._RateGovernor("m", rpm=60, tpm=100_000)
+    governor.requests.level = 0.0   # one request per second refill
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        governor.requests.level = 1.0
+
+    monkeypatch.setattr(inference_client.asyncio, "sleep", fake_sleep)
+    await governor.acquire(tokens=10)
+
+    assert sleeps and sleeps[0] == pytest.approx(1.0, abs=0.05)
+    assert governor.stats()["admitted"] == 1
+    assert governor.stats()["queue_depth"] == 0
+
+
+@pytest.mark.unit
+async def test_429_feeds_governor_and_retries(groq_calls, monkeypatch):
+    responses = [
+        httpx.Response(429, headers={"retry-after": "0"}),
+        httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]}),
+    ]
+
+    def handler(request):
+        groq_calls.append(request)
+        return responses.pop(0)
+
+    monkeypatch.setattr(
+        http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    result = await inference_client.run_inference_result("sys", "retry me", use_cache=False)
+
+    assert result.content == "ok"
+    assert len(groq_calls) == 2
+    assert settings.groq_model in inference_client.rate_governor_stats()
+
+
+# ---------------------------------------------------------------------------
+# Request deadline budget
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+@pytest.mark.parametrize("header,default,expected", [
+    (None, 45.0, 45.0),
+    ("5000", 45.0, 5.0),
+    ("garbage", 45.0, 45.0),
+    ("-10", 45.0, 45.0),
+    ("999999999", 45.0, 120.0),
+])
+def test_resolve_budget_prefers_header_and_caps(header, default, expected, monkeypatch):
+    monkeypatch.setattr(settings, "max_request_budget_seconds", 120.0)
+    assert resolve_budget(header, default) == pytest.approx(expected)
+
+
+@pytest.mark.unit
+async def test_exhausted_budget_fails_fast_without_calling_groq(groq_calls):
+    with pytest.raises(DeadlineExceeded):
+        await inference_client.run_inference_result(
+            "sys", "too late", use_cache=False, deadline=time.monotonic() - 1,
+        )
+    assert groq_calls == []
+
+
+@pytest.mark.unit
+async def test_retries_stop_at_the_deadline(groq_calls, monkeypatch):
+    monkeypatch.setattr(settings, "deadline_min_attempt_seconds", 0.2)
+
+    def handler(request):
+        groq_calls.append(request)
+        return httpx.Response(503)
+
+    monkeypatch.setattr(
+        http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    t0 = time.monotonic()
+    with pytest.raises((httpx.HTTPStatusError, DeadlineExceeded)):
+        await inference_client.run_inference_result(
+            "sys", "flaky upstream", use_cache=False, deadline=deadline_in(0.3),
+        )
+
+    assert time.monotonic() - t0 < 0.6          # unbounded: ~3 s of backoff
+    assert len(groq_calls) < 3
+
+
+@pytest.mark.unit
+async def test_slow_upstream_is_cut_off_at_the_deadline(groq_calls, monkeypatch):
+    async def handler(request):
+        await asyncio.sleep(2)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "late"}}]})
+
+    monkeypatch.setattr(settings, "deadline_min_attempt_seconds", 0.05)
+    monkeypatch.setattr(
+        http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    t0 = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        await inference_client.run_inference_result(
+            "sys", "slow", use_cache=False, deadline=deadline_in(0.2),
+        )
+    assert time.monotonic() - t0 < 0.5
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+def _failing_upstream(monkeypatch, calls, status=503):
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(status)
+
+    monkeypatch.setattr(
+        http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    monkeypatch.setattr(inference_client, "_exponential_wait", lambda retry_state: 0)
+
+
+@pytest.mark.unit
+async def test_breaker_opens_after_consecutive_outages_and_fails_fast(groq_calls, monkeypatch):
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 3)
+    _failing_upstream(monkeypatch, groq_calls)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await inference_client.run_inference_result("sys", "down", use_cache=False)
+    assert len(groq_calls) == 3
+    assert inference_client.circuit_breaker_stats()[settings.groq_model]["state"] == "open"
+
+    t0 = time.monotonic()
+    with pytest.raises(inference_client.CircuitOpenError):
+        await inference_client.run_inference_result("sys", "still down", use_cache=False)
+    assert time.monotonic() - t0 < 0.05
+    assert len(groq_calls) == 3
+
+
+@pytest.mark.unit
+def test_breaker_half_open_lets_one_probe_through():
+    breaker = inference_client._CircuitBreaker("m", failure_threshold=1, reset_seconds=0)
+    breaker.record_failure(httpx.ConnectError("boom"))
+    assert breaker.state == "open"
+
+    breaker.before_call()                       # reset elapsed: this caller is the probe
+    assert breaker.state == "half_open"
+    with pytest.raises(inference_client.CircuitOpenError):
+        breaker.before_call()                   # everyone else still fails fast
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+@pytest.mark.unit
+def test_breaker_failed_probe_reopens():
+    breaker = inference_client._CircuitBreaker("m", failure_threshold=5, reset_seconds=0)
+    breaker.state, breaker.opened_at = "open", 0.0
+    breaker.before_call()
+    breaker.record_failure(httpx.ReadTimeout("slow"))
+    assert breaker.state == "open"
+    assert breaker.stats()["times_opened"] == 1
+
+
+@pytest.mark.unit
+async def test_rate_limiting_does_not_trip_the_breaker(groq_calls, monkeypatch):
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 1)
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+    _failing_upstream(monkeypatch, groq_calls, status=429)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await inference_client.run_inference_result("sys", "busy", use_cache=False)
+    assert inference_client.circuit_breaker_stats()[settings.groq_model]["state"] == "closed"
+
+
+@pytest.mark.unit
+def test_health_reports_circuit_breakers(client, monkeypatch):
+    breaker = inference_client._CircuitBreaker("m", failure_threshold=1, reset_seconds=60)
+    breaker.record_failure(httpx.ConnectError("boom"))
+    monkeypatch.setitem(inference_client._breakers, "m", breaker)
+
+    body = client.get("/health").json()
+    assert body["status"] == "degraded"
+    assert body["circuit_breakers"]["m"]["state"] == "open"
@@ -0,0 +1,103 @@
+"""
+Contract tests for the async analyze job endpoints.
+
+POST /agent/analyze/jobs queues work and GET /agent/analyze/jobs/{job_id}
+polls it.  Workers run inside the TestClient's event loop and call the
+mocked ``run_analyze``, so no Groq calls are made.
+"""
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from api.app.db.database import init_db
+from api.app.db.repository import create_job
+from api.app.main import app
+from api.app.settings import settings
+
+_MINIMAL_TXT = b"Jane Doe\nSenior Python Engineer\n5 years experience"
+
+
+def _wait_for(client, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(f"/agent/analyze/jobs/{job_id}").json()
+        if body["status"] in ("done", "failed"):
+            return body
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_submit_returns_job_id_immediately(client):
+    r = client.post("/agent/analyze/jobs", files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")})
+    assert r.status_code == 202
+    body = r.json()
+    assert body["status"] == "queued"
+    assert body["status_url"] == f"/agent/analyze/jobs/{body['job_id']}"
+
+
+def test_job_completes_with_analyze_response(client, mock_analyze):
+    r = client.post(
+        "/agent/analyze/jobs",
+        files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")},
+        headers={"X-Session-ID": "candidate-jane"},
+    )
+    job = _wait_for(client, r.json()["job_id"])
+
+    assert job["status"] == "done"
+    assert job["result"]["doc_type"] == "resume"
+    assert mock_analyze.await_args.kwargs["content"] == _MINIMAL_TXT
+    assert len(client.get("/sessions/candidate-jane").json()) == 1
+
+
+def test_job_keeps_cache_opt_out(client, mock_analyze):
+    r = client.post(
+        "/agent/analyze/jobs",
+        files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")},
+        data={"use_cache": "false"},
+    )
+    _wait_for(client, r.json()["job_id"])
+
+    assert mock_analyze.await_args.kwargs["use_cache"] is False
+
+
+def test_failed_job_reports_error(client, mock_analyze):
+    mock_analyze.side_effect = RuntimeError("parser exploded")
+    r = client.post("/agent/analyze/jobs", files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")})
+    job = _wait_for(client, r.json()["job_id"])
+
+    assert job["status"] == "failed"
+    assert job["error"] == "parser exploded"
+    assert job["result"] is None
+
+
+def test_unknown_job_returns_404(client):
+    assert client.get("/agent/analyze/jobs/nope").status_code == 404
+
+
+def test_submit_rejects_empty_upload(client):
+    r = client.post("/agent/analyze/jobs", files={"file": ("resume.txt", b"", "text/plain")})
+    assert r.status_code == 400
+
+
+def test_full_queue_returns_503(client, monkeypatch):
+    monkeypatch.setattr(settings, "job_queue_max", 0)
+    r = client.post("/agent/analyze/jobs", files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")})
+    assert r.status_code == 503
+
+
+def test_queued_jobs_survive_restart(tmp_path, monkeypatch, mock_analyze):
+    from unittest.mock import patch
+
+    monkeypatch.setattr(settings, "db_path", str(tmp_path / "test.db"))
+
+    async def _seed():
+        await init_db()
+        await create_job(job_id="left-over", session_id=None, filename="resume.txt",
+                         context="", content=_MINIMAL_TXT)
+    asyncio.run(_seed())
+
+    with patch("api.app.main.run_analyze", mock_analyze), TestClient(app) as c:
+        job = _wait_for(c, "left-over")
+
+    assert job["status"] == "done"
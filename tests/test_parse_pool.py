@@ -0,0 +1,107 @@
+"""
+Unit tests for the document parse pool.
+
+Marked ``unit`` — parsing runs in real worker processes (spawn) or threads,
+no network involved.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from api.app.parsers import parse_pool
+from api.app.settings import settings
+
+
+def _sleepy_parse(filename, content, submitted_at):
+    """Runs in the worker: ``slow*`` files hang, ``busy*`` files take a second, ``crash*`` files kill it."""
+    if filename.startswith("crash"):
+        os._exit(1)
+    time.sleep(30 if filename.startswith("slow") else 1 if filename.startswith("busy") else 0)
+    return parse_pool._timed_parse(filename, content, submitted_at)
+
+
+@pytest.fixture()
+def pool(monkeypatch):
+    monkeypatch.setattr(settings, "parse_pool_size", 1)
+    monkeypatch.setattr(settings, "parse_timeout_seconds", 60.0)
+    yield
+    parse_pool.shutdown_parse_pool()
+
+
+@pytest.mark.unit
+async def test_parse_runs_in_worker_process_and_reports_queue_time(pool):
+    parsed, metrics = await parse_pool.parse_document_async("notes.txt", b"Interview notes")
+
+    assert parsed.text == "Interview notes"
+    assert parsed.parse_error is None
+    assert metrics["executor"] == "process"
+    assert metrics["queue_ms"] >= 0
+    assert parse_pool.parse_pool_stats()["in_flight"] == 0
+
+
+@pytest.mark.unit
+async def test_parse_errors_come_back_as_parsed_document(pool):
+    parsed, _ = await parse_pool.parse_document_async("archive.zip", b"PK")
+    assert parsed.parse_error == "Unsupported file type: .zip"
+
+
+@pytest.mark.unit
+async def test_parse_timeout_returns_parse_error(pool, monkeypatch):
+    # Spawning the first worker alone takes far longer than 1 ms
+    parse_pool.shutdown_parse_pool()
+    monkeypatch.setattr(settings, "parse_timeout_seconds", 0.001)
+
+    parsed, _ = await parse_pool.parse_document_async("slow.txt", b"text")
+
+    assert parsed.parse_error.startswith("Parsing timed out")
+    assert parse_pool.parse_pool_stats()["timeouts"] >= 1
+
+
+@pytest.mark.unit
+async def test_timeout_recycle_does_not_fail_concurrent_parses(pool, monkeypatch):
+    monkeypatch.setattr(settings, "parse_pool_size", 4)
+    monkeypatch.setattr(settings, "parse_timeout_seconds", 5.0)
+    monkeypatch.setattr(parse_pool, "_timed_parse", _sleepy_parse)
+    parse_pool.shutdown_parse_pool()
+    await asyncio.gather(*(parse_pool.parse_document_async("warm.txt", b"x") for _ in range(4)))
+
+    slow = asyncio.create_task(parse_pool.parse_document_async("slow.txt", b"hangs"))
+    await asyncio.sleep(4.5)    # the busy parses are mid-flight when slow.txt times out
+    busy = await asyncio.gather(*(
+        parse_pool.parse_document_async(f"busy-{i}.txt", f"notes {i}".encode()) for i in range(3)
+    ))
+
+    assert (await slow)[0].parse_error.startswith("Parsing timed out")
+    assert [parsed.text for parsed, _ in busy] == ["notes 0", "notes 1", "notes 2"]
+    assert all(parsed.parse_error is None for parsed, _ in busy)
+
+
+@pytest.mark.unit
+async def test_worker_crash_is_blamed_on_the_file_that_caused_it(pool, monkeypatch):
+    monkeypatch.setattr(settings, "parse_pool_size", 2)
+    monkeypatch.setattr(settings, "parse_timeout_seconds", 30.0)
+    monkeypatch.setattr(parse_pool, "_timed_parse", _sleepy_parse)
+    parse_pool.shutdown_parse_pool()
+    await asyncio.gather(*(parse_pool.parse_document_async("warm.txt", b"x") for _ in range(2)))
+    crashes = parse_pool.parse_pool_stats()["crashes"]
+
+    # Both orders, so either request may be the one to see the broken pool first
+    for names in (("crash.txt", "busy.txt"), ("busy.txt", "crash.txt")):
+        results = await asyncio.gather(*(parse_pool.parse_document_async(n, b"notes") for n in names))
+        by_name = dict(zip(names, (parsed for parsed, _ in results)))
+
+        assert by_name["crash.txt"].parse_error == "Parser worker crashed on this file"
+        assert by_name["busy.txt"].parse_error is None and by_name["busy.txt"].text == "notes"
+
+    assert parse_pool.parse_pool_stats()["crashes"] == crashes + 2
+
+
+@pytest.mark.unit
+async def test_pool_size_zero_parses_in_a_thread(monkeypatch):
+    monkeypatch.setattr(settings, "parse_pool_size", 0)
+    parsed, metrics = await parse_pool.parse_document_async("notes.txt", b"hello")
+
+    assert parsed.text == "hello"
+    assert metrics["executor"] == "thread"
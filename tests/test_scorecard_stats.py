@@ -0,0 +1,158 @@
+"""
+Unit tests for the vectorized scorecard statistics engine.
+
+The previous row-dict implementation lives on in the benchmark as
+``legacy_scorecard_stats``; these tests hold the DataFrame engine — whole
+table or streamed in chunks — to its exact output (values, types, key
+order). The stats are serialized into the LLM prompt, so even ``0`` vs
+``0.0`` matters.
+"""
+import io
+import json
+import random
+
+import pandas as pd
+import pytest
+
+from api.app.analytics.scorecard_stats import (
+    ScorecardAccumulator,
+    compute_scorecard_stats,
+    compute_scorecard_stats_from_rows,
+)
+from api.app.parsers.document_parser import parse_document
+from benchmarks.bench_scorecard_stats import legacy_scorecard_stats, panel_export
+
+_PANEL_CSV = (
+    "candidate_name,interviewer,technical,communication\n"
+    "Jane,Ann,4,5\n"
+    "Jane,Bob,2,3\n"
+    "Raj,Ann,5,5\n"
+    "Raj,Cy,\"1,000\",n/a\n"
+    "Li,Bob,3,\n"
+)
+
+
+def _frame(csv: str) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(csv))
+
+
+def _chunked(csv: str, chunk_rows: int) -> dict:
+    def _chunks():
+        return pd.read_csv(io.StringIO(csv), chunksize=chunk_rows)
+
+    accumulator = ScorecardAccumulator()
+    for chunk in _chunks():
+        accumulator.add(chunk)
+    return accumulator.result(reread=_chunks)
+
+
+def _legacy(df: pd.DataFrame) -> dict:
+    return legacy_scorecard_stats(df.fillna("").to_dict(orient="records"))
+
+
+@pytest.mark.unit
+def test_panel_stats_match_legacy_output():
+    df = _frame(_PANEL_CSV)
+    stats = compute_scorecard_stats(df)
+
+    assert json.dumps(stats) == json.dumps(_legacy(df))
+    assert stats["candidate_column"] == "candidate_name"
+    assert stats["evaluator_column"] == "interviewer"
+    assert stats["candidate_stats"]["Li"] == {"mean": 1.5, "stdev": 0, "n_evaluators": 1, "high_variance": False}
+    assert list(stats["candidate_stats"]) == ["Jane", "Raj", "Li"]
+
+
+@pytest.mark.unit
+def test_no_rating_columns_reports_error():
+    assert compute_scorecard_stats(_frame("name,notes\nJane,strong\n")) == {
+        "error": "No numeric rating columns found in scorecard."
+    }
+    assert compute_scorecard_stats(_frame("a,b\n")) == {}
+
+
+@pytest.mark.unit
+def test_randomized_tables_match_legacy_output():
+    rng = random.Random(20)
+    cells = ["", "1", "2", "3", "4", "5", "2.5", "3.75", "\"1,5\"", "n/a", "x"]
+    for _ in range(150):
+        lines = ["candidate,evaluator,r1,r2,r3"]
+        for _ in range(rng.randint(1, 60)):
+            ratings = [rng.choice(cells[1:8]) if rng.random() < 0.9 else rng.choice(cells) for _ in range(3)]
+            lines.append(f"C{rng.randint(0, 8)},E{rng.randint(0, 4)},{','.join(ratings)}")
+        df = _frame("\n".join(lines))
+        assert json.dumps(compute_scorecard_stats(df)) == json.dumps(_legacy(df)), "\n".join(lines)
+
+
+@pytest.mark.unit
+def test_generated_panel_export_matches_legacy_output():
+    df = panel_export(20_000)
+    assert json.dumps(compute_scorecard_stats(df)) == json.dumps(_legacy(df))
+
+
+@pytest.mark.unit
+def test_rows_entry_point_matches_frame():
+    df = _frame(_PANEL_CSV)
+    rows = df.fillna("").to_dict(orient="records")
+    assert compute_scorecard_stats_from_rows(rows) == compute_scorecard_stats(df)
+    assert "_overall" not in rows[0]   # rows are no longer mutated
+
+
+@pytest.mark.unit
+def test_parse_tabular_precomputes_stats_and_samples_rows(monkeypatch):
+    from api.app.parsers import document_parser
+
+    monkeypatch.setattr(document_parser, "TABLE_SAMPLE_ROWS", 2)
+    parsed = parse_document("panel.csv", _PANEL_CSV.encode())
+
+    assert parsed.row_count == 5
+    assert len(parsed.rows) == 2
+    assert parsed.scorecard_stats["n_rows"] == 5
+
+
+@pytest.mark.unit
+def test_chunked_accumulator_matches_whole_table():
+    rng = random.Random(21)
+    cells = ["", "1", "2", "3", "4", "5", "2.5", "3.75", "\"1,5\""]
+    for _ in range(150):
+        lines = ["candidate,evaluator,r1,r2,r3"]
+        for _ in range(rng.randint(1, 60)):
+            ratings = [rng.choice(cells[1:8]) if rng.random() < 0.9 else rng.choice(cells) for _ in range(3)]
+            lines.append(f"C{rng.randint(0, 8)},E{rng.randint(0, 4)},{','.join(ratings)}")
+        csv = "\n".join(lines)
+        whole = json.dumps(compute_scorecard_stats(_frame(csv)))
+        assert json.dumps(_chunked(csv, rng.randint(1, 7))) == whole, csv
+
+
+@pytest.mark.unit
+def test_chunked_generated_panel_matches_legacy_output():
+    df = panel_export(20_000)
+    assert json.dumps(_chunked(df.to_csv(index=False), 3_000)) == json.dumps(_legacy(df))
+
+
+@pytest.mark.unit
+def test_chunked_edge_cases():
+    assert _chunked("a,b\n", 2) == {}
+    assert _chunked("name,notes\nJane,strong\nRaj,ok\n", 1) == {
+        "error": "No numeric rating columns found in scorecard."
+    }
+
+    accumulator = ScorecardAccumulator()
+    for chunk in pd.read_csv(io.StringIO("candidate,score\nJane,0.125\nJane,0.125\n"), chunksize=1):
+        accumulator.add(chunk)
+    with pytest.raises(ValueError):
+        accumulator.result()   # a mean of 0.125 sits on a rounding tie; two chunks need a reread
+
+
+@pytest.mark.unit
+def test_parse_csv_streams_chunks_and_keeps_a_sample(monkeypatch):
+    from api.app.parsers import document_parser
+    from api.app.settings import settings
+
+    monkeypatch.setattr(settings, "table_chunk_rows", 2)
+    monkeypatch.setattr(document_parser, "TABLE_SAMPLE_ROWS", 3)
+    parsed = parse_document("panel.csv", _PANEL_CSV.encode())
+
+    assert parsed.row_count == 5
+    assert [r["candidate_name"] for r in parsed.rows] == ["Jane", "Jane", "Raj"]
+    assert parsed.text.endswith("[... 2 more rows ...]")
+    assert parsed.scorecard_stats == compute_scorecard_stats(_frame(_PANEL_CSV))
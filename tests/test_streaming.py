@@ -0,0 +1,96 @@
+"""
+Tests for streaming analysis: the incremental narrative extractor and the
+server-sent-event contract of POST /agent/analyze/stream.
+
+The endpoint tests use the ``mock_stream_analyze`` fixture, so no Groq calls.
+"""
+import json
+
+import pytest
+
+from api.app.graph.streaming import JsonFieldStreamer
+
+_MINIMAL_TXT = b"Jane Doe\nSenior Python Engineer\n5 years experience\nSkills: FastAPI, LangGraph"
+
+
+def _parse_sse(body: str) -> list:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+# ---------------------------------------------------------------------------
+# JsonFieldStreamer
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000])
+def test_streamer_extracts_field_across_chunk_boundaries(chunk_size):
+    narrative = 'Lead with "hire".\nEvidence: 5 yrs — café \\ done'
+    raw = json.dumps({"recommendation": "hire", "narrative": narrative, "tail": 1})
+
+    streamer = JsonFieldStreamer("narrative")
+    out = "".join(streamer.feed(raw[i:i + chunk_size]) for i in range(0, len(raw), chunk_size))
+
+    assert out == narrative
+    assert streamer.done
+
+
+@pytest.mark.unit
+def test_streamer_ignores_field_name_inside_other_values():
+    raw = json.dumps({"summary": 'mentions "narrative" inline', "narrative": "memo"})
+    streamer = JsonFieldStreamer("narrative")
+    assert streamer.feed(raw) == "memo"
+
+
+@pytest.mark.unit
+def test_streamer_emits_nothing_when_field_missing():
+    streamer = JsonFieldStreamer("narrative")
+    assert streamer.feed('{"recommendation": "pass"}') == ""
+    assert not streamer.done
+
+
+# ---------------------------------------------------------------------------
+# POST /agent/analyze/stream
+# ---------------------------------------------------------------------------
+
+def test_analyze_stream_emits_progress_tokens_then_result(client):
+    r = client.post(
+        "/agent/analyze/stream",
+        files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(r.text)
+    names = [name for name, _ in events]
+    assert names[:3] == ["parsed", "classified", "analyzer_started"]
+    assert names[-1] == "result"
+
+    narrative = "".join(data["text"] for name, data in events if name == "token")
+    assert narrative == "Strong candidate."
+
+    result = events[-1][1]
+    assert result["request_id"] == r.headers["x-request-id"]
+    assert result["doc_type"] == "resume"
+
+
+def test_analyze_stream_result_is_saved_to_session(client):
+    client.post(
+        "/agent/analyze/stream",
+        files={"file": ("resume.txt", _MINIMAL_TXT, "text/plain")},
+        headers={"X-Session-ID": "stream-session"},
+    )
+    r = client.get("/sessions/stream-session")
+    assert r.status_code == 200
+    assert r.json()[0]["endpoint"] == "analyze"
+
+
+def test_analyze_stream_rejects_empty_file(client):
+    r = client.post(
+        "/agent/analyze/stream",
+        files={"file": ("empty.txt", b"", "text/plain")},
+    )
+    assert r.status_code == 400
@@ -0,0 +1,114 @@
+"""
+Unit tests for section-aware text budgeting (parsers/text_budget.py).
+"""
+import re
+
+import pytest
+
+from api.app.parsers.text_budget import CHARS_PER_TOKEN, estimate_tokens, fit_text, split_sections
+
+_MARKER = re.compile(r"\[\.\.\. (?:\d+ section\(s\) omitted|truncated|[\d,]+ characters omitted) \.\.\.\]")
+_ROLE = "- Built payment pipelines in Go at 40k rps; cut p99 latency by 35%\n"
+
+
+def _resume(roles: int = 12) -> str:
+    experience = "".join(f"Company {i} — Senior Engineer ({2024 - i})\n" + _ROLE * 6 for i in range(roles))
+    return (
+        "Jane Doe\njane@example.com | +1 555 0100\n\n"
+        "SUMMARY\nBackend engineer with ten years in payments.\n\n"
+        f"PROFESSIONAL EXPERIENCE\n{experience}\n"
+        "Technical Skills:\nPython, Go, Kubernetes, PostgreSQL, Kafka\n\n"
+        "EDUCATION\nBSc Computer Science, 2012\n\n"
+        "INTERESTS\nClimbing, chess\n\n"
+        "References\nAvailable on request\n"
+    )
+
+
+def _interview_notes(questions: int = 30) -> str:
+    answer = "She walked through the trade-offs, the failure modes and the rollout plan. " * 6
+    qa = "".join(f"Q{i}: How would you design system {i}?\nA: {answer}\n\n" for i in range(1, questions + 1))
+    return (
+        "Interview notes — Jane Doe, backend loop\nPanel: A. Smith, B. Jones\n\n"
+        f"{qa}"
+        "Concerns:\nLimited frontend exposure.\n\n"
+        "Recommendation:\nStrong hire — advance to the final round.\n"
+    )
+
+
+@pytest.mark.unit
+def test_text_within_budget_is_unchanged():
+    text = _resume(roles=1)
+    assert fit_text(text, estimate_tokens(text), "resume") == text
+
+
+@pytest.mark.unit
+def test_split_sections_finds_headings_and_qa_blocks_but_not_bullets():
+    kinds = [s.kind for s in split_sections(_resume(roles=2))]
+    assert kinds == ["preamble", "summary", "experience", "skills", "education", "interests", "references"]
+
+    notes = split_sections(_interview_notes(questions=3))
+    assert [s.kind for s in notes] == ["preamble", "qa", "qa", "qa", "concerns", "recommendation"]
+
+
+@pytest.mark.unit
+def test_resume_keeps_latest_roles_and_skills_within_budget():
+    text = _resume()
+    fitted = fit_text(text, 800, "resume")
+
+    assert estimate_tokens(fitted) <= 800
+    assert "Jane Doe" in fitted and "Company 0 —" in fitted      # contact line, most recent role
+    assert "Python, Go, Kubernetes" in fitted                    # skills survive below the long experience block
+    assert "Company 11 —" not in fitted and "Climbing" not in fitted
+    assert fitted.index("SUMMARY") < fitted.index("Company 0") < fitted.index("Technical Skills")
+
+
+@pytest.mark.unit
+def test_interview_notes_keep_the_conclusion():
+    fitted = fit_text(_interview_notes(), 1_000, "interview_notes")
+
+    assert estimate_tokens(fitted) <= 1_000
+    assert "Strong hire — advance to the final round." in fitted
+    assert "Limited frontend exposure." in fitted
+    assert "section(s) omitted" in fitted
+
+
+@pytest.mark.unit
+def test_classification_sample_spans_the_document():
+    fitted = fit_text(_interview_notes(), 300)
+
+    assert estimate_tokens(fitted) <= 300
+    assert fitted.startswith("Interview notes — Jane Doe")
+    assert "Recommendation:" in fitted
+    assert "section(s) omitted" in fitted
+
+
+@pytest.mark.unit
+def test_unstructured_text_keeps_opening_and_ending():
+    text = "Opening line about the candidate.\n" + "filler words here and there\n" * 2_000 + "Final verdict: hire."
+    fitted = fit_text(text, 200)
+
+    assert len(fitted) <= 200 * CHARS_PER_TOKEN
+    assert fitted.startswith("Opening line") and fitted.endswith("Final verdict: hire.")
+    assert "characters omitted" in fitted
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("doc_type, text", [
+    ("resume", _resume()), ("interview_notes", _interview_notes()), (None, _interview_notes()),
+], ids=["resume", "interview_notes", "classification"])
+def test_tiny_budgets_never_cut_through_a_marker(doc_type, text):
+    for budget in range(0, 120):
+        fitted = fit_text(text, budget, doc_type)
+
+        assert len(fitted) <= budget * CHARS_PER_TOKEN
+        assert fitted.count("[...") == len(_MARKER.findall(fitted)), (budget, fitted)
+
+
+@pytest.mark.unit
+def test_budget_smaller_than_the_marker_keeps_a_plain_head():
+    text = "Opening line about the candidate.\n" + "filler words here and there\n" * 2_000
+
+    assert fit_text(text, 0) == ""
+    assert fit_text(text, 3) == text[:12]
+    fitted = fit_text(_resume(), 2, "resume")
+    assert 0 < len(fitted) <= 8 and _resume().startswith(fitted)
@@ -0,0 +1,110 @@
+"""
+Unit tests for streaming XLSX ingestion.
+
+Workbooks are built in memory with openpyxl. Each sheet's stats are held to
+what ``compute_scorecard_stats(pd.read_excel(...))`` — the previous parser —
+returns for that sheet; the calamine engine runs only where it is installed.
+"""
+import importlib.util
+import io
+import json
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from api.app.analytics.scorecard_stats import compute_scorecard_stats
+from api.app.parsers.document_parser import parse_document
+from api.app.parsers.workbook import _framed
+from api.app.settings import settings
+
+_ENGINES = [
+    "openpyxl",
+    pytest.param("calamine", marks=pytest.mark.skipif(
+        importlib.util.find_spec("python_calamine") is None, reason="python-calamine not installed",
+    )),
+]
+
+
+def _workbook() -> bytes:
+    wb = openpyxl.Workbook()
+    panel = wb.active
+    panel.title = "Panel A"
+    panel.append(["candidate_name", "interviewer", "technical", "communication"])
+    for i in range(40):
+        panel.append([f"C{i % 7}", f"E{i % 3}", (i % 5) + 1, "n/a" if i == 9 else 2.5 + (i % 3)])
+    panel.append([None] * 4)
+    panel.append(["C1", "E0", 4, "1,5"])
+    wb.create_sheet("Instructions").append(["Score every dimension 1-5"])
+    wb.create_sheet("Empty")
+    other = wb.create_sheet("Panel B")
+    other.append(["applicant", "rater", "score"])
+    for i in range(25):
+        other.append([f"A{i % 4}", f"R{i % 2}", (i * 7) % 5 + 1])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+@pytest.fixture()
+def engine(request, monkeypatch):
+    monkeypatch.setattr(settings, "xlsx_engine", request.param)
+    monkeypatch.setattr(settings, "table_chunk_rows", 8)
+    return request.param
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("engine", _ENGINES, indirect=True)
+def test_every_sheet_is_parsed_and_scored_separately(engine):
+    data = _workbook()
+    parsed = parse_document("panel.xlsx", data)
+
+    assert parsed.parse_error is None
+    assert parsed.metadata["engine"] == engine
+    sheets = {s["sheet"]: s for s in parsed.metadata["sheets"]}
+    assert [(s["rows"], s["cols"]) for s in sheets.values()] == [(42, 4), (0, 1), (0, 0), (25, 3)]
+    assert all(s["ms"] >= 0 and "rss_delta_mb" in s for s in sheets.values())
+    assert parsed.row_count == 67
+
+    assert set(parsed.scorecard_stats["sheets"]) == {"Panel A", "Panel B"}
+    for name in ("Panel A", "Panel B"):
+        expected = compute_scorecard_stats(pd.read_excel(io.BytesIO(data), sheet_name=name))
+        assert json.dumps(parsed.scorecard_stats["sheets"][name]) == json.dumps(expected)
+    assert "Sheet: Panel B (25 rows)" in parsed.text
+    assert parsed.rows[0]["candidate_name"] == "C0"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("engine", _ENGINES, indirect=True)
+def test_single_scorecard_sheet_keeps_the_flat_stats_dict(engine, tmp_path):
+    wb = openpyxl.Workbook()
+    wb.active.append(["candidate", "evaluator", "score"])
+    wb.active.append(["Jane", "Ann", 4])
+    wb.active.append(["Jane", "Bob", 5])
+    wb.create_sheet("Notes").append(["free text"])
+    path = tmp_path / "scores.xlsx"
+    wb.save(path)
+
+    parsed = parse_document("scores.xlsx", path)
+
+    assert parsed.scorecard_stats["candidate_stats"]["Jane"]["mean"] == 4.5
+    assert "sheets" not in parsed.scorecard_stats
+
+
+@pytest.mark.unit
+def test_framed_rows_match_read_excel_conventions():
+    rows = [
+        (None, None, None),
+        ("name", None, "name"),
+        ("Jane", 4.0, "n/a"),
+        (None, None, None),
+        ("Raj", 3.5, None),
+        (None, None, None),
+    ]
+    (df,) = list(_framed(rows, chunk_rows=100))
+
+    assert list(df.columns) == ["name", "Unnamed: 1", "name.1"]
+    assert len(df) == 3                        # inner blank row kept, trailing one dropped
+    assert df.iloc[0, 1] == 4
+    assert df.isna().iloc[1].all()
+    assert pd.isna(df.iloc[0, 2])